@@ -0,0 +1,58 @@
+"""Composite indexes for the hot filter combinations
+
+Created with CREATE INDEX CONCURRENTLY, so the tables stay writable while
+they build. CONCURRENTLY can't run inside a transaction, hence the
+autocommit block.
+
+Revision ID: 0001_hot_filter_indexes
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0001_hot_filter_indexes"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns) - keep in sync with __table_args__ in app/models.py
+INDEXES = [
+    ("ix_users_division_id_is_active", "users", ["division_id", "is_active"]),
+    ("ix_users_department_id", "users", ["department_id"]),
+    ("ix_users_role_is_active", "users", ["role", "is_active"]),
+    ("ix_audit_logs_user_id_created_at", "audit_logs", ["user_id", "created_at DESC"]),
+    ("ix_audit_logs_action_resource_created_at", "audit_logs", ["action", "resource", "created_at DESC"]),
+    ("ix_notifications_user_id_read_created_at", "notifications", ["user_id", "read", "created_at DESC"]),
+]
+
+def _drop_if_invalid(name: str) -> None:
+    # An interrupted CONCURRENTLY build leaves an INVALID index behind, which
+    # IF NOT EXISTS would then silently keep
+    bind = op.get_bind()
+    invalid = bind.execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    check_invalid = is_postgres and not context.is_offline_mode()
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if check_invalid:
+                _drop_if_invalid(name)
+            op.create_index(
+                name, table, [sa.text(column) for column in columns],
+                postgresql_concurrently=True, if_not_exists=True
+            )
+        for table in sorted({table for _, table, _ in INDEXES}):
+            if is_postgres:
+                op.execute(f"ANALYZE {table}")
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,45 @@
+"""Org headcount rollup table
+
+Creates org_headcounts and fills it from users. From then on the app keeps
+it in step (app/org_rollup.py); reconcile_headcounts.py repairs drift.
+
+Revision ID: 0002_org_headcounts
+Revises: 0001_hot_filter_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_org_headcounts"
+down_revision = "0001_hot_filter_indexes"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "org_headcounts",
+        sa.Column("division_id", sa.Integer(), nullable=False),
+        sa.Column("department_id", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("active", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("managers", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("division_id", "department_id"),
+    )
+    op.create_index("ix_org_headcounts_department_id", "org_headcounts", ["department_id"])
+
+    # Role is stored by enum name on Postgres (SQLAlchemy Enum default)
+    op.execute("""
+        INSERT INTO org_headcounts (division_id, department_id, total, active, managers)
+        SELECT COALESCE(division_id, 0),
+               COALESCE(department_id, 0),
+               COUNT(*),
+               SUM(CASE WHEN is_active THEN 1 ELSE 0 END),
+               SUM(CASE WHEN role IN ('DIVISION_MANAGER', 'DEPARTMENT_MANAGER') THEN 1 ELSE 0 END)
+        FROM users
+        GROUP BY COALESCE(division_id, 0), COALESCE(department_id, 0)
+    """)
+
+def downgrade() -> None:
+    op.drop_index("ix_org_headcounts_department_id", table_name="org_headcounts")
+    op.drop_table("org_headcounts")
@@ -0,0 +1,38 @@
+"""Keyset index for the /dashboard/recent-activity admin feed
+
+The feed pages on (created_at, id) newest first. Built CONCURRENTLY like
+0001, so audit_logs stays writable.
+
+Revision ID: 0003_audit_log_keyset_index
+Revises: 0002_org_headcounts
+Create Date: 2026-10-18
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0003_audit_log_keyset_index"
+down_revision = "0002_org_headcounts"
+branch_labels = None
+depends_on = None
+
+NAME = "ix_audit_logs_created_at_id"
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        if bind.dialect.name == "postgresql" and not context.is_offline_mode():
+            # Drop what an interrupted CONCURRENTLY build left behind
+            invalid = bind.execute(sa.text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ), {"name": NAME}).first()
+            if invalid:
+                op.drop_index(NAME, postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            NAME, "audit_logs", [sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(NAME, table_name="audit_logs", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,39 @@
+"""Report job queue
+
+Revision ID: 0004_report_jobs
+Revises: 0003_audit_log_keyset_index
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_report_jobs"
+down_revision = "0003_audit_log_keyset_index"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "report_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("report_type", sa.String(), nullable=False),
+        sa.Column("requested_by", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("start_date", sa.DateTime(), nullable=False),
+        sa.Column("end_date", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="queued"),
+        sa.Column("progress", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("worker", sa.String(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_report_jobs_id", "report_jobs", ["id"])
+    op.create_index("ix_report_jobs_requested_by", "report_jobs", ["requested_by"])
+    op.create_index("ix_report_jobs_status_created_at", "report_jobs", ["status", "created_at"])
+
+def downgrade() -> None:
+    op.drop_table("report_jobs")
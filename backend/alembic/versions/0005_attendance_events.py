@@ -0,0 +1,32 @@
+"""Attendance events
+
+Clock-ins and clock-outs ingested in bulk by POST /attendance/events/bulk.
+
+Revision ID: 0005_attendance_events
+Revises: 0004_report_jobs
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_attendance_events"
+down_revision = "0004_report_jobs"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "attendance_events",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("event_type", sa.String(), nullable=False),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("device_id", sa.String(), nullable=True),
+        sa.Column("source", sa.String(), nullable=False, server_default="badge"),
+        sa.Column("received_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_attendance_events_occurred_at", "attendance_events", ["occurred_at"])
+    op.create_index("ix_attendance_events_user_id_occurred_at", "attendance_events", ["user_id", "occurred_at"])
+
+def downgrade() -> None:
+    op.drop_table("attendance_events")
@@ -0,0 +1,155 @@
+"""Monthly attendance_events partitions and the attendance_daily rollup
+
+On Postgres, attendance_events becomes a table partitioned by month of
+occurred_at (primary key (id, occurred_at), as partitioning requires), with
+partitions for every month holding events plus the next three and a
+DEFAULT partition for anything else; existing rows are copied across. The
+app creates later partitions itself (app/attendance.py,
+maintain_attendance.py).
+
+attendance_daily is filled from the existing events here, so reports over
+past days are right from the start; on a large table this is the slow part
+of the upgrade.
+
+Revision ID: 0006_attendance_partitions_daily
+Revises: 0005_attendance_events
+Create Date: 2026-10-18
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+revision = "0006_attendance_partitions_daily"
+down_revision = "0005_attendance_events"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+def _next_month(month: date) -> date:
+    return (month + timedelta(days=32)).replace(day=1)
+
+def _months(first: date, last: date):
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = _next_month(month)
+
+def _partition_events() -> None:
+    bind = op.get_bind()
+    op.execute("ALTER TABLE attendance_events RENAME TO attendance_events_unpartitioned")
+    op.execute("ALTER TABLE attendance_events_unpartitioned RENAME CONSTRAINT attendance_events_pkey TO attendance_events_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_attendance_events_occurred_at RENAME TO ix_attendance_events_unpartitioned_occurred_at")
+    op.execute("ALTER INDEX ix_attendance_events_user_id_occurred_at RENAME TO ix_attendance_events_unpartitioned_user_id_occurred_at")
+    op.execute("""
+        CREATE TABLE attendance_events (
+            id BIGINT NOT NULL DEFAULT nextval('attendance_events_id_seq'),
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            event_type VARCHAR NOT NULL,
+            occurred_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            device_id VARCHAR,
+            source VARCHAR NOT NULL DEFAULT 'badge',
+            received_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            PRIMARY KEY (id, occurred_at)
+        ) PARTITION BY RANGE (occurred_at)
+    """)
+    op.execute("CREATE INDEX ix_attendance_events_occurred_at ON attendance_events (occurred_at)")
+    op.execute("CREATE INDEX ix_attendance_events_user_id_occurred_at ON attendance_events (user_id, occurred_at)")
+
+    oldest, newest = bind.execute(sa.text(
+        "SELECT min(occurred_at), max(occurred_at) FROM attendance_events_unpartitioned"
+    )).one()
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    first = min(oldest.astimezone(timezone.utc).date(), this_month) if oldest else this_month
+    last = this_month
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    if newest:
+        last = max(last, newest.astimezone(timezone.utc).date())
+    for month in _months(first, last):
+        op.execute(
+            f"CREATE TABLE attendance_events_y{month:%Y}m{month:%m} PARTITION OF attendance_events "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{_next_month(month).isoformat()} 00:00:00+00')"
+        )
+    op.execute("CREATE TABLE attendance_events_default PARTITION OF attendance_events DEFAULT")
+
+    op.execute("""
+        INSERT INTO attendance_events (id, user_id, event_type, occurred_at, device_id, source, received_at)
+        SELECT id, user_id, event_type, occurred_at, device_id, source, received_at
+        FROM attendance_events_unpartitioned
+    """)
+    op.execute("ALTER SEQUENCE attendance_events_id_seq OWNED BY attendance_events.id")
+    op.execute("DROP TABLE attendance_events_unpartitioned")
+
+def _unpartition_events() -> None:
+    op.execute("ALTER TABLE attendance_events RENAME TO attendance_events_partitioned")
+    op.execute("ALTER INDEX ix_attendance_events_occurred_at RENAME TO ix_attendance_events_partitioned_occurred_at")
+    op.execute("ALTER INDEX ix_attendance_events_user_id_occurred_at RENAME TO ix_attendance_events_partitioned_user_id_occurred_at")
+    op.execute("""
+        CREATE TABLE attendance_events (
+            id BIGINT NOT NULL DEFAULT nextval('attendance_events_id_seq') PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+            event_type VARCHAR NOT NULL,
+            occurred_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            device_id VARCHAR,
+            source VARCHAR NOT NULL DEFAULT 'badge',
+            received_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    op.execute("""
+        INSERT INTO attendance_events (id, user_id, event_type, occurred_at, device_id, source, received_at)
+        SELECT id, user_id, event_type, occurred_at, device_id, source, received_at
+        FROM attendance_events_partitioned
+    """)
+    op.execute("ALTER SEQUENCE attendance_events_id_seq OWNED BY attendance_events.id")
+    op.execute("DROP TABLE attendance_events_partitioned")  # and its partitions
+    op.create_index("ix_attendance_events_occurred_at", "attendance_events", ["occurred_at"])
+    op.create_index("ix_attendance_events_user_id_occurred_at", "attendance_events", ["user_id", "occurred_at"])
+
+def _backfill_daily() -> None:
+    # The rollup rules live in the app; env.py imports it already
+    from app import attendance, models
+
+    db = Session(bind=op.get_bind())
+    try:
+        oldest, newest = db.execute(sa.select(
+            sa.func.min(models.AttendanceEvent.occurred_at), sa.func.max(models.AttendanceEvent.occurred_at)
+        )).one()
+        if oldest is not None:
+            # A day either side: work days are factory-local and may start the evening before
+            attendance.rebuild_daily(db, oldest.date() - timedelta(days=1), newest.date() + timedelta(days=1))
+    finally:
+        db.close()
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        _partition_events()
+
+    op.create_table(
+        "attendance_daily",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("work_day", sa.Date(), nullable=False),
+        sa.Column("division_id", sa.Integer(), nullable=True),
+        sa.Column("department_id", sa.Integer(), nullable=True),
+        sa.Column("first_in", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_out", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("scheduled_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("shift_minutes", sa.Integer(), nullable=False),
+        sa.Column("worked_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("late_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("overtime_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("events", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("user_id", "work_day"),
+    )
+    op.create_index("ix_attendance_daily_work_day_division_id", "attendance_daily", ["work_day", "division_id"])
+    op.create_index("ix_attendance_daily_work_day_department_id", "attendance_daily", ["work_day", "department_id"])
+    _backfill_daily()
+
+def downgrade() -> None:
+    op.drop_table("attendance_daily")
+    if op.get_bind().dialect.name == "postgresql":
+        _unpartition_events()
@@ -10,6 +10,7 @@ from .settings import router as settings_router
 from .dashboard import router as dashboard_router
 from .division_manager import router as division_manager_router
 from .notifications import router as notifications_router  # ADD THIS LINE
+from .attendance import router as attendance_router
 
 # Create the main API router
 api_router = APIRouter()
@@ -23,6 +24,7 @@ api_router.include_router(settings_router, prefix="/settings", tags=["settings"]
 api_router.include_router(dashboard_router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(division_manager_router, prefix="/division-manager", tags=["division-manager"])
 api_router.include_router(notifications_router, prefix="/notifications", tags=["notifications"])
+api_router.include_router(attendance_router, prefix="/attendance", tags=["attendance"])
 
 __all__ = [
     "api_router",
@@ -33,5 +35,6 @@ __all__ = [
     "settings_router",
     "dashboard_router",
     "division_manager_router",
-    "notifications_router"  # ADD THIS LINE
+    "notifications_router",  # ADD THIS LINE
+    "attendance_router"
 ]
\ No newline at end of file
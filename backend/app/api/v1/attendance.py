@@ -0,0 +1,94 @@
+# app/api/v1/attendance.py - ATTENDANCE EVENT INGEST
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+
+from app import attendance, models, schemas
+from app.auth_utils import SERVICE_TOKEN_EXPIRE_DAYS, create_service_token, token_expiry, verify_token
+from app.database import get_db
+from app.api.v1.auth import Principal, ServiceCaller, get_current_claims, require_scope
+
+router = APIRouter()
+
+# The only thing a badge gateway's token lets it do
+INGEST_SCOPE = "attendance:ingest"
+
+@router.post("/events/bulk")
+def ingest_events(
+    batch: schemas.AttendanceEventBatch,
+    db: Session = Depends(get_db),
+    caller: ServiceCaller = Depends(require_scope(INGEST_SCOPE))
+):
+    """Record a batch of clock-in/clock-out events from badge readers
+
+    Gateways post with a device token from ``POST /device-tokens``; an
+    admin's own token works too. Events for unknown users or dated outside
+    the accepted window (see ``attendance.ingest``) are returned under
+    ``rejected`` (with their index in the batch); the rest are written.
+    """
+    if len(batch.events) > attendance.ATTENDANCE_INGEST_MAX_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many events: {len(batch.events)} (at most {attendance.ATTENDANCE_INGEST_MAX_EVENTS} per request)"
+        )
+    
+    try:
+        return attendance.ingest(db, batch.events)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error recording attendance events: {str(e)}"
+        )
+
+@router.post("/device-tokens", response_model=schemas.DeviceTokenResponse)
+def create_device_token(
+    request: schemas.DeviceTokenCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    """Issue a token a badge gateway can use to post events, and nothing else
+
+    Revoke it by calling ``/auth/logout`` with the token.
+    """
+    if current_user.role != models.Role.ADMIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to issue device tokens"
+        )
+    
+    try:
+        token = create_service_token(
+            request.device, [INGEST_SCOPE], issued_by=current_user.id,
+            expires_delta=timedelta(days=request.expires_days or SERVICE_TOKEN_EXPIRE_DAYS)
+        )
+        payload = verify_token(token)
+        expires_at = token_expiry(payload)
+        
+        db.add(models.AuditLog(
+            user_id=current_user.id,
+            action="create",
+            resource="device_token",
+            details={
+                "device": request.device,
+                "scopes": [INGEST_SCOPE],
+                "jti": payload["jti"],
+                "expires_at": expires_at.isoformat()
+            },
+            created_at=datetime.now()
+        ))
+        db.commit()
+        
+        return {
+            "access_token": token,
+            "token_type": "bearer",
+            "device": request.device,
+            "scopes": [INGEST_SCOPE],
+            "expires_at": expires_at
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error issuing device token: {str(e)}"
+        )
@@ -1,16 +1,27 @@
 # app/api/v1/auth.py - UPDATED WITH DEBUGGING
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, or_, select, inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 from datetime import timedelta
+from typing import Optional
 from pydantic import BaseModel
-from app import models, schemas
-from app.database import get_db
+from starlette.concurrency import run_in_threadpool
+import logging
+import os
+from app import models, schemas, password_pool, rate_limit
+from app.cache import TTLCache
+from app.database import SessionLocal, get_async_db, get_db
 from app.auth_utils import (
     verify_password, get_password_hash,
     create_access_token, create_refresh_token,
-    ACCESS_TOKEN_EXPIRE_MINUTES, verify_token
+    ACCESS_TOKEN_EXPIRE_MINUTES, verify_token,
+    forget_token, token_id, token_expiry
 )
+from app.revocation import revocation_store
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -18,76 +29,308 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    print(f"🔐 get_current_user called with token: {token[:30]}...")
-    
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+# Principal cache: authenticated users keyed by (user_id, token_version) so that
+# polling endpoints don't SELECT the users row on every request.
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+principal_cache = TTLCache(
+    maxsize=PRINCIPAL_CACHE_SIZE,
+    ttl=PRINCIPAL_CACHE_TTL_SECONDS,
+    name="principal"
+)
+# user_id -> (token_version, is_active); all the claims dependency needs from the DB
+token_version_cache = TTLCache(
+    maxsize=PRINCIPAL_CACHE_SIZE,
+    ttl=PRINCIPAL_CACHE_TTL_SECONDS,
+    name="token_version"
+)
+
+_PRINCIPAL_COLUMNS = [attr.key for attr in sa_inspect(models.User).column_attrs]
+
+class Principal(BaseModel):
+    """Caller identity and scope taken from verified access token claims.
+
+    Has the same ``id``/``role``/``division_id``/``department_id`` attributes
+    as ``models.User``, so role and scope checks work on either.
+    """
+    id: int
+    username: Optional[str] = None
+    role: models.Role
+    division_id: Optional[int] = None
+    department_id: Optional[int] = None
+    token_version: int = 0
+
+def access_token_claims(user: models.User) -> dict:
+    """Claims embedded in access tokens; token_version changes invalidate them."""
+    return {
+        "user_id": user.id,
+        "username": user.username,
+        "role": user.role.value,
+        "division_id": user.division_id,
+        "department_id": user.department_id,
+        "token_version": user.token_version or 0
+    }
+
+def bump_token_version(user: models.User) -> None:
+    """Call before committing a change to a user's role, scope or active flag.
+
+    Access tokens issued with the old version are refused from then on, so
+    clients have to refresh and pick up claims that match the new scope.
+    """
+    user.token_version = (user.token_version or 0) + 1
+
+def load_principal(db: Session, user_id: int, token_version: int = 0) -> Optional[models.User]:
+    """Return the user for a verified token, from the principal cache when possible.
+
+    Cached entries are plain column snapshots; on a hit they are attached to
+    ``db`` with ``merge(load=False)`` so callers get a normal session-bound
+    ``models.User`` (relationships still lazy-load) without a SELECT.
+    """
+    snapshot = principal_cache.get((user_id, token_version))
+    if snapshot is not None:
+        user = models.User(**snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is not None:
+        token_version_cache.set(user_id, (user.token_version or 0, user.is_active))
+        if user.is_active:
+            principal_cache.set(
+                (user_id, user.token_version or 0),
+                {column: getattr(user, column) for column in _PRINCIPAL_COLUMNS}
+            )
+    return user
+
+def _current_token_version(db: Session, user_id: int):
+    cached = token_version_cache.get(user_id)
+    if cached is not None:
+        return cached
+    row = db.query(models.User.token_version, models.User.is_active).filter(
+        models.User.id == user_id
+    ).first()
+    if row is None:
+        return None
+    current = (row.token_version or 0, row.is_active)
+    token_version_cache.set(user_id, current)
+    return current
+
+def invalidate_principal(*user_ids: int) -> None:
+    """Drop cached principals after a write that changes a user's identity or scope."""
+    ids = {user_id for user_id in user_ids if user_id is not None}
+    if ids:
+        principal_cache.discard_where(lambda key: key[0] in ids)
+        for user_id in ids:
+            token_version_cache.pop(user_id)
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def _verified_access_payload(token: str) -> dict:
+    """Verify signature, type, subject and revocation of an access token."""
     if not token:
-        print("❌ No token provided")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="No authentication token provided",
-            headers={"WWW-Authenticate": "Bearer"},
+        logger.debug("No token provided", extra={"event": "auth.token_missing"})
+        raise _unauthorized("No authentication token provided")
+    
+    payload = verify_token(token)
+    if not payload:
+        logger.debug("Token verification failed", extra={"event": "auth.rejected", "reason": "invalid_token"})
+        raise _unauthorized("Invalid or expired token")
+    
+    if payload.get("type") != "access":
+        logger.info(
+            "Wrong token type",
+            extra={"event": "auth.rejected", "reason": "token_type", "token_type": payload.get("type")}
         )
+        raise _unauthorized("Invalid token type")
     
+    user_id = payload.get("user_id")
+    if not user_id:
+        logger.info("No user_id in token", extra={"event": "auth.rejected", "reason": "payload"})
+        raise _unauthorized("Invalid token payload")
+    
+    if revocation_store.is_revoked(token_id(token, payload)):
+        logger.info("Token revoked", extra={"event": "auth.rejected", "reason": "revoked", "user_id": user_id})
+        raise _unauthorized("Token has been revoked")
+    
+    return payload
+
+def _reject_outdated(user_id: int) -> HTTPException:
+    logger.info("Outdated token version", extra={"event": "auth.rejected", "reason": "token_version", "user_id": user_id})
+    return _unauthorized("Token is outdated, please sign in again")
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     try:
-        payload = verify_token(token)
-        if not payload:
-            print("❌ Token verification failed")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        if payload.get("type") != "access":
-            print(f"❌ Wrong token type: {payload.get('type')}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token type",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        user_id = payload.get("user_id")
-        if not user_id:
-            print("❌ No user_id in token")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token payload",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        payload = _verified_access_payload(token)
+        user_id = payload["user_id"]
+        token_version = payload.get("token_version", 0)
         
-        print(f"🔍 Looking for user with ID: {user_id}")
-        user = db.query(models.User).filter(models.User.id == user_id).first()
+        user = load_principal(db, user_id, token_version)
         
         if not user:
-            print(f"❌ User not found with ID: {user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            logger.info("User not found", extra={"event": "auth.rejected", "reason": "unknown_user", "user_id": user_id})
+            raise _unauthorized("User not found")
         
         if not user.is_active:
-            print(f"❌ User is inactive: {user.username}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User is inactive",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+            logger.info("User is inactive", extra={"event": "auth.rejected", "reason": "inactive", "user_id": user_id})
+            raise _unauthorized("User is inactive")
+        
+        if (user.token_version or 0) != token_version:
+            raise _reject_outdated(user_id)
         
-        print(f"✅ Authentication successful for user: {user.username}")
+        logger.debug("Authenticated", extra={"event": "auth.authenticated", "user_id": user_id})
         return user
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Unexpected error in get_current_user: {e}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Authentication failed: {str(e)}",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        logger.exception("Unexpected error in get_current_user", extra={"event": "auth.error"})
+        raise _unauthorized(f"Authentication failed: {str(e)}")
+
+def _ensure_current(user_id: int, current, token_version: int) -> None:
+    """Reject unless ``current`` (token_version, is_active) accepts ``token_version``."""
+    if current is None:
+        logger.info("User not found", extra={"event": "auth.rejected", "reason": "unknown_user", "user_id": user_id})
+        raise _unauthorized("User not found")
+    
+    version, is_active = current
+    if not is_active:
+        logger.info("User is inactive", extra={"event": "auth.rejected", "reason": "inactive", "user_id": user_id})
+        raise _unauthorized("User is inactive")
+    
+    if token_version != version:
+        raise _reject_outdated(user_id)
+
+def _user_principal(user: models.User) -> Principal:
+    return Principal(
+        id=user.id,
+        username=user.username,
+        role=user.role,
+        division_id=user.division_id,
+        department_id=user.department_id,
+        token_version=user.token_version or 0
+    )
+
+def _claims_principal(payload: dict) -> Principal:
+    return Principal(
+        id=payload["user_id"],
+        username=payload.get("username"),
+        role=payload["role"],
+        division_id=payload.get("division_id"),
+        department_id=payload.get("department_id"),
+        token_version=payload.get("token_version", 0)
+    )
+
+def get_current_claims(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """Authorize from token claims alone, without loading the users row.
+
+    Only the user's current token_version and active flag are needed, and
+    those come from ``token_version_cache``; ``db`` is touched on a cache
+    miss only. Use this for endpoints that need identity and scope but no
+    other user columns.
+    """
+    try:
+        payload = _verified_access_payload(token)
+        
+        if "division_id" not in payload:
+            # Token issued before scope claims existed: fall back to the user row
+            return _user_principal(get_current_user(token, db))
+        
+        user_id = payload["user_id"]
+        _ensure_current(user_id, _current_token_version(db, user_id), payload.get("token_version", 0))
+        return _claims_principal(payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error in get_current_claims", extra={"event": "auth.error"})
+        raise _unauthorized(f"Authentication failed: {str(e)}")
+
+async def _current_token_version_async(db: AsyncSession, user_id: int):
+    cached = token_version_cache.get(user_id)
+    if cached is not None:
+        return cached
+    row = (await db.execute(
+        select(models.User.token_version, models.User.is_active).where(models.User.id == user_id)
+    )).first()
+    if row is None:
+        return None
+    current = (row.token_version or 0, row.is_active)
+    token_version_cache.set(user_id, current)
+    return current
+
+async def get_current_claims_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """``get_current_claims`` for ``async def`` routes using ``get_async_db``."""
+    try:
+        if revocation_store.sync_due():
+            # The periodic denylist sync is blocking DB work; keep it off the loop
+            await run_in_threadpool(revocation_store.maybe_sync)
+        payload = _verified_access_payload(token)
+        user_id = payload["user_id"]
+        
+        if "division_id" not in payload:
+            user = await db.get(models.User, user_id)
+            current = (user.token_version or 0, user.is_active) if user else None
+            _ensure_current(user_id, current, payload.get("token_version", 0))
+            return _user_principal(user)
+        
+        _ensure_current(user_id, await _current_token_version_async(db, user_id), payload.get("token_version", 0))
+        return _claims_principal(payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Unexpected error in get_current_claims_async", extra={"event": "auth.error"})
+        raise _unauthorized(f"Authentication failed: {str(e)}")
+
+class ServiceCaller(BaseModel):
+    """Who called a scoped endpoint: a service token's subject, or an admin."""
+    subject: str
+    user_id: int  # the admin, or the admin who issued the service token
+    service: bool
+
+def require_scope(scope: str):
+    """Dependency: a service token carrying ``scope``, or an admin's access token.
+
+    Service tokens are accepted nowhere else (``get_current_claims`` and
+    friends only take access tokens), so a device holding one can do this
+    and nothing more.
+    """
+    def dependency(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> ServiceCaller:
+        payload = verify_token(token)
+        if not payload or payload.get("type") != "service":
+            # Not a service token: an admin's own access token will do
+            principal = get_current_claims(token, db)
+            if principal.role != models.Role.ADMIN:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=f"Requires an admin or a service token with the {scope} scope"
+                )
+            return ServiceCaller(subject=principal.username or f"user:{principal.id}", user_id=principal.id, service=False)
+        
+        if revocation_store.is_revoked(token_id(token, payload)):
+            logger.info("Token revoked", extra={"event": "auth.rejected", "reason": "revoked", "subject": payload.get("sub")})
+            raise _unauthorized("Token has been revoked")
+        if scope not in payload.get("scopes", []):
+            logger.info(
+                "Missing scope",
+                extra={"event": "auth.rejected", "reason": "scope", "subject": payload.get("sub"), "scope": scope}
+            )
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Token lacks the {scope} scope"
+            )
+        return ServiceCaller(subject=payload["sub"], user_id=payload["issued_by"], service=True)
+    
+    return dependency
 
 def get_current_active_user(current_user: models.User = Depends(get_current_user)):
     if not current_user.is_active:
@@ -97,50 +340,115 @@ def get_current_active_user(current_user: models.User = Depends(get_current_user
         )
     return current_user
 
+def _find_login_user(username: str) -> Optional[models.User]:
+    # One round trip for username or email, case-insensitively (served by the
+    # lower() functional indexes). An exact username match wins, then a
+    # case-folded one, then the email.
+    # Its own short-lived session hands the connection back before the (slow)
+    # password check; the user's columns are already loaded and stay
+    # readable once detached.
+    login = username.strip().lower()
+    with SessionLocal() as db:
+        return db.query(models.User).filter(
+            or_(
+                func.lower(models.User.username) == login,
+                func.lower(models.User.email) == login
+            )
+        ).order_by(
+            case(
+                (models.User.username == username, 0),
+                (func.lower(models.User.username) == login, 1),
+                else_=2
+            )
+        ).first()
+
+def _store_rehashed_password(user_id: int, new_hash: str) -> None:
+    with SessionLocal() as db:
+        db.query(models.User).filter(models.User.id == user_id).update(
+            {models.User.password_hash: new_hash}, synchronize_session=False
+        )
+        db.commit()
+    invalidate_principal(user_id)
+
 @router.post("/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    print(f"🔑 Login attempt for username: {form_data.username}")
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    # async so that bcrypt waits on the password pool instead of holding one of
+    # the threadpool's threads; DB work is still handed to the threadpool.
+    logger.debug("Login attempt", extra={"event": "auth.login_attempt", "username": form_data.username})
     
-    # Try username first, then email
-    user = db.query(models.User).filter(
-        (models.User.username == form_data.username)
-    ).first()
+    # Throttle before any lookup or hashing so brute force costs us nothing.
+    # The attempt is counted here, not after bcrypt, so parallel guesses
+    # can't all get past the check; success or a busy pool gives it back.
+    client_ip = request.client.host if request.client else None
+    max_attempts = await run_in_threadpool(rate_limit.max_login_attempts)
+    retry_after = rate_limit.begin_login_attempt(form_data.username, client_ip, max_attempts)
+    if retry_after is not None:
+        logger.warning(
+            "Login throttled",
+            extra={"event": "auth.login_throttled", "username": form_data.username, "client_ip": client_ip}
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
     
-    if not user:
-        user = db.query(models.User).filter(
-            (models.User.email == form_data.username)
-        ).first()
-        print(f"🔍 Trying email lookup: {form_data.username}")
+    user = await run_in_threadpool(_find_login_user, form_data.username)
 
     if not user:
-        print(f"❌ User not found: {form_data.username}")
+        logger.info(
+            "Login failed",
+            extra={"event": "auth.login_failed", "reason": "unknown_user", "username": form_data.username}
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
 
-    print(f"✅ User found: {user.username}")
-    print(f"🔍 Checking password...")
+    try:
+        password_ok, new_hash = await password_pool.verify_and_update_password_async(
+            form_data.password, user.password_hash
+        )
+    except password_pool.PasswordPoolBusy:
+        rate_limit.refund_login_attempt(form_data.username, client_ip, max_attempts)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     
-    from app.auth_utils import verify_password
-    if not verify_password(form_data.password, user.password_hash):
-        print(f"❌ Incorrect password for user: {user.username}")
+    if not password_ok:
+        logger.info(
+            "Login failed",
+            extra={"event": "auth.login_failed", "reason": "password", "username": user.username}
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
 
     if not user.is_active:
-        print(f"❌ User is inactive: {user.username}")
+        rate_limit.refund_login_attempt(form_data.username, client_ip, max_attempts)
+        logger.info(
+            "Login failed",
+            extra={"event": "auth.login_failed", "reason": "inactive", "username": user.username}
+        )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user"
         )
 
+    rate_limit.record_login_success(form_data.username, client_ip, max_attempts)
+
+    if new_hash:
+        # Stored hash uses an outdated bcrypt cost; upgrade it transparently
+        await run_in_threadpool(_store_rehashed_password, user.id, new_hash)
+        logger.info("Password hash upgraded", extra={"event": "auth.rehash", "user_id": user.id})
+
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     access_token = create_access_token(
-        data={"user_id": user.id, "username": user.username, "role": user.role.value},
+        data=access_token_claims(user),
         expires_delta=access_token_expires
     )
 
@@ -150,8 +458,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 
     user_response = schemas.UserResponse.model_validate(user)
 
-    print(f"✅ Login successful for user: {user.username}")
-    print(f"📝 Access token created (first 30 chars): {access_token[:30]}...")
+    logger.info("Login successful", extra={"event": "auth.login", "user_id": user.id})
     
     return {
         "access_token": access_token,
@@ -162,10 +469,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 
 @router.post("/refresh", response_model=schemas.Token)
 def refresh_token_endpoint(request: RefreshTokenRequest, db: Session = Depends(get_db)):
-    print("🔄 Refresh token endpoint called")
-    
     if not request.refresh_token:
-        print("❌ No refresh token provided")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Refresh token is required"
@@ -174,7 +478,7 @@ def refresh_token_endpoint(request: RefreshTokenRequest, db: Session = Depends(g
     payload = verify_token(request.refresh_token)
 
     if not payload or payload.get("type") != "refresh":
-        print(f"❌ Invalid refresh token. Payload: {payload}")
+        logger.info("Invalid refresh token", extra={"event": "auth.refresh_rejected", "reason": "invalid_token"})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
@@ -182,16 +486,35 @@ def refresh_token_endpoint(request: RefreshTokenRequest, db: Session = Depends(g
 
     user_id = payload.get("user_id")
     if not user_id:
-        print("❌ No user_id in refresh token")
+        logger.info("No user_id in refresh token", extra={"event": "auth.refresh_rejected", "reason": "payload"})
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload"
         )
     
+    # Rotation: each refresh token is good for one use. Revoking it here also
+    # catches a concurrent or replayed use (the second insert conflicts).
+    refresh_id = token_id(request.refresh_token, payload)
+    if revocation_store.is_revoked(refresh_id) or not revocation_store.revoke(
+        db, refresh_id, token_expiry(payload), user_id=user_id, token_type="refresh"
+    ):
+        logger.warning(
+            "Revoked refresh token presented",
+            extra={"event": "auth.refresh_rejected", "reason": "revoked", "user_id": user_id}
+        )
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked"
+        )
+    forget_token(request.refresh_token)
+    
     user = db.query(models.User).filter(models.User.id == user_id).first()
 
     if not user or not user.is_active:
-        print(f"❌ User not found or inactive: {user_id}")
+        logger.info(
+            "User not found or inactive",
+            extra={"event": "auth.refresh_rejected", "reason": "user", "user_id": user_id}
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive"
@@ -200,7 +523,7 @@ def refresh_token_endpoint(request: RefreshTokenRequest, db: Session = Depends(g
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     new_access_token = create_access_token(
-        data={"user_id": user.id, "username": user.username, "role": user.role.value},
+        data=access_token_claims(user),
         expires_delta=access_token_expires
     )
 
@@ -210,7 +533,7 @@ def refresh_token_endpoint(request: RefreshTokenRequest, db: Session = Depends(g
 
     user_response = schemas.UserResponse.model_validate(user)
 
-    print(f"✅ Token refreshed for user: {user.username}")
+    logger.info("Token refreshed", extra={"event": "auth.refresh", "user_id": user.id})
     
     return {
         "access_token": new_access_token,
@@ -219,15 +542,44 @@ def refresh_token_endpoint(request: RefreshTokenRequest, db: Session = Depends(g
         "user": user_response
     }
 
+@router.post("/logout")
+def logout(
+    request: Optional[LogoutRequest] = None,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    """Revoke the bearer access token and, if given, the matching refresh token
+
+    A device's service token is revoked the same way, by posting here with it.
+    """
+    payload = verify_token(token)
+    if not payload:
+        # Already expired or invalid: nothing left to revoke
+        return {"message": "Logged out"}
+    
+    # Service (device) tokens carry the issuing admin instead of a user
+    user_id = payload.get("user_id", payload.get("issued_by"))
+    revocation_store.revoke(db, token_id(token, payload), token_expiry(payload),
+                            user_id=user_id, token_type=payload.get("type", "access"))
+    forget_token(token)
+    
+    if request and request.refresh_token:
+        refresh_payload = verify_token(request.refresh_token)
+        if refresh_payload and refresh_payload.get("user_id") == user_id:
+            revocation_store.revoke(db, token_id(request.refresh_token, refresh_payload),
+                                    token_expiry(refresh_payload), user_id=user_id, token_type="refresh")
+            forget_token(request.refresh_token)
+    
+    logger.info("Logged out", extra={"event": "auth.logout", "user_id": user_id})
+    return {"message": "Logged out"}
+
 @router.get("/me")
 def read_users_me(current_user: models.User = Depends(get_current_active_user)):
-    print(f"📊 /me endpoint called for user: {current_user.username}")
     return current_user
 
 # Test endpoint to verify authentication
 @router.get("/test-auth")
 def test_auth(current_user: models.User = Depends(get_current_active_user)):
-    print(f"🧪 Test auth endpoint called for user: {current_user.username}")
     return {
         "message": "Authentication successful",
         "user_id": current_user.id,
@@ -1,75 +1,175 @@
 # app/api/v1/dashboard.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, select, tuple_
+from datetime import date, datetime, time, timedelta
 from typing import List, Optional
+import base64
+import os
 
-from app import models, schemas
+from app import models, schemas, attendance, exports, org_rollup, report_jobs, reports
+from app.cache import TTLCache
 from app.database import get_db
-from app.api.v1.auth import get_current_active_user
+from app.read_routing import get_async_read_db, read_session_factory
+from app.api.v1.auth import Principal, get_current_active_user, get_current_claims, get_current_claims_async
 
 router = APIRouter()
 
-@router.get("/stats", response_model=schemas.DashboardStats)
-def get_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
-):
-    """Get dashboard statistics"""
-    try:
-        # Get counts based on user role
-        if current_user.role == models.Role.ADMIN:
-            # Admin sees everything
-            division_count = db.query(models.Division).count()
-            department_count = db.query(models.Department).count()
-            user_count = db.query(models.User).count()
-            
-            # Calculate today's attendance (simulated for now)
-            today = datetime.now().date()
-            attendance_rate = 94.5  # This would come from attendance records
-            
-        elif current_user.role == models.Role.DIVISION_MANAGER:
-            # Division manager sees only their division
-            division_count = 1  # They only manage one division
-            department_count = db.query(models.Department).filter(
-                models.Department.division_id == current_user.division_id
-            ).count()
-            user_count = db.query(models.User).filter(
-                models.User.division_id == current_user.division_id
-            ).count()
-            attendance_rate = 92.3
-            
-        elif current_user.role == models.Role.DEPARTMENT_MANAGER:
-            # Department manager sees only their department
-            division_count = 1
-            department_count = 1  # They only manage one department
-            user_count = db.query(models.User).filter(
-                models.User.department_id == current_user.department_id
-            ).count()
-            attendance_rate = 95.1
-            
+# /dashboard/stats per scope (admin, division, department). User, department
+# and division writes in this worker clear it; other workers, and today's
+# attendance, catch up within the TTL.
+DASHBOARD_STATS_TTL_SECONDS = float(os.getenv("DASHBOARD_STATS_TTL_SECONDS", "30"))
+
+stats_cache = TTLCache(maxsize=4096, ttl=DASHBOARD_STATS_TTL_SECONDS, name="dashboard_stats")
+
+def invalidate_dashboard_stats() -> None:
+    """Drop cached dashboard stats after a write to users, departments or divisions."""
+    stats_cache.clear()
+
+# generate-report results per (report type, scope, period), LRU-evicted past
+# REPORT_CACHE_SIZE. Entries expire after REPORT_CACHE_OPEN_TTL_SECONDS,
+# except the period part of a reports.PERIOD_REPORTS type for a period that
+# ended before today, which is kept for REPORT_CACHE_CLOSED_TTL_SECONDS: it
+# only changes when users or audit rows dated in the period are deleted,
+# and those deletes drop it (invalidate_period_reports). Totals, names and
+# the requester are added on every request. Attendance reports are also
+# dropped when ingest changes a day in their period. Drops only reach this
+# process; other workers catch up within the TTL.
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+REPORT_CACHE_OPEN_TTL_SECONDS = float(os.getenv("REPORT_CACHE_OPEN_TTL_SECONDS", "60"))
+REPORT_CACHE_CLOSED_TTL_SECONDS = float(os.getenv("REPORT_CACHE_CLOSED_TTL_SECONDS", str(24 * 3600)))
+
+report_cache = TTLCache(maxsize=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_OPEN_TTL_SECONDS, name="reports")
+
+def _period_is_closed(end: datetime) -> bool:
+    return end < datetime.combine(date.today(), time.min)
+
+def invalidate_attendance_reports(first: date, last: date) -> int:
+    """Drop cached attendance reports whose period overlaps work days ``first``..``last``."""
+    return report_cache.discard_where(
+        lambda key: key[0] == "attendance" and key[-2] <= last and key[-1] >= first
+    )
+
+attendance.add_rollup_listener(invalidate_attendance_reports)
+
+def invalidate_period_reports() -> int:
+    """Drop cached summary and user reports, after deleting users or audit log rows."""
+    return report_cache.discard_where(lambda key: key[0] in reports.PERIOD_REPORTS)
+
+def _cached_report(db: Session, report_type: str, current_user: models.User,
+                   start_date: Optional[str], end_date: Optional[str], start: datetime, end: datetime):
+    """The report for this period and the ``cache`` metadata returned with it."""
+    closed = _period_is_closed(end)
+    parts = reports.PERIOD_REPORTS.get(report_type)
+    ttl = REPORT_CACHE_CLOSED_TTL_SECONDS if closed and parts is not None else REPORT_CACHE_OPEN_TTL_SECONDS
+    # Omitted dates default relative to now; they resolve alike for the rest of the day
+    key = (report_type, _stats_scope(current_user), start_date, end_date,
+           date.today() if start_date is None or end_date is None else None,
+           start.date(), end.date())
+    entry = report_cache.get(key)
+    hit = entry is not None
+    if not hit:
+        if parts is not None:
+            data = parts[0](db, start, end)
         else:
-            # Employee sees limited stats
-            division_count = 0
-            department_count = 0
-            user_count = 1  # Just themselves
-            attendance_rate = 100.0  # Their own attendance
+            data = reports.build_report(db, report_type, current_user, start, end)
+        entry = (data, datetime.now().isoformat())
+        report_cache.set(key, entry, ttl=ttl)
+    data, cached_at = entry
+    report_data = parts[1](db, data, current_user) if parts is not None else data
+    return report_data, {
+        "hit": hit,
+        "period": "closed" if closed else "open",
+        "ttl_seconds": ttl,
+        "cached_at": cached_at
+    }
+
+def _count_subquery(model, *criteria):
+    statement = select(func.count()).select_from(model)
+    if criteria:
+        statement = statement.where(*criteria)
+    return statement.scalar_subquery()
+
+def _headcount_subquery(*criteria, column=models.OrgHeadcount.total):
+    """Users in scope, summed from the org_headcounts rollup instead of counting ``users``."""
+    return select(
+        func.coalesce(func.sum(column), 0)
+    ).where(*criteria).scalar_subquery()
+
+def _stats_scope(current_user: Principal):
+    if current_user.role == models.Role.ADMIN:
+        return ("admin",)
+    if current_user.role == models.Role.DIVISION_MANAGER:
+        return ("division", current_user.division_id)
+    if current_user.role == models.Role.DEPARTMENT_MANAGER:
+        return ("department", current_user.department_id)
+    # Employees see their own attendance
+    return ("employee", current_user.id)
+
+async def _load_dashboard_stats(db: AsyncSession, current_user: Principal) -> dict:
+    """All counts for the caller's scope in one round trip."""
+    counts = {"active_shifts": _count_subquery(models.Shift)}
+    today = attendance.today()
+    
+    # Today's attendance: people in today (attendance_daily) over active headcount
+    if current_user.role == models.Role.ADMIN:
+        # Admin sees everything
+        counts["total_divisions"] = _count_subquery(models.Division)
+        counts["total_departments"] = _count_subquery(models.Department)
+        counts["total_employees"] = _headcount_subquery()
+        counts["present_today"] = attendance.present_subquery(today)
+        counts["expected_today"] = _headcount_subquery(column=models.OrgHeadcount.active)
+        stats = {}
         
-        # Count active shifts (simulated)
-        active_shifts = db.query(models.Shift).count()
+    elif current_user.role == models.Role.DIVISION_MANAGER:
+        # Division manager sees only their division
+        counts["total_departments"] = _count_subquery(
+            models.Department, models.Department.division_id == current_user.division_id
+        )
+        counts["total_employees"] = _headcount_subquery(org_rollup.in_division(current_user.division_id))
+        counts["present_today"] = attendance.present_subquery(today, attendance.in_division(current_user.division_id))
+        counts["expected_today"] = _headcount_subquery(
+            org_rollup.in_division(current_user.division_id), column=models.OrgHeadcount.active
+        )
+        stats = {"total_divisions": 1}  # They only manage one division
         
-        # Count pending approvals (simulated)
-        pending_approvals = 3
+    elif current_user.role == models.Role.DEPARTMENT_MANAGER:
+        # Department manager sees only their department
+        counts["total_employees"] = _headcount_subquery(org_rollup.in_department(current_user.department_id))
+        counts["present_today"] = attendance.present_subquery(today, attendance.in_department(current_user.department_id))
+        counts["expected_today"] = _headcount_subquery(
+            org_rollup.in_department(current_user.department_id), column=models.OrgHeadcount.active
+        )
+        stats = {"total_divisions": 1, "total_departments": 1}
         
-        return {
-            "total_divisions": division_count,
-            "total_departments": department_count,
-            "total_employees": user_count,
-            "today_attendance": attendance_rate,
-            "active_shifts": active_shifts,
-            "pending_approvals": pending_approvals
-        }
+    else:
+        # Employee sees limited stats: just themselves and their own attendance
+        counts["present_today"] = attendance.present_subquery(today, models.AttendanceDaily.user_id == current_user.id)
+        stats = {"total_divisions": 0, "total_departments": 0, "total_employees": 1, "expected_today": 1}
+    
+    row = (await db.execute(select(*(subquery.label(name) for name, subquery in counts.items())))).one()
+    stats.update(row._mapping)
+    stats["today_attendance"] = attendance.attendance_rate(stats.pop("present_today"), stats.pop("expected_today"))
+    
+    # Count pending approvals (simulated)
+    stats["pending_approvals"] = 3
+    return stats
+
+@router.get("/stats", response_model=schemas.DashboardStats)
+async def get_dashboard_stats(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_claims_async)
+):
+    """Get dashboard statistics"""
+    try:
+        scope = _stats_scope(current_user)
+        stats = stats_cache.get(scope)
+        if stats is None:
+            stats = await _load_dashboard_stats(db, current_user)
+            stats_cache.set(scope, stats)
+        return stats
         
     except Exception as e:
         raise HTTPException(
@@ -77,72 +177,114 @@ def get_dashboard_stats(
             detail=f"Error getting dashboard stats: {str(e)}"
         )
 
+RECENT_ACTIVITY_MAX_LIMIT = 100
+
+def _encode_activity_cursor(created_at: datetime, log_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{log_id}".encode()).decode()
+
+def _decode_activity_cursor(cursor: str):
+    try:
+        created_at, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
 @router.get("/recent-activity")
-def get_recent_activity(
+async def get_recent_activity(
     limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_claims_async)
 ):
-    """Get recent system activity"""
+    """Get recent system activity, newest first.
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    limit = max(1, min(limit, RECENT_ACTIVITY_MAX_LIMIT))
+    after = _decode_activity_cursor(cursor) if cursor else None
+    
     try:
-        activities = []
+        AuditLog = models.AuditLog
+        # Only the columns the feed shows, with the actor's name joined in
+        recent_logs = select(
+            AuditLog.id,
+            AuditLog.action,
+            AuditLog.resource,
+            AuditLog.details,
+            AuditLog.ip_address,
+            AuditLog.created_at,
+            models.User.full_name.label("actor")
+        ).outerjoin(
+            models.User, models.User.id == AuditLog.user_id
+        ).order_by(
+            AuditLog.created_at.desc(), AuditLog.id.desc()
+        ).limit(limit + 1)
+        
+        if after:
+            recent_logs = recent_logs.where(tuple_(AuditLog.created_at, AuditLog.id) < after)
         
         # Get recent audit logs for admin
         if current_user.role == models.Role.ADMIN:
-            logs = db.query(models.AuditLog).order_by(
-                models.AuditLog.created_at.desc()
-            ).limit(limit).all()
-            
-            for log in logs:
+            kind = "audit"
+        
+        # Get recent user logins for managers, in their own division or department
+        elif current_user.role in [models.Role.DIVISION_MANAGER, models.Role.DEPARTMENT_MANAGER]:
+            kind = "login"
+            scope = (
+                models.User.division_id == current_user.division_id
+                if current_user.role == models.Role.DIVISION_MANAGER
+                else models.User.department_id == current_user.department_id
+            )
+            recent_logs = recent_logs.where(
+                AuditLog.action == "login",
+                AuditLog.resource == "auth",
+                scope
+            )
+        
+        # For employees, show their own recent activity
+        else:
+            kind = "user_activity"
+            recent_logs = recent_logs.where(AuditLog.user_id == current_user.id)
+        
+        rows = (await db.execute(recent_logs)).all()
+        page, more = rows[:limit], len(rows) > limit
+        
+        activities = []
+        for row in page:
+            if kind == "audit":
                 activities.append({
-                    "id": log.id,
+                    "id": row.id,
                     "type": "audit",
-                    "action": log.action,
-                    "resource": log.resource,
-                    "user": log.user.full_name if log.user else "System",
-                    "timestamp": log.created_at,
-                    "details": log.details
+                    "action": row.action,
+                    "resource": row.resource,
+                    "user": row.actor or "System",
+                    "timestamp": row.created_at,
+                    "details": row.details
                 })
-        
-        # Get recent user activity for managers
-        elif current_user.role in [models.Role.DIVISION_MANAGER, models.Role.DEPARTMENT_MANAGER]:
-            # Get recent user logins in their scope
-            recent_logins = db.query(models.AuditLog).filter(
-                models.AuditLog.action == "login",
-                models.AuditLog.resource == "auth"
-            ).order_by(
-                models.AuditLog.created_at.desc()
-            ).limit(limit).all()
-            
-            for login in recent_logins:
+            elif kind == "login":
                 activities.append({
-                    "id": login.id,
+                    "id": row.id,
                     "type": "login",
                     "action": "logged in",
-                    "user": login.user.full_name if login.user else "Unknown",
-                    "timestamp": login.created_at,
-                    "ip": login.ip_address
+                    "user": row.actor or "Unknown",
+                    "timestamp": row.created_at,
+                    "ip": row.ip_address
                 })
-        
-        # For employees, show their own recent activity
-        else:
-            user_activities = db.query(models.AuditLog).filter(
-                models.AuditLog.user_id == current_user.id
-            ).order_by(
-                models.AuditLog.created_at.desc()
-            ).limit(limit).all()
-            
-            for activity in user_activities:
+            else:
                 activities.append({
-                    "id": activity.id,
+                    "id": row.id,
                     "type": "user_activity",
-                    "action": activity.action,
-                    "resource": activity.resource,
-                    "timestamp": activity.created_at,
-                    "details": activity.details
+                    "action": row.action,
+                    "resource": row.resource,
+                    "timestamp": row.created_at,
+                    "details": row.details
                 })
         
-        return {"activities": activities}
+        next_cursor = _encode_activity_cursor(page[-1].created_at, page[-1].id) if more else None
+        return {"activities": activities, "next_cursor": next_cursor}
         
     except Exception as e:
         raise HTTPException(
@@ -151,38 +293,45 @@ def get_recent_activity(
         )
 
 @router.get("/division-overview")
-def get_division_overview(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+async def get_division_overview(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_claims_async)
 ):
     """Get division overview"""
     try:
+        # Per-division counts as grouped subqueries, joined in one round trip
+        department_counts = select(
+            models.Department.division_id,
+            func.count().label("department_count")
+        ).group_by(models.Department.division_id).subquery()
+        employee_counts = select(
+            models.OrgHeadcount.division_id,
+            func.sum(models.OrgHeadcount.total).label("employee_count")
+        ).group_by(models.OrgHeadcount.division_id).subquery()
+        
+        overview_query = select(
+            models.Division,
+            func.coalesce(department_counts.c.department_count, 0),
+            func.coalesce(employee_counts.c.employee_count, 0)
+        ).outerjoin(
+            department_counts, department_counts.c.division_id == models.Division.id
+        ).outerjoin(
+            employee_counts, employee_counts.c.division_id == models.Division.id
+        ).order_by(models.Division.id)
+        
         if current_user.role == models.Role.ADMIN:
             # Admin sees all divisions
-            divisions = db.query(models.Division).all()
-        elif current_user.role == models.Role.DIVISION_MANAGER:
-            # Division manager sees their division
-            divisions = db.query(models.Division).filter(
+            rows = (await db.execute(overview_query)).all()
+        elif current_user.division_id:
+            # Division managers and others see their own division
+            rows = (await db.execute(overview_query.where(
                 models.Division.id == current_user.division_id
-            ).all()
+            ))).all()
         else:
-            # Others see their assigned division
-            divisions = db.query(models.Division).filter(
-                models.Division.id == current_user.division_id
-            ).all() if current_user.division_id else []
+            rows = []
         
         overview = []
-        for division in divisions:
-            # Count departments in this division
-            dept_count = db.query(models.Department).filter(
-                models.Department.division_id == division.id
-            ).count()
-            
-            # Count employees in this division
-            emp_count = db.query(models.User).filter(
-                models.User.division_id == division.id
-            ).count()
-            
+        for division, dept_count, emp_count in rows:
             overview.append({
                 "id": division.id,
                 "name": division.name,
@@ -203,13 +352,26 @@ def get_division_overview(
 
 @router.post("/generate-report")
 def generate_report(
+    request: Request,
     report_type: str = "summary",
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    include_details: bool = False,
+    format: str = "json",
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    """Generate a system report"""
+    """Generate a system report inside the request
+
+    The dashboard queues reports through ``POST /report-jobs`` instead, so
+    building them never holds a request open. JSON reports are served from
+    ``report_cache`` when the same period was built for the same scope;
+    ``cache`` in the response says whether it was and how long the entry
+    is kept (see PERIOD_REPORTS in app/reports.py).
+    ``format=csv|ndjson`` streams the report instead (every activity, for
+    the user report); ``include_details`` is only accepted with those, as
+    a JSON body would have to hold every activity in memory.
+    """
     try:
         # Only admin and managers can generate reports
         if current_user.role not in [models.Role.ADMIN, models.Role.DIVISION_MANAGER]:
@@ -219,21 +381,24 @@ def generate_report(
             )
         
         # Parse dates
-        start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else datetime.now() - timedelta(days=30)
-        end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.now()
+        start, end = reports.parse_period(start_date, end_date)
         
         # Generate report data based on type
-        if report_type == "summary":
-            report_data = generate_summary_report(db, current_user, start, end)
-        elif report_type == "attendance":
-            report_data = generate_attendance_report(db, current_user, start, end)
-        elif report_type == "user":
-            report_data = generate_user_report(db, current_user, start, end)
-        else:
+        cache = None
+        if format == "json" and include_details:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid report type: {report_type}"
+                detail="include_details is only available streamed: use format=csv or format=ndjson"
             )
+        elif format == "json":
+            report_data, cache = _cached_report(db, report_type, current_user, start_date, end_date, start, end)
+        else:
+            exports.check_format(format)
+            if report_type not in reports.REPORT_BUILDERS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid report type: {report_type}"
+                )
         
         # Create audit log
         audit_log = models.AuditLog(
@@ -243,107 +408,155 @@ def generate_report(
             details={
                 "report_type": report_type,
                 "start_date": start.isoformat(),
-                "end_date": end.isoformat()
+                "end_date": end.isoformat(),
+                "format": format,
+                "cache_hit": bool(cache and cache["hit"])
             }
         )
         db.add(audit_log)
         db.commit()
         
+        if format != "json":
+            # Built while streaming, in a session of its own
+            return exports.streaming_export(
+                format,
+                f"{report_type}_report_{start:%Y%m%d}_{end:%Y%m%d}",
+                reports.export_columns(report_type),
+                lambda export_db: reports.iter_report_rows(export_db, report_type, current_user, start, end),
+                read_session_factory(request)
+            )
+        
         return {
             "message": f"{report_type.capitalize()} report generated successfully",
             "report": report_data,
             "generated_at": datetime.now().isoformat(),
-            "format": "json"  # Could be "pdf", "csv", etc.
+            "format": "json",
+            "cache": cache
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating report: {str(e)}"
         )
 
-def generate_summary_report(db: Session, user: models.User, start: datetime, end: datetime):
-    """Generate summary report"""
-    # Get basic counts
-    user_count = db.query(models.User).count()
-    division_count = db.query(models.Division).count()
-    department_count = db.query(models.Department).count()
+def _check_report_permission(current_user) -> None:
+    # Only admin and managers can generate reports
+    if current_user.role not in [models.Role.ADMIN, models.Role.DIVISION_MANAGER]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions to generate reports."
+        )
+
+def _get_report_job(db: Session, job_id: int, current_user: Principal) -> models.ReportJob:
+    job = db.get(models.ReportJob, job_id)
+    # Admins see every job, managers only their own
+    if not job or (current_user.role != models.Role.ADMIN and job.requested_by != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report job not found"
+        )
+    return job
+
+@router.post("/report-jobs", status_code=status.HTTP_202_ACCEPTED)
+def create_report_job(
+    report_type: str = "summary",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    """Queue a report for the report workers; poll the returned job for progress"""
+    _check_report_permission(current_user)
     
-    # Get new users in date range
-    new_users = db.query(models.User).filter(
-        models.User.created_at.between(start, end)
-    ).count()
+    try:
+        start, end = reports.parse_period(start_date, end_date)
+        job = report_jobs.enqueue(db, report_type, current_user.id, start, end)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    try:
+        # Create audit log
+        db.add(models.AuditLog(
+            user_id=current_user.id,
+            action="generate_report",
+            resource="report",
+            resource_id=job.id,
+            details={
+                "report_type": report_type,
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "job_id": job.id
+            }
+        ))
+        db.commit()
+        return report_jobs.job_status(job)
+        
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error queueing report: {str(e)}"
+        )
+
+@router.get("/report-jobs")
+def list_report_jobs(
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    """The caller's most recent report jobs"""
+    _check_report_permission(current_user)
     
-    # Get audit logs in date range
-    activity_count = db.query(models.AuditLog).filter(
-        models.AuditLog.created_at.between(start, end)
-    ).count()
+    jobs = db.query(models.ReportJob).filter(
+        models.ReportJob.requested_by == current_user.id
+    ).order_by(
+        models.ReportJob.created_at.desc()
+    ).limit(max(1, min(limit, 100))).all()
     
-    return {
-        "period": {
-            "start": start.isoformat(),
-            "end": end.isoformat()
-        },
-        "summary": {
-            "total_users": user_count,
-            "total_divisions": division_count,
-            "total_departments": department_count,
-            "new_users": new_users,
-            "activities": activity_count
-        },
-        "generated_by": user.full_name,
-        "generated_at": datetime.now().isoformat()
-    }
+    return {"jobs": [report_jobs.job_status(job) for job in jobs]}
 
-def generate_attendance_report(db: Session, user: models.User, start: datetime, end: datetime):
-    """Generate attendance report (simulated)"""
-    # In a real system, this would query attendance records
-    return {
-        "period": {
-            "start": start.isoformat(),
-            "end": end.isoformat()
-        },
-        "attendance_summary": {
-            "average_attendance": 94.5,
-            "total_present": 1250,
-            "total_absent": 45,
-            "total_late": 78,
-            "overtime_hours": 245.5
-        },
-        "by_department": [
-            {"department": "Production", "attendance": 92.3},
-            {"department": "Quality", "attendance": 96.7},
-            {"department": "Maintenance", "attendance": 91.5},
-            {"department": "Logistics", "attendance": 94.2}
-        ]
-    }
+@router.get("/report-jobs/{job_id}")
+def get_report_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    """Status and progress of a queued report"""
+    _check_report_permission(current_user)
+    return report_jobs.job_status(_get_report_job(db, job_id, current_user))
 
-def generate_user_report(db: Session, user: models.User, start: datetime, end: datetime):
-    """Generate user activity report"""
-    # Get user activities
-    activities = db.query(models.AuditLog).filter(
-        models.AuditLog.created_at.between(start, end)
-    ).all()
+@router.get("/report-jobs/{job_id}/download")
+def download_report_job(
+    job_id: int,
+    format: str = "json",
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_claims)
+):
+    """The finished report, as stored by the worker (``format=csv|ndjson`` for field/value rows)"""
+    _check_report_permission(current_user)
+    job = _get_report_job(db, job_id, current_user)
     
-    # Group by user
-    user_activities = {}
-    for activity in activities:
-        if activity.user_id:
-            user_name = activity.user.full_name if activity.user else f"User {activity.user_id}"
-            if user_name not in user_activities:
-                user_activities[user_name] = []
-            user_activities[user_name].append({
-                "action": activity.action,
-                "resource": activity.resource,
-                "timestamp": activity.created_at.isoformat(),
-                "details": activity.details
-            })
+    if job.status != report_jobs.DONE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report is not ready (status: {job.status})"
+        )
+    
+    if format != "json":
+        return exports.streaming_document(format, f"{job.report_type}_report_{job.id}", job.result)
     
-    return {
-        "period": {
-            "start": start.isoformat(),
-            "end": end.isoformat()
+    return JSONResponse(
+        content={
+            "message": f"{job.report_type.capitalize()} report generated successfully",
+            "report": job.result,
+            "generated_at": job.finished_at.isoformat(),
+            "format": "json"
         },
-        "total_activities": len(activities),
-        "user_activities": user_activities
-    }
\ No newline at end of file
+        headers={"Content-Disposition": f'attachment; filename="{job.report_type}_report_{job.id}.json"'}
+    )
@@ -5,7 +5,8 @@ from typing import List, Optional
 
 from app import models, schemas
 from app.database import get_db
-from app.api.v1.auth import get_current_active_user
+from app.api.v1.dashboard import invalidate_dashboard_stats
+from app.api.v1.auth import get_current_active_user, invalidate_principal, bump_token_version
 
 router = APIRouter()
 
@@ -128,6 +129,7 @@ def create_department(
         db_department = models.Department(**department.dict())
         db.add(db_department)
         db.commit()
+        invalidate_dashboard_stats()
         db.refresh(db_department)
         
         return db_department
@@ -185,6 +187,7 @@ def update_department(
             setattr(db_dept, field, value)
         
         db.commit()
+        invalidate_dashboard_stats()
         db.refresh(db_dept)
         
         return db_dept
@@ -238,6 +241,7 @@ def delete_department(
         # Delete department
         db.delete(db_dept)
         db.commit()
+        invalidate_dashboard_stats()
         
         return {"message": "Department deleted successfully"}
     except Exception as e:
@@ -287,9 +291,13 @@ def assign_department_manager(
                 ).first()
                 if current_manager:
                     current_manager.role = models.Role.EMPLOYEE
+                    bump_token_version(current_manager)
             
+            previous_manager_id = department.manager_id
             department.manager_id = None
             db.commit()
+            invalidate_dashboard_stats()
+            invalidate_principal(previous_manager_id)
             return {"message": "Department manager removed successfully"}
         
         # Check if user exists
@@ -300,6 +308,8 @@ def assign_department_manager(
                 detail="User not found"
             )
         
+        affected_ids = [user.id, department.manager_id]
+        
         # Remove department manager role from current manager if exists
         if department.manager_id and department.manager_id != user.id:
             current_manager = db.query(models.User).filter(
@@ -307,16 +317,20 @@ def assign_department_manager(
             ).first()
             if current_manager:
                 current_manager.role = models.Role.EMPLOYEE
+                bump_token_version(current_manager)
         
         # Update user role and department assignment
         user.role = models.Role.DEPARTMENT_MANAGER
         user.department_id = department_id
         user.division_id = department.division_id  # Set to parent division
+        bump_token_version(user)
         
         # Update department manager
         department.manager_id = user.id
         
         db.commit()
+        invalidate_dashboard_stats()
+        invalidate_principal(*affected_ids)
         
         return {"message": "Department manager assigned successfully"}
     except Exception as e:
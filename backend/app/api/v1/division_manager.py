@@ -4,9 +4,9 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 
-from app import models, schemas
+from app import models, schemas, attendance, exports, org_rollup
 from app.database import get_db
-from app.api.v1.auth import get_current_active_user
+from app.api.v1.auth import Principal, get_current_active_user, get_current_claims
 
 router = APIRouter()
 
@@ -29,7 +29,7 @@ def verify_division_manager(current_user: models.User):
 @router.get("/settings")
 def get_division_settings(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get division-specific settings"""
     division_id = verify_division_manager(current_user)
@@ -45,14 +45,9 @@ def get_division_settings(
             models.Department.division_id == division_id
         ).count()
         
-        total_employees = db.query(models.User).filter(
-            models.User.division_id == division_id
-        ).count()
-        
-        active_employees = db.query(models.User).filter(
-            models.User.division_id == division_id,
-            models.User.is_active == True
-        ).count()
+        headcount = org_rollup.division_headcount(db, division_id)
+        total_employees = headcount["total"]
+        active_employees = headcount["active"]
         
         # Get managers in this division
         managers = db.query(models.User).filter(
@@ -60,6 +55,16 @@ def get_division_settings(
             models.User.role.in_([models.Role.DIVISION_MANAGER, models.Role.DEPARTMENT_MANAGER])
         ).all()
         
+        # Departments of the department managers, in one query
+        managed_ids = {
+            manager.department_id for manager in managers
+            if manager.role == models.Role.DEPARTMENT_MANAGER and manager.department_id
+        }
+        managed_departments = {
+            department.id: department
+            for department in db.query(models.Department).filter(models.Department.id.in_(managed_ids)).all()
+        } if managed_ids else {}
+        
         managers_list = []
         for manager in managers:
             manager_info = {
@@ -72,9 +77,7 @@ def get_division_settings(
             
             # Add department info for department managers
             if manager.role == models.Role.DEPARTMENT_MANAGER and manager.department_id:
-                department = db.query(models.Department).filter(
-                    models.Department.id == manager.department_id
-                ).first()
+                department = managed_departments.get(manager.department_id)
                 if department:
                     manager_info["department"] = {
                         "id": department.id,
@@ -132,7 +135,7 @@ def get_division_settings(
 @router.get("/dashboard/stats")
 def get_dashboard_stats(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get division dashboard statistics"""
     division_id = verify_division_manager(current_user)
@@ -149,12 +152,11 @@ def get_dashboard_stats(
         ).count()
         
         # Count employees
-        employee_count = db.query(models.User).filter(
-            models.User.division_id == division_id,
-            models.User.is_active == True
-        ).count()
+        employee_count = org_rollup.division_headcount(db, division_id)["active"]
+        
+        # People in today (daily rollup); shifts and approvals are still mock data
+        present_today = attendance.present_count(db, attendance.today(), attendance.in_division(division_id))
         
-        # Mock data for now (you'll implement real attendance/schedule data)
         return {
             "division": {
                 "id": division.id,
@@ -166,7 +168,7 @@ def get_dashboard_stats(
                 "total_departments": department_count,
                 "total_employees": employee_count,
                 "active_employees": employee_count,
-                "today_attendance": 92.5,
+                "today_attendance": attendance.attendance_rate(present_today, employee_count),
                 "active_shifts": 3,
                 "pending_approvals": 2
             }
@@ -180,7 +182,7 @@ def get_dashboard_stats(
 @router.get("/departments")
 def get_division_departments(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get all departments in the division"""
     division_id = verify_division_manager(current_user)
@@ -190,17 +192,24 @@ def get_division_departments(
             models.Department.division_id == division_id
         ).all()
         
+        headcounts = org_rollup.department_headcounts(db, [dept.id for dept in departments])
+        
+        # All department managers in one query
+        manager_ids = {dept.manager_id for dept in departments if dept.manager_id}
+        managers = {
+            user.id: user
+            for user in db.query(models.User).filter(models.User.id.in_(manager_ids)).all()
+        } if manager_ids else {}
+        
         result = []
         for dept in departments:
             # Get employee count
-            employee_count = db.query(models.User).filter(
-                models.User.department_id == dept.id
-            ).count()
+            employee_count = headcounts[dept.id]["total"]
             
             # Get manager info
             manager_info = None
             if dept.manager_id:
-                manager = db.query(models.User).filter(models.User.id == dept.manager_id).first()
+                manager = managers.get(dept.manager_id)
                 if manager:
                     manager_info = {
                         "id": manager.id,
@@ -232,30 +241,35 @@ def get_division_departments(
 def get_attendance(
     date: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
-    """Get division attendance data"""
+    """Get division attendance data for a day (default today), from attendance events"""
     division_id = verify_division_manager(current_user)
     
     try:
-        # Mock attendance data (implement real attendance tracking later)
+        day = attendance.parse_day(date)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    try:
         departments = db.query(models.Department).filter(
             models.Department.division_id == division_id
         ).all()
         
+        # Present and late people per department, from the daily rollup
+        counts = attendance.department_counts(db, day, day, attendance.in_division(division_id))
+        
         attendance_data = []
         total_employees = 0
+        total_active = 0
         total_present = 0
+        headcounts = org_rollup.department_headcounts(db, [dept.id for dept in departments])
         
         for dept in departments:
-            employee_count = db.query(models.User).filter(
-                models.User.department_id == dept.id
-            ).count()
-            
-            # Mock attendance percentages
-            present = int(employee_count * 0.92)  # 92% attendance
-            absent = employee_count - present
-            late = int(present * 0.1)  # 10% of present are late
+            employee_count = headcounts[dept.id]["total"]
+            active_count = headcounts[dept.id]["active"]
+            present = counts.get(dept.id, {}).get("present", 0)
+            late = counts.get(dept.id, {}).get("late", 0)
             
             attendance_data.append({
                 "department_id": dept.id,
@@ -263,26 +277,25 @@ def get_attendance(
                 "department_code": dept.code,
                 "total_employees": employee_count,
                 "present": present,
-                "absent": absent,
+                "absent": max(0, active_count - present),
                 "late": late,
-                "on_leave": int(employee_count * 0.05),
-                "attendance_rate": 92.0
+                "on_leave": 0,  # leave isn't recorded yet
+                "attendance_rate": attendance.attendance_rate(present, active_count)
             })
             
             total_employees += employee_count
+            total_active += active_count
             total_present += present
         
-        attendance_rate = (total_present / total_employees * 100) if total_employees > 0 else 0
-        
         return {
-            "date": date or datetime.now().date().isoformat(),
+            "date": day.isoformat(),
             "division_id": division_id,
-            "overall_attendance_rate": round(attendance_rate, 1),
+            "overall_attendance_rate": attendance.attendance_rate(total_present, total_active),
             "departments": attendance_data,
             "summary": {
                 "total_employees": total_employees,
                 "total_present": total_present,
-                "total_absent": total_employees - total_present,
+                "total_absent": sum(d["absent"] for d in attendance_data),
                 "total_late": sum(d["late"] for d in attendance_data),
                 "total_on_leave": sum(d["on_leave"] for d in attendance_data)
             }
@@ -298,7 +311,7 @@ def get_schedule(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get division schedule"""
     division_id = verify_division_manager(current_user)
@@ -308,11 +321,11 @@ def get_schedule(
             models.Department.division_id == division_id
         ).all()
         
+        headcounts = org_rollup.department_headcounts(db, [dept.id for dept in departments])
+        
         schedule_data = []
         for dept in departments:
-            employee_count = db.query(models.User).filter(
-                models.User.department_id == dept.id
-            ).count()
+            employee_count = headcounts[dept.id]["total"]
             
             schedule_data.append({
                 "department_id": dept.id,
@@ -354,7 +367,7 @@ def get_schedule(
 @router.get("/approvals/pending")
 def get_pending_approvals(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get pending approvals"""
     verify_division_manager(current_user)
@@ -397,7 +410,7 @@ def get_pending_approvals(
 def send_notification(
     notification: dict,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Send division notification"""
     division_id = verify_division_manager(current_user)
@@ -432,14 +445,17 @@ def generate_report(
     report_type: str = "attendance",
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    format: str = "json",
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
-    """Generate division report"""
+    """Generate division report (``format=csv|ndjson`` for a field/value download)"""
     verify_division_manager(current_user)
+    if format != "json":
+        exports.check_format(format)
     
     # Mock report data
-    return {
+    report = {
         "report_id": f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
         "division_id": current_user.division_id,
         "report_type": report_type,
@@ -454,4 +470,8 @@ def generate_report(
             "status": "completed",
             "message": "Report generated successfully"
         }
-    }
\ No newline at end of file
+    }
+    
+    if format != "json":
+        return exports.streaming_document(format, report["report_id"], report)
+    return report
@@ -8,7 +8,8 @@ from datetime import datetime  # FIXED: Remove the .datetime
 
 from app import models, schemas
 from app.database import get_db
-from app.api.v1.auth import get_current_active_user
+from app.api.v1.dashboard import invalidate_dashboard_stats
+from app.api.v1.auth import get_current_active_user, invalidate_principal, bump_token_version
 
 router = APIRouter()
 
@@ -134,6 +135,7 @@ def create_division(
         db_division = models.Division(**division.dict())
         db.add(db_division)
         db.commit()
+        invalidate_dashboard_stats()
         db.refresh(db_division)
         
         print(f"✅ Division created: {db_division.name} (ID: {db_division.id})")
@@ -268,6 +270,7 @@ def delete_division(
         # Delete division
         db.delete(db_division)
         db.commit()
+        invalidate_dashboard_stats()
         
         print(f"✅ Division deleted: ID {division_id}")
         return {"message": "Division deleted successfully"}
@@ -317,11 +320,16 @@ def assign_division_manager(
                 models.User.role == models.Role.DIVISION_MANAGER
             ).all()
             
+            removed_ids = []
             for manager in current_managers:
                 manager.role = models.Role.EMPLOYEE
                 manager.division_id = None
+                bump_token_version(manager)
+                removed_ids.append(manager.id)
             
             db.commit()
+            invalidate_dashboard_stats()
+            invalidate_principal(*removed_ids)
             print("✅ Division manager removed")
             return {"message": "Division manager removed successfully"}
         
@@ -339,15 +347,21 @@ def assign_division_manager(
             models.User.role == models.Role.DIVISION_MANAGER
         ).first()
         
+        affected_ids = [user.id]
         if current_manager and current_manager.id != user.id:
             current_manager.role = models.Role.EMPLOYEE
+            bump_token_version(current_manager)
+            affected_ids.append(current_manager.id)
         
         # Update user role and division assignment
         user.role = models.Role.DIVISION_MANAGER
         user.division_id = division_id
         user.department_id = None  # Remove from any department
+        bump_token_version(user)
         
         db.commit()
+        invalidate_dashboard_stats()
+        invalidate_principal(*affected_ids)
         
         print(f"✅ Division manager assigned: {user.username} to division {division.name}")
         return {"message": "Division manager assigned successfully"}
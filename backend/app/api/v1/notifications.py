@@ -1,12 +1,15 @@
 # app/api/v1/notifications.py - COMPLETE VERSION
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict
 from app import models, schemas
-from app.database import get_db
-from app.api.v1.auth import get_current_active_user
+from app.database import get_async_db, get_db
+from app.read_routing import get_async_read_db
+from app.api.v1.auth import Principal, get_current_claims, get_current_claims_async
 
 router = APIRouter()
 
@@ -44,7 +47,7 @@ class NotificationsListResponse(BaseModel):
 def send_notification(
     notification: NotificationCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Send notification to users"""
     try:
@@ -154,32 +157,36 @@ def send_notification(
         )
 
 @router.get("/", response_model=NotificationsListResponse)
-def get_notifications(
+async def get_notifications(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     read: Optional[bool] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_claims_async)
 ):
     """Get notifications for current user"""
     try:
-        query = db.query(models.Notification).filter(
-            models.Notification.user_id == current_user.id
-        )
+        criteria = [models.Notification.user_id == current_user.id]
         
         if read is not None:
-            query = query.filter(models.Notification.read == read)
+            criteria.append(models.Notification.read == read)
         
-        total = query.count()
-        notifications = query.order_by(
-            models.Notification.created_at.desc()
-        ).offset(skip).limit(limit).all()
+        total = (await db.execute(
+            select(func.count()).select_from(models.Notification).where(*criteria)
+        )).scalar_one()
+        notifications = (await db.execute(
+            select(models.Notification).where(*criteria).order_by(
+                models.Notification.created_at.desc()
+            ).offset(skip).limit(limit)
+        )).scalars().all()
         
         # Get unread count
-        unread_count = db.query(models.Notification).filter(
-            models.Notification.user_id == current_user.id,
-            models.Notification.read == False
-        ).count()
+        unread_count = (await db.execute(
+            select(func.count()).select_from(models.Notification).where(
+                models.Notification.user_id == current_user.id,
+                models.Notification.read == False
+            )
+        )).scalar_one()
         
         return {
             "notifications": notifications,
@@ -197,7 +204,7 @@ def get_notifications(
 def mark_as_read(
     notification_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Mark notification as read"""
     try:
@@ -229,7 +236,7 @@ def mark_as_read(
 @router.put("/read-all")
 def mark_all_as_read(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Mark all notifications as read"""
     try:
@@ -256,7 +263,7 @@ def mark_all_as_read(
 def delete_notification(
     notification_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Delete a notification"""
     try:
@@ -284,20 +291,21 @@ def delete_notification(
         )
 
 @router.get("/count")
-def get_notification_count(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+async def get_notification_count(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims_async)
 ):
     """Get notification counts for current user"""
     try:
-        total = db.query(models.Notification).filter(
-            models.Notification.user_id == current_user.id
-        ).count()
-        
-        unread = db.query(models.Notification).filter(
-            models.Notification.user_id == current_user.id,
-            models.Notification.read == False
-        ).count()
+        # One round trip for both counts
+        total, unread = (await db.execute(
+            select(
+                func.count(),
+                func.count().filter(models.Notification.read == False)
+            ).select_from(models.Notification).where(
+                models.Notification.user_id == current_user.id
+            )
+        )).one()
         
         return {
             "total": total,
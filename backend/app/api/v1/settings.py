@@ -1,5 +1,6 @@
 # app/api/v1/settings.py - MODIFIED FOR DIVISION MANAGER ACCESS
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Request, status, BackgroundTasks
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import json
@@ -9,9 +10,16 @@ import zipfile
 import io
 import traceback
 
-from app import models, schemas
+from app import (
+    models, schemas, password_pool, logging_config, rate_limit,
+    db_metrics, read_routing, query_stats, slow_queries, org_rollup, exports, attendance
+)
+from app.auth_utils import BCRYPT_ROUNDS_CATEGORY, token_cache
+from app.revocation import revocation_store
 from app.database import get_db
-from app.auth import get_current_active_user
+from app.read_routing import get_read_db, read_session_factory
+from app.api.v1.auth import Principal, get_current_claims, principal_cache, token_version_cache
+from app.api.v1.dashboard import report_cache, stats_cache as dashboard_stats_cache
 
 router = APIRouter()
 
@@ -104,7 +112,7 @@ def initialize_default_settings(db: Session, user_id: int):
     
     db.commit()
 
-def check_permissions(current_user: models.User, required_role: models.Role = models.Role.ADMIN):
+def check_permissions(current_user: Principal, required_role: models.Role = models.Role.ADMIN):
     """Check user permissions"""
     if required_role == models.Role.ADMIN:
         if current_user.role != models.Role.ADMIN:
@@ -122,7 +130,7 @@ def check_permissions(current_user: models.User, required_role: models.Role = mo
 @router.get("/", response_model=Dict[str, Dict[str, Any]])
 def get_settings(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get system settings grouped by category"""
     # Admin can see all settings, division manager sees limited settings
@@ -133,9 +141,12 @@ def get_settings(
         )
     
     # Initialize default settings if none exist
-    settings_count = db.query(models.SystemSettings).count()
+    settings_count = db.query(models.SystemSettings).filter(
+        models.SystemSettings.category != BCRYPT_ROUNDS_CATEGORY
+    ).count()
     if settings_count == 0:
         initialize_default_settings(db, current_user.id)
+        rate_limit.invalidate_settings()
     
     # Get all settings
     settings = db.query(models.SystemSettings).all()
@@ -170,7 +181,7 @@ def update_setting(
     key: str,
     setting_update: schemas.SettingsUpdate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Update a specific setting"""
     # Check permissions
@@ -216,6 +227,7 @@ def update_setting(
     
     db.commit()
     db.refresh(setting)
+    rate_limit.invalidate_settings()
     
     # Create audit log
     create_audit_log(
@@ -238,7 +250,7 @@ def update_setting(
 def reset_settings_category(
     category: str,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Reset all settings in a category to defaults"""
     # Only admin can reset settings
@@ -271,6 +283,7 @@ def reset_settings_category(
         db.add(db_setting)
     
     db.commit()
+    rate_limit.invalidate_settings()
     
     # Create audit log
     create_audit_log(
@@ -286,7 +299,7 @@ def reset_settings_category(
 @router.post("/reset-all")
 def reset_all_settings(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Reset all settings to defaults"""
     # Only admin can reset settings
@@ -296,11 +309,14 @@ def reset_all_settings(
             detail="Not enough permissions. Only admin can reset settings."
         )
     
-    # Delete all settings
-    db.query(models.SystemSettings).delete()
+    # Delete all settings (keeping the shared bcrypt cost, which isn't a default)
+    db.query(models.SystemSettings).filter(
+        models.SystemSettings.category != BCRYPT_ROUNDS_CATEGORY
+    ).delete()
     
     # Initialize with defaults
     initialize_default_settings(db, current_user.id)
+    rate_limit.invalidate_settings()
     
     # Create audit log
     create_audit_log(
@@ -320,8 +336,8 @@ def get_audit_logs(
     resource: Optional[str] = None,
     action: Optional[str] = None,
     user_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get audit logs with filters"""
     # Check permissions
@@ -341,12 +357,75 @@ def get_audit_logs(
     
     return logs
 
+AUDIT_EXPORT_COLUMNS = (
+    "id", "created_at", "user_id", "username", "action", "resource", "resource_id",
+    "ip_address", "user_agent", "details"
+)
+
+@router.get("/audit-logs/export")
+def export_audit_logs(
+    request: Request,
+    format: str = "csv",
+    resource: Optional[str] = None,
+    action: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    current_user: Principal = Depends(get_current_claims)
+):
+    """Stream every matching audit log as CSV or NDJSON, newest first"""
+    # Check permissions
+    check_permissions(current_user, models.Role.ADMIN)
+    exports.check_format(format)
+    
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    query = select(
+        models.AuditLog.id,
+        models.AuditLog.created_at,
+        models.AuditLog.user_id,
+        models.User.username,
+        models.AuditLog.action,
+        models.AuditLog.resource,
+        models.AuditLog.resource_id,
+        models.AuditLog.ip_address,
+        models.AuditLog.user_agent,
+        models.AuditLog.details
+    ).outerjoin(models.User, models.User.id == models.AuditLog.user_id)
+    
+    if resource:
+        query = query.where(models.AuditLog.resource == resource)
+    if action:
+        query = query.where(models.AuditLog.action == action)
+    if user_id:
+        query = query.where(models.AuditLog.user_id == user_id)
+    if start:
+        query = query.where(models.AuditLog.created_at >= start)
+    if end:
+        query = query.where(models.AuditLog.created_at < end)
+    
+    query = query.order_by(
+        models.AuditLog.created_at.desc(), models.AuditLog.id.desc()
+    ).execution_options(yield_per=exports.EXPORT_BATCH_SIZE)
+    
+    return exports.streaming_export(
+        format,
+        f"audit_logs_{datetime.now():%Y%m%d_%H%M%S}",
+        AUDIT_EXPORT_COLUMNS,
+        lambda export_db: export_db.execute(query),
+        read_session_factory(request)
+    )
+
 @router.get("/division-audit-logs")
 def get_division_audit_logs(
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get audit logs for division manager's division"""
     # Only division manager and admin can access
@@ -376,7 +455,7 @@ def get_division_audit_logs(
 def create_backup(
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Create a system backup"""
     # Only admin can create backups
@@ -422,7 +501,7 @@ def create_backup(
 @router.post("/clear-cache")
 def clear_cache(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Clear system cache"""
     # Only admin can clear cache
@@ -432,8 +511,11 @@ def clear_cache(
             detail="Not enough permissions. Only admin can clear cache."
         )
     
-    # In a real implementation, this would clear cache
-    # For now, we'll just log it
+    principal_cache.clear()
+    token_version_cache.clear()
+    token_cache.clear()
+    dashboard_stats_cache.clear()
+    report_cache.clear()
     
     # Create audit log
     create_audit_log(
@@ -446,10 +528,60 @@ def clear_cache(
     
     return {"message": "Cache cleared successfully"}
 
+@router.get("/runtime-stats")
+def get_runtime_stats(
+    current_user: Principal = Depends(get_current_claims)
+):
+    """Get in-process cache and runtime counters for this worker"""
+    check_permissions(current_user, models.Role.ADMIN)
+    
+    return {
+        "pid": os.getpid(),
+        "principal_cache": principal_cache.stats(),
+        "token_version_cache": token_version_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "dashboard_stats_cache": dashboard_stats_cache.stats(),
+        "report_cache": report_cache.stats(),
+        "revocation": revocation_store.stats(),
+        "password_pool": password_pool.stats(),
+        "login_limiter": rate_limit.stats(),
+        "db_pool": db_metrics.pool_stats(),
+        "replica": read_routing.stats(),
+        "queries": query_stats.stats(),
+        "slow_queries": slow_queries.stats(),
+        "org_rollup": org_rollup.stats(),
+        "attendance_ingest": attendance.stats(),
+        "logging": logging_config.stats()
+    }
+
+@router.get("/slow-queries")
+def get_slow_queries(
+    limit: int = 50,
+    current_user: Principal = Depends(get_current_claims)
+):
+    """Get the most recent slow queries recorded by this worker"""
+    check_permissions(current_user, models.Role.ADMIN)
+    
+    return {
+        "pid": os.getpid(),
+        "stats": slow_queries.stats(),
+        "queries": slow_queries.recent(limit)
+    }
+
+@router.delete("/slow-queries")
+def clear_slow_queries(
+    current_user: Principal = Depends(get_current_claims)
+):
+    """Clear this worker's slow-query log"""
+    check_permissions(current_user, models.Role.ADMIN)
+    
+    slow_queries.clear()
+    return {"message": "Slow-query log cleared"}
+
 @router.get("/system-info")
 def get_system_info(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get system information and health status"""
     # Check permissions
@@ -503,7 +635,7 @@ def get_system_info(
 @router.get("/division-system-info")
 def get_division_system_info(
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_claims)
 ):
     """Get division-specific system information"""
     # Only division manager and admin can access
@@ -517,19 +649,14 @@ def get_division_system_info(
         division_id = current_user.division_id
         
         # Get division-specific counts
-        division_user_count = db.query(models.User).filter(
-            models.User.division_id == division_id
-        ).count()
+        headcount = org_rollup.division_headcount(db, division_id)
+        division_user_count = headcount["total"]
+        active_users = headcount["active"]
         
         division_dept_count = db.query(models.Department).filter(
             models.Department.division_id == division_id
         ).count()
         
-        active_users = db.query(models.User).filter(
-            models.User.division_id == division_id,
-            models.User.is_active == True
-        ).count()
-        
         # Get division info
         division = db.query(models.Division).filter(models.Division.id == division_id).first()
         
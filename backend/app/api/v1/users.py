@@ -1,13 +1,20 @@
 # app/api/v1/users.py - COMPLETE FIXED VERSION WITH DEBUGGING
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import false, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import json
 from datetime import datetime
 from app import models, schemas
-from app.database import get_db
-from app.auth_utils import get_password_hash
-from app.api.v1.auth import get_current_active_user, get_current_user
+from app.database import get_async_db, get_db
+from app.read_routing import get_async_read_db
+from app.password_pool import PasswordPoolBusy, hash_password
+from app.api.v1.dashboard import invalidate_dashboard_stats, invalidate_period_reports
+from app.api.v1.auth import (
+    Principal, get_current_active_user, get_current_claims_async, get_current_user,
+    invalidate_principal, bump_token_version
+)
 
 router = APIRouter()
 
@@ -42,9 +49,9 @@ def debug_user(
     }
 
 @router.get("/", response_model=List[schemas.UserResponse])
-def read_users(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user),
+async def read_users(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_claims_async),
     skip: int = 0,
     limit: int = 100,
     division_id: Optional[int] = None,
@@ -54,7 +61,7 @@ def read_users(
 ):
     try:
         # Apply role-based filtering
-        query = db.query(models.User)
+        query = select(models.User)
         
         # Admin can see all users
         if current_user.role == models.Role.ADMIN:
@@ -62,36 +69,36 @@ def read_users(
         # Division manager can see users in their division
         elif current_user.role == models.Role.DIVISION_MANAGER:
             if current_user.division_id:
-                query = query.filter(models.User.division_id == current_user.division_id)
+                query = query.where(models.User.division_id == current_user.division_id)
             else:
-                query = query.filter(False)  # No division assigned
+                query = query.where(false())  # No division assigned
         # Department manager can see users in their department
         elif current_user.role == models.Role.DEPARTMENT_MANAGER:
             if current_user.department_id:
-                query = query.filter(models.User.department_id == current_user.department_id)
+                query = query.where(models.User.department_id == current_user.department_id)
             else:
-                query = query.filter(False)  # No department assigned
+                query = query.where(false())  # No department assigned
         # Employee can only see themselves
         else:
-            query = query.filter(models.User.id == current_user.id)
+            query = query.where(models.User.id == current_user.id)
         
         # Apply filters
         if division_id:
-            query = query.filter(models.User.division_id == division_id)
+            query = query.where(models.User.division_id == division_id)
         if department_id:
-            query = query.filter(models.User.department_id == department_id)
+            query = query.where(models.User.department_id == department_id)
         if role:
-            query = query.filter(models.User.role == role)
+            query = query.where(models.User.role == role)
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
+            query = query.where(
                 (models.User.full_name.ilike(search_term)) |
                 (models.User.email.ilike(search_term)) |
                 (models.User.employee_id.ilike(search_term)) |
                 (models.User.username.ilike(search_term))
             )
         
-        users = query.offset(skip).limit(limit).all()
+        users = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
         return users
     except Exception as e:
         raise HTTPException(
@@ -100,13 +107,13 @@ def read_users(
         )
 
 @router.get("/{user_id}", response_model=schemas.UserResponse)
-def read_user(
+async def read_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_claims_async)
 ):
     try:
-        user = db.query(models.User).filter(models.User.id == user_id).first()
+        user = await db.get(models.User, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -192,7 +199,7 @@ def create_user(
                 )
         
         # Hash password
-        hashed_password = get_password_hash(user.password)
+        hashed_password = hash_password(user.password)
         
         # Create user
         db_user = models.User(
@@ -211,11 +218,18 @@ def create_user(
         
         db.add(db_user)
         db.commit()
+        invalidate_dashboard_stats()
         db.refresh(db_user)
         
         return db_user
     except HTTPException:
         raise
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         db.rollback()
         print(f"❌ Error creating user: {str(e)}")
@@ -291,6 +305,7 @@ def update_user(
         
         # Track role change
         old_role = db_user.role
+        old_scope = (db_user.role, db_user.division_id, db_user.department_id, db_user.is_active)
         new_role = update_data.get('role')
         
         if new_role:
@@ -328,6 +343,10 @@ def update_user(
                 print(f"⚠️ Division manager had department {db_user.department_id}, fixing...")
                 db_user.department_id = None
         
+        # Tokens carry role and scope claims; changing them invalidates old tokens
+        if (db_user.role, db_user.division_id, db_user.department_id, db_user.is_active) != old_scope:
+            bump_token_version(db_user)
+        
         print(f"\n📊 Before commit - Final state:")
         print(f"   • Role: {db_user.role}")
         print(f"   • Division ID: {db_user.division_id}")
@@ -336,6 +355,8 @@ def update_user(
         print(f"   • Full Name: {db_user.full_name}")
         
         db.commit()
+        invalidate_dashboard_stats()
+        invalidate_principal(user_id)
         db.refresh(db_user)
         
         print(f"\n✅ User {user_id} updated successfully")
@@ -401,6 +422,10 @@ def delete_user(
         # Delete user
         db.delete(db_user)
         db.commit()
+        invalidate_dashboard_stats()
+        # Closed summary/user reports counted this user and their activity
+        invalidate_period_reports()
+        invalidate_principal(user_id)
         
         return {"message": "User deleted successfully"}
     except Exception as e:
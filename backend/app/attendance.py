@@ -0,0 +1,571 @@
+# app/attendance.py - ATTENDANCE EVENTS: BULK INGEST, PARTITIONS AND DAILY ROLLUP
+"""Clock-in/clock-out events from badge readers and terminals.
+
+``ingest()`` writes a whole batch with one ``COPY ... FROM STDIN`` on
+Postgres (psycopg2) instead of one INSERT per row; other databases get a
+single executemany. Events for unknown users are rejected, the rest are
+written. Re-sent batches are stored twice; the rollup keeps the first
+clock-in and last clock-out of a day, so duplicates don't change it.
+
+On Postgres ``attendance_events`` is partitioned by month (alembic 0006).
+Partitions are created ``ATTENDANCE_PARTITION_MONTHS_AHEAD`` months ahead
+at startup and by ``maintain_attendance.py``, and on demand for any month
+a batch reaches; a DEFAULT partition takes anything they miss, so an event
+never lacks a partition.
+
+``attendance_daily`` holds one row per user and work day (first in, last
+out, worked/late/overtime minutes, status), updated in the ingest
+transaction from the batch alone: first-in is a running minimum and
+last-out a running maximum, so merging a batch never needs the raw events.
+Dashboards and reports read only the rollup; ``rebuild_daily()``
+recomputes it from the events after backfills or manual SQL.
+
+A work day is the date of the user's shift start, so a shift that runs past
+midnight stays on one day: an event belongs to the day whose shift start it
+is within 12 hours of.
+"""
+import csv
+import io
+import itertools
+import logging
+import os
+import time as time_module
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import case, delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+# Factory-local time zone: day boundaries, shift times and offset-less timestamps
+ATTENDANCE_TIMEZONE = ZoneInfo(os.getenv("ATTENDANCE_TIMEZONE", "UTC"))
+# Minutes after shift start before a clock-in counts as late
+ATTENDANCE_LATE_GRACE_MINUTES = int(os.getenv("ATTENDANCE_LATE_GRACE_MINUTES", "5"))
+# Shift assumed for users without one
+ATTENDANCE_DEFAULT_SHIFT_START = os.getenv("ATTENDANCE_DEFAULT_SHIFT_START", "08:00")
+ATTENDANCE_DEFAULT_SHIFT_END = os.getenv("ATTENDANCE_DEFAULT_SHIFT_END", "16:00")
+# Days of the week (0 = Monday) people are expected in, for attendance rates
+ATTENDANCE_WORK_WEEKDAYS = frozenset(
+    int(day) for day in os.getenv("ATTENDANCE_WORK_WEEKDAYS", "0,1,2,3,4").split(",") if day.strip()
+)
+# Largest batch accepted by one ingest request
+ATTENDANCE_INGEST_MAX_EVENTS = int(os.getenv("ATTENDANCE_INGEST_MAX_EVENTS", "20000"))
+# Events older than this or further ahead than this are rejected (a gateway
+# with a bad clock); it also bounds the months ingest creates partitions for
+ATTENDANCE_EVENT_MAX_AGE_DAYS = int(os.getenv("ATTENDANCE_EVENT_MAX_AGE_DAYS", "60"))
+ATTENDANCE_EVENT_MAX_FUTURE_HOURS = int(os.getenv("ATTENDANCE_EVENT_MAX_FUTURE_HOURS", "24"))
+# Monthly event partitions kept ready beyond the current month (Postgres)
+ATTENDANCE_PARTITION_MONTHS_AHEAD = int(os.getenv("ATTENDANCE_PARTITION_MONTHS_AHEAD", "3"))
+
+CLOCK_IN, CLOCK_OUT = "clock_in", "clock_out"
+
+_table = models.AttendanceEvent.__table__
+_daily = models.AttendanceDaily.__table__
+Daily = models.AttendanceDaily
+_COPY_COLUMNS = ("user_id", "event_type", "occurred_at", "device_id", "source")
+_DAILY_KEY = ("user_id", "work_day")
+_stats = {"batches": 0, "events": 0, "rejected": 0, "write_seconds": 0.0, "daily_rows": 0, "partitions_created": 0}
+_rollup_listeners: List[Callable[[date, date], None]] = []
+
+def to_utc(timestamp: datetime) -> datetime:
+    """Aware UTC datetime; naive ones are factory-local time."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=ATTENDANCE_TIMEZONE)
+    return timestamp.astimezone(timezone.utc)
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes; they were stored as UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def today() -> date:
+    return datetime.now(ATTENDANCE_TIMEZONE).date()
+
+def parse_day(value: Optional[str]) -> date:
+    """``YYYY-MM-DD`` to a date; today (factory time) when omitted."""
+    return datetime.strptime(value, "%Y-%m-%d").date() if value else today()
+
+# --- Partitions (Postgres) -------------------------------------------------------
+
+_partitioned: Optional[bool] = None
+_ready_months: set = set()
+# Catches events for any month without its own partition (alembic 0006)
+DEFAULT_PARTITION = "attendance_events_default"
+# duplicate_table, unique_violation: another process created the same partition first
+_CREATE_RACE_SQLSTATES = ("42P07", "23505")
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _next_month(month: date) -> date:
+    return (month + timedelta(days=32)).replace(day=1)
+
+def partition_name(month: date) -> str:
+    return f"attendance_events_y{month:%Y}m{month:%m}"
+
+def _is_partitioned(connection) -> bool:
+    global _partitioned
+    if _partitioned is None:
+        _partitioned = connection.execute(text(
+            "SELECT 1 FROM pg_class WHERE relname = 'attendance_events' AND relkind = 'p'"
+        )).first() is not None
+    return _partitioned
+
+def _partitions(connection) -> set:
+    return set(connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'attendance_events'::regclass"
+    )).scalars())
+
+def _create_partition(connection, name: str, statements: List[str]) -> bool:
+    """Run ``statements`` in a savepoint; False if another process made ``name`` first."""
+    try:
+        with connection.begin_nested():
+            for statement in statements:
+                connection.execute(text(statement))
+        return True
+    except DBAPIError as e:
+        if getattr(e.orig, "pgcode", None) not in _CREATE_RACE_SQLSTATES or name not in _partitions(connection):
+            raise
+        logger.info(
+            "Attendance partition created elsewhere",
+            extra={"event": "attendance.partition_race", "partition": name}
+        )
+        return False
+
+def _month_statements(month: date) -> List[str]:
+    """Create ``month``'s partition, moving its rows out of the default partition.
+
+    Postgres refuses a new partition while the default one holds rows in its
+    range, so the table is filled first and attached afterwards.
+    """
+    name = partition_name(month)
+    low = f"'{month.isoformat()} 00:00:00+00'"
+    high = f"'{_next_month(month).isoformat()} 00:00:00+00'"
+    return [
+        f"CREATE TABLE {name} (LIKE attendance_events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE occurred_at >= {low} AND occurred_at < {high} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        f"ALTER TABLE attendance_events ATTACH PARTITION {name} FOR VALUES FROM ({low}) TO ({high})",
+    ]
+
+def ensure_partitions(bind, months: Iterable[date]) -> List[str]:
+    """Create any missing monthly partitions (UTC months); returns the new ones.
+
+    Runs in its own short transaction on ``bind`` (an engine), so the
+    parent's lock isn't held for the rest of an ingest. A no-op off Postgres
+    or when the table isn't partitioned. ``_ready_months`` only saves the
+    catalog lookup: a month this process wrongly thinks is ready still has
+    the default partition, and several processes may create the same month.
+    """
+    months = {month_start(month) for month in months} - _ready_months
+    if not months or bind.dialect.name != "postgresql":
+        _ready_months.update(months)
+        return []
+
+    created = []
+    with bind.begin() as connection:
+        if _is_partitioned(connection):
+            existing = _partitions(connection)
+            if DEFAULT_PARTITION not in existing:
+                _create_partition(connection, DEFAULT_PARTITION, [
+                    f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF attendance_events DEFAULT"
+                ])
+            for month in sorted(months):
+                name = partition_name(month)
+                if name not in existing and _create_partition(connection, name, _month_statements(month)):
+                    created.append(name)
+    _ready_months.update(months)
+    if created:
+        _stats["partitions_created"] += len(created)
+        logger.info(
+            "Attendance partitions created",
+            extra={"event": "attendance.partitions", "partitions": created}
+        )
+    return created
+
+def drain_default_partition(bind) -> List[str]:
+    """Give every month found in the default partition its own partition; returns the new ones."""
+    if bind.dialect.name != "postgresql":
+        return []
+    with bind.connect() as connection:
+        if not _is_partitioned(connection) or DEFAULT_PARTITION not in _partitions(connection):
+            return []
+        months = set(connection.execute(text(
+            f"SELECT DISTINCT date_trunc('month', occurred_at AT TIME ZONE 'UTC')::date FROM {DEFAULT_PARTITION}"
+        )).scalars())
+    _ready_months.difference_update(months)
+    return ensure_partitions(bind, months)
+
+def ensure_future_partitions(bind, months_ahead: int = ATTENDANCE_PARTITION_MONTHS_AHEAD) -> List[str]:
+    """Partitions for this month and the next ``months_ahead``."""
+    month = month_start(datetime.now(timezone.utc).date())
+    months = [month]
+    for _ in range(months_ahead):
+        month = _next_month(month)
+        months.append(month)
+    return ensure_partitions(bind, months)
+
+# --- Work days ------------------------------------------------------------------
+
+def _clock(value: Optional[str], default: str) -> timedelta:
+    hours, minutes = (value or default).split(":")
+    return timedelta(hours=int(hours), minutes=int(minutes))
+
+def shift_window(start_time: Optional[str], end_time: Optional[str]) -> Tuple[timedelta, timedelta]:
+    """(start after midnight, length) of a shift; ``"16:00"``-``"00:00"`` is 8 hours."""
+    if start_time is None:
+        start_time, end_time = ATTENDANCE_DEFAULT_SHIFT_START, ATTENDANCE_DEFAULT_SHIFT_END
+    start = _clock(start_time, ATTENDANCE_DEFAULT_SHIFT_START)
+    length = (_clock(end_time, ATTENDANCE_DEFAULT_SHIFT_END) - start) % timedelta(days=1)
+    return start, length or timedelta(days=1)
+
+def work_day(occurred_at: datetime, shift_start: timedelta) -> date:
+    local = _aware(occurred_at).astimezone(ATTENDANCE_TIMEZONE)
+    return (local.replace(tzinfo=None) - shift_start + timedelta(hours=12)).date()
+
+def _minutes(delta: timedelta) -> int:
+    return max(0, int(delta.total_seconds() // 60))
+
+def daily_row(user_id: int, division_id: Optional[int], department_id: Optional[int], day: date,
+              first_in: Optional[datetime], last_out: Optional[datetime], events: int,
+              scheduled_start: datetime, shift_minutes: int) -> Dict[str, Any]:
+    """An ``attendance_daily`` row, with the figures derived from first in / last out."""
+    worked = late = overtime = 0
+    if first_in is not None:
+        late = _minutes(first_in - scheduled_start - timedelta(minutes=ATTENDANCE_LATE_GRACE_MINUTES))
+        if last_out is not None and last_out > first_in:
+            worked = _minutes(last_out - first_in)
+            overtime = max(0, worked - shift_minutes)
+
+    if late:
+        day_status = "late"
+    elif not worked:
+        day_status = "incomplete"  # a missed clock-in or clock-out
+    else:
+        day_status = "present"
+    return {
+        "user_id": user_id,
+        "work_day": day,
+        "division_id": division_id,
+        "department_id": department_id,
+        "first_in": first_in,
+        "last_out": last_out,
+        "scheduled_start": scheduled_start,
+        "shift_minutes": shift_minutes,
+        "worked_minutes": worked,
+        "late_minutes": late,
+        "overtime_minutes": overtime,
+        "status": day_status,
+        "events": events,
+    }
+
+def _day_rows(user, events: Iterable[Tuple[str, datetime]]) -> Dict[date, Dict[str, Any]]:
+    """Rollup rows for one user's (type, UTC time) events, by work day."""
+    shift_start, shift_length = shift_window(user.start_time, user.end_time)
+    days: Dict[date, List] = {}
+    for event_type, occurred_at in events:
+        occurred_at = _aware(occurred_at)
+        day = days.setdefault(work_day(occurred_at, shift_start), [None, None, 0])  # first in, last out, events
+        if event_type == CLOCK_IN and (day[0] is None or occurred_at < day[0]):
+            day[0] = occurred_at
+        elif event_type == CLOCK_OUT and (day[1] is None or occurred_at > day[1]):
+            day[1] = occurred_at
+        day[2] += 1
+    return {
+        day: daily_row(
+            user.id, user.division_id, user.department_id, day, first_in, last_out, count,
+            datetime.combine(day, time.min, tzinfo=ATTENDANCE_TIMEZONE) + shift_start,
+            int(shift_length.total_seconds() // 60)
+        )
+        for day, (first_in, last_out, count) in days.items()
+    }
+
+def _merge(stored, batch: Dict[str, Any]) -> Dict[str, Any]:
+    """Stored rollup row plus a batch's row for the same user and day."""
+    first_ins = [value for value in (_aware(stored.first_in), batch["first_in"]) if value is not None]
+    last_outs = [value for value in (_aware(stored.last_out), batch["last_out"]) if value is not None]
+    # The day keeps the placement and shift it was first recorded with
+    return daily_row(
+        stored.user_id, stored.division_id, stored.department_id, stored.work_day,
+        min(first_ins) if first_ins else None,
+        max(last_outs) if last_outs else None,
+        stored.events + batch["events"],
+        _aware(stored.scheduled_start), stored.shift_minutes
+    )
+
+def _dialect_insert(connection):
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"attendance_daily upserts need Postgres or SQLite, not {dialect}")
+
+def _upsert_daily(connection, rows: List[Dict[str, Any]]) -> None:
+    statement = _dialect_insert(connection)(_daily)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=list(_DAILY_KEY),
+        set_={
+            **{name: statement.excluded[name] for name in rows[0] if name not in _DAILY_KEY},
+            "updated_at": func.now(),
+        }
+    ), rows)
+
+def _update_daily(db: Session, rows: List[Tuple], users: Dict[int, Any]) -> Optional[Tuple[date, date]]:
+    """Fold a batch of written events into ``attendance_daily`` (same transaction).
+
+    Returns the first and last work day the batch touched.
+    """
+    batch: Dict[Tuple[int, date], Dict[str, Any]] = {}
+    for user_id, user_rows in itertools.groupby(sorted(rows, key=lambda row: row[0]), key=lambda row: row[0]):
+        for day, row in _day_rows(users[user_id], ((row[1], row[2]) for row in user_rows)).items():
+            batch[(user_id, day)] = row
+    if not batch:
+        return None
+
+    connection = db.connection()
+    keys = sorted(batch)  # fixed order: concurrent batches can't deadlock
+    # Days this batch starts are complete as inserted
+    created = set(connection.execute(
+        _dialect_insert(connection)(_daily).on_conflict_do_nothing(
+            index_elements=list(_DAILY_KEY)
+        ).returning(_daily.c.user_id, _daily.c.work_day),
+        [batch[key] for key in keys]
+    ).tuples())
+
+    existing = [key for key in keys if key not in created]
+    if existing:
+        # Lock the stored rows: a concurrent batch for the same day waits and then sees ours
+        stored = {
+            (row.user_id, row.work_day): row
+            for row in connection.execute(
+                select(_daily).where(
+                    _daily.c.user_id.in_({key[0] for key in existing}),
+                    _daily.c.work_day.between(min(key[1] for key in existing), max(key[1] for key in existing))
+                ).order_by(_daily.c.user_id, _daily.c.work_day).with_for_update()
+            )
+        }
+        _upsert_daily(connection, [_merge(stored[key], batch[key]) for key in existing])
+    _stats["daily_rows"] += len(batch)
+    days = [key[1] for key in keys]
+    return min(days), max(days)
+
+def add_rollup_listener(listener: Callable[[date, date], None]) -> None:
+    """Call ``listener(first_day, last_day)`` after rollup rows in that range change (this process)."""
+    _rollup_listeners.append(listener)
+
+def _rollup_changed(first: date, last: date) -> None:
+    for listener in _rollup_listeners:
+        listener(first, last)
+
+# --- Ingest ------------------------------------------------------------------
+
+def _users(db: Session, user_ids: Sequence[int]) -> Dict[int, Any]:
+    """Placement and shift of each existing user in ``user_ids``."""
+    if not user_ids:
+        return {}
+    rows = db.execute(
+        select(
+            models.User.id,
+            models.User.division_id,
+            models.User.department_id,
+            models.Shift.start_time,
+            models.Shift.end_time
+        ).outerjoin(
+            models.Shift, models.Shift.id == models.User.shift_id
+        ).where(models.User.id.in_(user_ids))
+    )
+    return {row.id: row for row in rows}
+
+def _copy(db: Session, rows: List[Tuple]) -> None:
+    connection = db.connection()
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        # Unquoted empty fields (None) are NULL in COPY's csv format; datetimes go out as str()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY attendance_events ({', '.join(_COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+    else:
+        connection.execute(insert(_table), [dict(zip(_COPY_COLUMNS, row)) for row in rows])
+
+def ingest(db: Session, events: Sequence[Any]) -> Dict[str, Any]:
+    """Write ``events`` (``schemas.AttendanceEventIn``), update the daily rollup and commit.
+
+    Events for unknown users, or dated outside ATTENDANCE_EVENT_MAX_AGE_DAYS
+    back to ATTENDANCE_EVENT_MAX_FUTURE_HOURS ahead, are rejected. Returns
+    the counts and, per rejected event, its index in the batch.
+    """
+    users = _users(db, list({event.user_id for event in events}))
+    now = datetime.now(timezone.utc)
+    oldest = now - timedelta(days=ATTENDANCE_EVENT_MAX_AGE_DAYS)
+    newest = now + timedelta(hours=ATTENDANCE_EVENT_MAX_FUTURE_HOURS)
+    rows = []
+    rejected = []
+    for index, event in enumerate(events):
+        if event.user_id not in users:
+            rejected.append({"index": index, "user_id": event.user_id, "reason": "Unknown user"})
+            continue
+        occurred_at = to_utc(event.timestamp)
+        if occurred_at < oldest:
+            rejected.append({"index": index, "user_id": event.user_id,
+                             "reason": f"Older than {ATTENDANCE_EVENT_MAX_AGE_DAYS} days"})
+            continue
+        if occurred_at > newest:
+            rejected.append({"index": index, "user_id": event.user_id, "reason": "In the future"})
+            continue
+        rows.append((
+            event.user_id,
+            event.type.value,
+            occurred_at,
+            event.device_id,
+            event.source
+        ))
+
+    start = time_module.perf_counter()
+    touched = None
+    if rows:
+        # Only months inside the accepted window, so a few at most
+        ensure_partitions(db.get_bind(), {row[2].date() for row in rows})
+        _copy(db, rows)
+        touched = _update_daily(db, rows, users)
+    db.commit()
+    elapsed = time_module.perf_counter() - start
+    if touched:
+        _rollup_changed(*touched)
+
+    _stats["batches"] += 1
+    _stats["events"] += len(rows)
+    _stats["rejected"] += len(rejected)
+    _stats["write_seconds"] += elapsed
+    if rejected:
+        logger.warning(
+            "Attendance events rejected",
+            extra={"event": "attendance.rejected", "rejected": len(rejected), "received": len(events)}
+        )
+    return {"received": len(events), "inserted": len(rows), "rejected": rejected}
+
+def stats() -> Dict[str, Any]:
+    result = dict(_stats)
+    result["write_seconds"] = round(result["write_seconds"], 3)
+    result["events_per_second"] = round(_stats["events"] / _stats["write_seconds"]) if _stats["write_seconds"] else 0
+    return result
+
+# --- Reads (rollup only) ---------------------------------------------------------
+
+def in_division(division_id: Optional[int]):
+    return Daily.division_id == division_id
+
+def in_department(department_id: Optional[int]):
+    return Daily.department_id == department_id
+
+def department_counts(db: Session, first: date, last: date, *criteria) -> Dict[Optional[int], Dict[str, int]]:
+    """``{department_id: {"present", "late", "overtime_minutes"}}`` over work days ``first``..``last``.
+
+    ``present`` counts person-days; ``criteria`` filter ``attendance_daily``.
+    """
+    rows = db.execute(
+        select(
+            Daily.department_id,
+            func.count().label("present"),
+            func.coalesce(func.sum(case((Daily.late_minutes > 0, 1), else_=0)), 0).label("late"),
+            func.coalesce(func.sum(Daily.overtime_minutes), 0).label("overtime_minutes")
+        ).where(
+            Daily.work_day.between(first, last), *criteria
+        ).group_by(Daily.department_id)
+    )
+    return {row.department_id: {"present": row.present, "late": row.late, "overtime_minutes": row.overtime_minutes} for row in rows}
+
+def present_subquery(day: date, *criteria):
+    """People with attendance on ``day``, as a scalar subquery."""
+    return select(func.count()).select_from(Daily).where(Daily.work_day == day, *criteria).scalar_subquery()
+
+def present_count(db: Session, day: date, *criteria) -> int:
+    return db.execute(select(present_subquery(day, *criteria))).scalar()
+
+def work_days(first: date, last: date) -> List[date]:
+    return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
+def expected_days(first: date, last: date) -> int:
+    """Working days (ATTENDANCE_WORK_WEEKDAYS) from ``first`` to ``last``, inclusive."""
+    return sum(1 for day in work_days(first, last) if day.weekday() in ATTENDANCE_WORK_WEEKDAYS)
+
+def attendance_rate(present: int, expected: int) -> float:
+    """Percent, capped at 100 (people also come in on non-working days)."""
+    return round(min(100.0, present / expected * 100), 1) if expected else 0.0
+
+# --- Rebuild ------------------------------------------------------------------------
+
+def rows_from_events(db: Session, first: date, last: date, *criteria, batch_size: int = 5000) -> Iterator[Dict[str, Any]]:
+    """Rollup rows recomputed from raw events for work days ``first``..``last``.
+
+    ``criteria`` filter ``models.User``. Events are streamed ordered by user,
+    so memory holds one user's events at a time.
+    """
+    # A work day's events lie within 12 hours of a shift start on that date
+    window_start = datetime.combine(first, time.min, tzinfo=ATTENDANCE_TIMEZONE) - timedelta(hours=12)
+    window_end = datetime.combine(last, time.min, tzinfo=ATTENDANCE_TIMEZONE) + timedelta(hours=36)
+    Event = models.AttendanceEvent
+    statement = select(
+        Event.user_id.label("id"),
+        models.User.division_id,
+        models.User.department_id,
+        models.Shift.start_time,
+        models.Shift.end_time,
+        Event.event_type,
+        Event.occurred_at
+    ).join(
+        models.User, models.User.id == Event.user_id
+    ).outerjoin(
+        models.Shift, models.Shift.id == models.User.shift_id
+    ).where(
+        Event.occurred_at >= window_start.astimezone(timezone.utc),
+        Event.occurred_at < window_end.astimezone(timezone.utc),
+        *criteria
+    ).order_by(Event.user_id, Event.occurred_at).execution_options(yield_per=batch_size)
+
+    for _, user_rows in itertools.groupby(db.execute(statement), key=lambda row: row.id):
+        user_rows = list(user_rows)
+        days = _day_rows(user_rows[0], ((row.event_type, row.occurred_at) for row in user_rows))
+        for day in sorted(days):
+            if first <= day <= last:
+                yield days[day]
+
+def rebuild_daily(db: Session, first: date, last: date, batch_size: int = 1000) -> int:
+    """Recompute ``attendance_daily`` for work days ``first``..``last`` from the events; commits.
+
+    On Postgres the rollup is locked against ingest for the duration.
+    Returns the number of rows written.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection().exec_driver_sql("LOCK TABLE attendance_daily IN SHARE ROW EXCLUSIVE MODE")
+    db.execute(delete(_daily).where(_daily.c.work_day.between(first, last)))
+    written = 0
+    rows = rows_from_events(db, first, last)
+    while True:
+        chunk = list(itertools.islice(rows, batch_size))
+        if not chunk:
+            break
+        db.execute(insert(_daily), chunk)
+        written += len(chunk)
+    db.commit()
+    _rollup_changed(first, last)
+    logger.info(
+        "Attendance rollup rebuilt",
+        extra={"event": "attendance.rebuild", "first": first.isoformat(), "last": last.isoformat(), "rows": written}
+    )
+    return written
@@ -1,28 +1,174 @@
 # app/auth_utils.py - UPDATED WITH DEBUGGING
+import hashlib
+import logging
+import math
 import os
-from datetime import datetime, timedelta
-from typing import Optional
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from dotenv import load_dotenv
 
+from app.cache import TTLCache
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Security - Use environment variables
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
 if not SECRET_KEY or SECRET_KEY == "your-secret-key-change-this-in-production":
-    print("⚠️ WARNING: Using default SECRET_KEY. Change this in production!")
+    logger.warning("Using default SECRET_KEY. Change this in production!", extra={"event": "auth.default_secret"})
     SECRET_KEY = "your-super-secret-key-change-this-in-production-1234567890"
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours for development
 REFRESH_TOKEN_EXPIRE_DAYS = 30
+# Scoped tokens for machines (badge gateways); revoke one with /auth/logout
+SERVICE_TOKEN_EXPIRE_DAYS = int(os.getenv("SERVICE_TOKEN_EXPIRE_DAYS", "365"))
+
+# Verified payloads keyed by SHA-256 of the token. The frontend reuses one
+# access token for hours, so polling requests skip the HMAC check; entries
+# expire with the token's own ``exp``.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "20000"))
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=None, name="token")
 
-print(f"🔑 Using SECRET_KEY: {SECRET_KEY[:10]}...")
-print(f"🔑 Using ALGORITHM: {ALGORITHM}")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt work factor. BCRYPT_ROUNDS pins it; otherwise the first API process
+# to start calibrates it (one verification ~BCRYPT_TARGET_MS on that host) and
+# stores it in system_settings, and every later process uses the stored cost.
+# Delete the setting to recalibrate.
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+BCRYPT_ROUNDS_SETTING = "bcrypt_rounds"
+# Not one of the settings pages' categories, so resets leave it alone
+BCRYPT_ROUNDS_CATEGORY = "internal"
+
+_bcrypt_rounds: Optional[int] = None
+
+def measure_bcrypt_ms(rounds: int, samples: int = 3) -> float:
+    """Median time in milliseconds to verify a password hashed with ``rounds``."""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def calibrate_bcrypt_rounds(target_ms: float = BCRYPT_TARGET_MS, samples: int = 3) -> Tuple[int, float]:
+    """Pick the bcrypt cost whose verification time is closest to ``target_ms``.
+
+    Each extra round doubles the work, so one measurement at the minimum cost
+    is enough to extrapolate; the chosen cost is then measured for real.
+    """
+    base_ms = measure_bcrypt_ms(BCRYPT_MIN_ROUNDS, samples)
+    extra = round(math.log2(max(target_ms, 1.0) / max(base_ms, 0.001)))
+    rounds = min(BCRYPT_MAX_ROUNDS, max(BCRYPT_MIN_ROUNDS, BCRYPT_MIN_ROUNDS + extra))
+    return rounds, measure_bcrypt_ms(rounds, samples)
+
+def configure_password_hashing(rounds: int) -> None:
+    """Hash new passwords with ``rounds`` and flag hashes at any other cost for rehash.
+
+    Both cheaper and dearer hashes are rewritten on the next login, so every
+    login costs about the same; all processes share one cost (see
+    ``init_password_hashing``), so they agree on which hashes are stale.
+    """
+    global _bcrypt_rounds
+    pwd_context.update(
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+    _bcrypt_rounds = rounds
+
+def _stored_bcrypt_rounds() -> Optional[int]:
+    """Cost stored in system_settings, or None before the first process has stored one."""
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        setting = db.query(models.SystemSettings).filter(
+            models.SystemSettings.key == BCRYPT_ROUNDS_SETTING
+        ).first()
+        return int(setting.value) if setting is not None else None
+    finally:
+        db.close()
+
+def _store_bcrypt_rounds(calibrated: int) -> int:
+    """Store ``calibrated`` as the shared cost; if another process got there first, use its cost."""
+    from sqlalchemy.exc import IntegrityError
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.add(models.SystemSettings(
+            key=BCRYPT_ROUNDS_SETTING,
+            value=calibrated,
+            category=BCRYPT_ROUNDS_CATEGORY,
+            description="bcrypt cost calibrated on first startup; shared by all API processes"
+        ))
+        try:
+            db.commit()
+            return calibrated
+        except IntegrityError:
+            db.rollback()
+    finally:
+        db.close()
+    return _stored_bcrypt_rounds()
+
+def init_password_hashing() -> int:
+    """Configure the bcrypt cost once per process (called on API startup).
+
+    Calibration (a few deliberately slow hashes) only runs when no cost is
+    stored yet, or when the database can't be read.
+    """
+    if BCRYPT_ROUNDS:
+        rounds = int(BCRYPT_ROUNDS)
+        logger.info("bcrypt cost pinned by BCRYPT_ROUNDS", extra={"event": "auth.bcrypt_cost", "rounds": rounds})
+        configure_password_hashing(rounds)
+        return rounds
+
+    shared = True
+    try:
+        rounds = _stored_bcrypt_rounds()
+    except Exception as e:
+        # Don't keep the API down; this process uses its own measurement
+        logger.warning("Could not read the shared bcrypt cost: %s", e, extra={"event": "auth.bcrypt_cost_error"})
+        rounds, shared = None, False
+
+    if rounds is not None:
+        logger.info("bcrypt cost from system_settings", extra={"event": "auth.bcrypt_cost", "rounds": rounds})
+    else:
+        calibrated, measured_ms = calibrate_bcrypt_rounds()
+        rounds = calibrated
+        if shared:
+            try:
+                rounds = _store_bcrypt_rounds(calibrated)
+            except Exception as e:
+                logger.warning("Could not store the shared bcrypt cost: %s", e, extra={"event": "auth.bcrypt_cost_error"})
+        logger.info(
+            "bcrypt cost calibrated",
+            extra={"event": "auth.bcrypt_cost", "rounds": rounds, "calibrated_rounds": calibrated,
+                   "verify_ms": round(measured_ms, 1), "target_ms": BCRYPT_TARGET_MS}
+        )
+    configure_password_hashing(rounds)
+    return rounds
+
+def current_bcrypt_rounds() -> Optional[int]:
+    """Cost set by configure_password_hashing(), or None for passlib's default."""
+    return _bcrypt_rounds
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -30,9 +176,17 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
         return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
-        print(f"Password verification error: {e}")
+        logger.warning("Password verification error: %s", e, extra={"event": "auth.password_error"})
         return False
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify and, when the stored hash uses another cost, return a fresh hash."""
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except Exception as e:
+        logger.warning("Password verification error: %s", e, extra={"event": "auth.password_error"})
+        return False, None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -43,13 +197,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({
         "exp": expire,
         "type": "access",
+        "jti": uuid.uuid4().hex,
         "iat": datetime.utcnow(),
         "iss": "factoryshift-api"
     })
     
-    print(f"📝 Creating access token with data: {to_encode}")
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    print(f"✅ Token created (first 50 chars): {encoded_jwt[:50]}...")
+    logger.debug(
+        "Access token created",
+        extra={"event": "auth.token_created", "token_type": "access", "user_id": to_encode.get("user_id")}
+    )
     return encoded_jwt
 
 def create_refresh_token(data: dict) -> str:
@@ -59,20 +216,78 @@ def create_refresh_token(data: dict) -> str:
     to_encode.update({
         "exp": expire,
         "type": "refresh",
+        "jti": uuid.uuid4().hex,
         "iat": datetime.utcnow(),
         "iss": "factoryshift-api"
     })
     
-    print(f"📝 Creating refresh token with data: {to_encode}")
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    logger.debug(
+        "Refresh token created",
+        extra={"event": "auth.token_created", "token_type": "refresh", "user_id": to_encode.get("user_id")}
+    )
+    return encoded_jwt
+
+def create_service_token(subject: str, scopes: List[str], issued_by: int,
+                         expires_delta: Optional[timedelta] = None) -> str:
+    """Token for a device or service, good only where one of ``scopes`` is required.
+
+    Its type is "service", so every endpoint that wants a user's access
+    token rejects it.
+    """
+    now = datetime.utcnow()
+    to_encode = {
+        "sub": subject,
+        "scopes": list(scopes),
+        "issued_by": issued_by,
+        "exp": now + (expires_delta or timedelta(days=SERVICE_TOKEN_EXPIRE_DAYS)),
+        "type": "service",
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "iss": "factoryshift-api"
+    }
+    
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    logger.info(
+        "Service token created",
+        extra={"event": "auth.token_created", "token_type": "service", "subject": subject,
+               "scopes": list(scopes), "user_id": issued_by}
+    )
     return encoded_jwt
 
+def _remember_token(digest: bytes, payload: dict) -> None:
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)):
+        return
+    ttl = exp - time.time()
+    if ttl > 0:
+        token_cache.set(digest, dict(payload), ttl=ttl)
+
+def forget_token(token: str) -> None:
+    """Drop a token from the verification cache (e.g. once it is revoked)."""
+    token_cache.pop(hashlib.sha256(token.encode()).digest())
+
+def token_id(token: str, payload: dict) -> str:
+    """Identifier used for revocation: the jti claim, or a digest for older tokens."""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+def token_expiry(payload: dict) -> datetime:
+    return datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+
 def verify_token(token: str) -> Optional[dict]:
     if not token:
-        print("❌ No token provided")
+        logger.debug("No token provided", extra={"event": "auth.token_missing"})
         return None
     
-    print(f"🔍 Verifying token (first 50 chars): {token[:50]}...")
+    digest = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(digest)
+    if cached is not None:
+        logger.debug(
+            "Token verified",
+            extra={"event": "auth.token_verified", "token_type": cached.get("type"),
+                   "user_id": cached.get("user_id"), "cached": True}
+        )
+        return dict(cached)
     
     try:
         payload = jwt.decode(
@@ -84,14 +299,18 @@ def verify_token(token: str) -> Optional[dict]:
                 "verify_iss": False  # Temporarily disable issuer verification
             }
         )
-        print(f"✅ Token verified successfully: {payload}")
+        logger.debug(
+            "Token verified",
+            extra={"event": "auth.token_verified", "token_type": payload.get("type"), "user_id": payload.get("user_id")}
+        )
+        _remember_token(digest, payload)
         return payload
     except jwt.ExpiredSignatureError:
-        print("❌ Token has expired")
+        logger.info("Token has expired", extra={"event": "auth.token_expired"})
         return None
     except jwt.JWTError as e:
-        print(f"❌ JWT Error: {e}")
+        logger.info("JWT error: %s", e, extra={"event": "auth.token_invalid"})
         return None
-    except Exception as e:
-        print(f"❌ Unexpected error verifying token: {e}")
+    except Exception:
+        logger.exception("Unexpected error verifying token", extra={"event": "auth.token_error"})
         return None
\ No newline at end of file
@@ -0,0 +1,155 @@
+# app/db_metrics.py - CONNECTION POOL INSTRUMENTATION
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets.
+WAIT_BUCKETS = (0.001, 0.01, 0.1, 1.0, 5.0)
+
+class PoolMetrics:
+    """Counters for one engine's pool, fed by pool events and InstrumentedQueuePool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[index] += 1
+                    break
+            else:
+                self.wait_buckets[-1] += 1
+
+    def on_checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def stats(self, pool: Any = None) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"le_{int(bound * 1000)}ms" for bound in WAIT_BUCKETS] + ["gt_5000ms"]
+            result = {
+                "name": self.name,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "peak_checked_out": self.peak_checked_out,
+                "wait": {
+                    "count": self.wait_count,
+                    "avg_ms": round(self.wait_total / self.wait_count * 1000, 3) if self.wait_count else 0.0,
+                    "max_ms": round(self.wait_max * 1000, 3),
+                    "buckets": dict(zip(labels, self.wait_buckets)),
+                },
+            }
+        if isinstance(pool, QueuePool):
+            result.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+            })
+        return result
+
+class _TimedCheckout:
+    """Pool mixin that records how long each checkout waited for a connection.
+
+    No pool event fires before a checkout starts waiting, so the wait is
+    timed here around ``_do_get``.
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the same counters
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+# SQLAlchemy names pool loggers after the pool class, which puts these two
+# under the "app" tree; keep them at SQLAlchemy's usual WARNING.
+for _pool_class in (InstrumentedQueuePool, InstrumentedAsyncQueuePool):
+    logging.getLogger(f"{__name__}.{_pool_class.__name__}").setLevel(logging.WARNING)
+
+_engines: Dict[str, Engine] = {}
+_metrics: Dict[str, PoolMetrics] = {}
+
+def instrument_engine(engine: Engine, name: str) -> PoolMetrics:
+    """Attach pool event listeners to ``engine`` and register it under ``name``.
+
+    For an AsyncEngine pass ``async_engine.sync_engine``.
+    """
+    metrics = PoolMetrics(name)
+    if isinstance(engine.pool, _TimedCheckout):
+        engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.on_checkout()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        metrics.on_checkin()
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+    _engines[name] = engine
+    _metrics[name] = metrics
+    return metrics
+
+def pool_stats() -> Dict[str, Any]:
+    return {name: _metrics[name].stats(engine.pool) for name, engine in _engines.items()}
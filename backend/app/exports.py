@@ -0,0 +1,119 @@
+# app/exports.py - STREAMING CSV / NDJSON EXPORTS
+"""Stream query results to the client as CSV or NDJSON.
+
+Rows come from a server-side cursor (``yield_per``) in a session owned by
+the response body, so the first bytes go out as soon as the first batch is
+fetched and memory stays flat however many rows there are. The session is
+opened when streaming starts and closed when it ends or the client goes away.
+"""
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+# Rows per server-side cursor fetch, and rows per chunk written to the socket
+EXPORT_BATCH_SIZE = 1000
+
+def check_format(format: str) -> None:
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid format: {format} (expected {' or '.join(EXPORT_FORMATS)})"
+        )
+
+def _value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _csv_cell(value: Any) -> Any:
+    value = _value(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return "" if value is None else value
+
+def csv_chunks(columns: Sequence[str], rows: Iterable[Sequence[Any]], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+def ndjson_chunks(columns: Sequence[str], rows: Iterable[Sequence[Any]], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({column: _value(value) for column, value in zip(columns, row)}, default=str))
+        if len(lines) >= batch_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def flatten(document: Any, prefix: str = "") -> Iterator[tuple]:
+    """(dotted.path, value) pairs for a nested JSON document (small reports)."""
+    if isinstance(document, dict):
+        for key, value in document.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(document, list):
+        for index, value in enumerate(document):
+            yield from flatten(value, f"{prefix}[{index}]")
+    else:
+        yield prefix, document
+
+def export_chunks(format: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+    return csv_chunks(columns, rows) if format == "csv" else ndjson_chunks(columns, rows)
+
+def _response(format: str, filename: str, body: Iterator[str], headers: Optional[dict]) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"', **(headers or {})}
+    )
+
+def streaming_export(
+    format: str,
+    filename: str,
+    columns: Sequence[str],
+    rows: Callable[[Session], Iterable[Sequence[Any]]],
+    session_factory: Callable[[], Session],
+    headers: Optional[dict] = None
+) -> StreamingResponse:
+    """Response whose body runs ``rows(session)`` in its own session while streaming."""
+    check_format(format)
+
+    def body() -> Iterator[str]:
+        db = session_factory()
+        try:
+            yield from export_chunks(format, columns, rows(db))
+        finally:
+            db.close()
+
+    return _response(format, filename, body(), headers)
+
+def streaming_document(format: str, filename: str, document: Any, headers: Optional[dict] = None) -> StreamingResponse:
+    """A JSON document already in memory (a finished report) as field/value rows; no session."""
+    check_format(format)
+    return _response(format, filename, export_chunks(format, ("field", "value"), flatten(document)), headers)
@@ -0,0 +1,169 @@
+# app/logging_config.py - STRUCTURED, NON-BLOCKING LOGGING
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, TextIO
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Level for the "app" logger tree, plus per-logger overrides such as
+# LOG_LEVELS="app.api.v1.auth=DEBUG,app.auth_utils=WARNING".
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# "json" for one JSON object per line, "text" for a human readable line.
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Fraction of records kept per high-volume event, e.g. "auth.token_verified=0.01".
+LOG_SAMPLE_RATES = os.getenv(
+    "LOG_SAMPLE_RATES",
+    "auth.token_verified=0.01,auth.token_created=0.01,auth.authenticated=0.01"
+)
+# Records buffered for the writer thread; beyond this they are dropped, never waited on.
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Attributes every LogRecord has; anything else came in through ``extra=``.
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+def _parse_pairs(value: str) -> Dict[str, str]:
+    pairs = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, _, val = item.partition("=")
+            pairs[key.strip()] = val.strip()
+    return pairs
+
+def _record_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_record_fields(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = _record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records for events listed in ``rates``.
+
+    Records without an ``event`` extra, or with an event that has no rate,
+    always pass. Warnings and errors are never sampled away.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None))
+        if rate is None or rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking.
+
+    Formatting happens on the listener thread; only ``getMessage()`` and any
+    traceback text are resolved here so the record can cross threads safely.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _LoggingState:
+    handler: Optional[NonBlockingQueueHandler] = None
+    listener: Optional[QueueListener] = None
+    sampler: Optional[SamplingFilter] = None
+
+_state = _LoggingState()
+
+def configure_logging(stream: Optional[TextIO] = None, level: Optional[str] = None,
+                      levels: Optional[str] = None, sample_rates: Optional[str] = None) -> None:
+    """Route the ``app`` logger tree through a queue drained by a writer thread.
+
+    Safe to call more than once; later calls replace the previous setup
+    (the benchmark scripts use that to compare configurations).
+    """
+    stop_logging()
+
+    log_queue: "queue.Queue" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+
+    rates = {event: float(rate) for event, rate in _parse_pairs(
+        LOG_SAMPLE_RATES if sample_rates is None else sample_rates
+    ).items()}
+    sampler = SamplingFilter(rates)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(sampler)
+
+    app_logger = logging.getLogger("app")
+    app_logger.handlers = [handler]
+    app_logger.propagate = False
+    app_logger.setLevel((level or LOG_LEVEL).upper())
+    for name, name_level in _parse_pairs(LOG_LEVELS if levels is None else levels).items():
+        logging.getLogger(name).setLevel(name_level.upper())
+
+    listener = QueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+
+    _state.handler, _state.listener, _state.sampler = handler, listener, sampler
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    if _state.listener is not None:
+        _state.listener.stop()
+        _state.listener = None
+
+def stats() -> Dict[str, Any]:
+    handler, sampler = _state.handler, _state.sampler
+    return {
+        "queued": handler.queue.qsize() if handler else 0,
+        "dropped": handler.dropped if handler else 0,
+        "sampled_out": sampler.sampled_out if sampler else 0,
+        "level": logging.getLevelName(logging.getLogger("app").level),
+    }
+
+atexit.register(stop_logging)
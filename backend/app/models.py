@@ -1,5 +1,5 @@
 # app/models.py - COMPLETE VERSION WITH NOTIFICATION MODEL
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Float, Enum, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, Date, ForeignKey, Index, Integer, String, DateTime, Float, Enum, Text, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -28,6 +28,7 @@ class User(Base):
     shift_id = Column(Integer, ForeignKey("shifts.id"), nullable=True)  # NEW FIELD
     avatar_url = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)  # bumped on role/scope changes
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -42,6 +43,16 @@ class User(Base):
     # Notifications relationship
     notifications = relationship("Notification", back_populates="user", foreign_keys="Notification.user_id", cascade="all, delete-orphan")
     
+    # Case-insensitive login lookup (see migrations/add_login_lookup_indexes.py)
+    # and the scope filters used by the dashboards (alembic 0001)
+    __table_args__ = (
+        Index("ix_users_username_lower", func.lower(username)),
+        Index("ix_users_email_lower", func.lower(email)),
+        Index("ix_users_division_id_is_active", division_id, is_active),
+        Index("ix_users_department_id", department_id),
+        Index("ix_users_role_is_active", role, is_active),
+    )
+    
     def __repr__(self):
         return f"<User {self.email}>"
 
@@ -111,6 +122,11 @@ class Notification(Base):
     user = relationship("User", foreign_keys=[user_id], back_populates="notifications")
     sender = relationship("User", foreign_keys=[created_by])
     
+    # A user's inbox, optionally filtered by read, newest first (alembic 0001)
+    __table_args__ = (
+        Index("ix_notifications_user_id_read_created_at", user_id, read, created_at.desc()),
+    )
+    
     def __repr__(self):
         return f"<Notification {self.title} for user {self.user_id}>"
 
@@ -143,5 +159,126 @@ class AuditLog(Base):
     
     user = relationship("User")
     
+    # Per-user activity and "recent logins" feeds, newest first (alembic 0001);
+    # the admin feed pages on (created_at, id) (alembic 0003)
+    __table_args__ = (
+        Index("ix_audit_logs_user_id_created_at", user_id, created_at.desc()),
+        Index("ix_audit_logs_action_resource_created_at", action, resource, created_at.desc()),
+        Index("ix_audit_logs_created_at_id", created_at.desc(), id.desc()),
+    )
+    
+    def __repr__(self):
+        return f"<AuditLog {self.action} {self.resource}>"
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String, unique=True, index=True, nullable=False)  # token id (jti claim or token digest)
+    user_id = Column(Integer, nullable=True, index=True)  # no FK: entries outlive deleted users until expiry
+    token_type = Column(String, nullable=False)  # access, refresh
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    
+    def __repr__(self):
+        return f"<RevokedToken {self.token_type} {self.jti}>"
+
+class OrgHeadcount(Base):
+    """User counts per (division, department), kept in step by app/org_rollup.py."""
+    __tablename__ = "org_headcounts"
+    
+    # 0 stands for "none" so the pair can be the primary key
+    division_id = Column(Integer, primary_key=True, autoincrement=False)  # no FK: rows outlive deleted divisions until reconciled
+    department_id = Column(Integer, primary_key=True, autoincrement=False)
+    total = Column(Integer, nullable=False, default=0, server_default="0")
+    active = Column(Integer, nullable=False, default=0, server_default="0")
+    managers = Column(Integer, nullable=False, default=0, server_default="0")  # division and department managers
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_org_headcounts_department_id", "department_id"),
+    )
+    
+    def __repr__(self):
+        return f"<OrgHeadcount {self.division_id}/{self.department_id} {self.total}>"
+
+class ReportJob(Base):
+    """Report queued by POST /dashboard/report-jobs and built by report_worker.py."""
+    __tablename__ = "report_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    report_type = Column(String, nullable=False)
+    requested_by = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    start_date = Column(DateTime, nullable=False)
+    end_date = Column(DateTime, nullable=False)
+    status = Column(String, nullable=False, default="queued", server_default="queued")  # queued, running, done, failed
+    progress = Column(Integer, nullable=False, default=0, server_default="0")  # percent
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    worker = Column(String, nullable=True)  # host:pid of the worker that claimed it
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # running jobs touch this; stale ones are requeued
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Workers claim the oldest queued job and look for stale running ones
+    __table_args__ = (
+        Index("ix_report_jobs_status_created_at", status, created_at),
+    )
+    
+    def __repr__(self):
+        return f"<ReportJob {self.id} {self.report_type} {self.status}>"
+
+class AttendanceEvent(Base):
+    """A clock-in or clock-out, written in bulk by POST /attendance/events/bulk (app/attendance.py).
+    
+    On Postgres the table is partitioned by month of occurred_at (alembic
+    0006), with primary key (id, occurred_at); read attendance_daily instead.
+    """
+    __tablename__ = "attendance_events"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    event_type = Column(String, nullable=False)  # clock_in, clock_out
+    occurred_at = Column(DateTime(timezone=True), nullable=False)  # UTC
+    device_id = Column(String, nullable=True)  # badge reader / terminal
+    source = Column(String, nullable=False, default="badge", server_default="badge")  # badge, web, manual
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Period scans and a user's own history
+    __table_args__ = (
+        Index("ix_attendance_events_occurred_at", occurred_at),
+        Index("ix_attendance_events_user_id_occurred_at", user_id, occurred_at),
+    )
+    
+    def __repr__(self):
+        return f"<AttendanceEvent {self.user_id} {self.event_type} {self.occurred_at}>"
+
+class AttendanceDaily(Base):
+    """One user's attendance on one work day, kept in step with attendance_events by app/attendance.py."""
+    __tablename__ = "attendance_daily"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    work_day = Column(Date, primary_key=True)  # date the shift started, factory time
+    division_id = Column(Integer, nullable=True)  # where the user worked that day
+    department_id = Column(Integer, nullable=True)
+    first_in = Column(DateTime(timezone=True), nullable=True)  # earliest clock-in
+    last_out = Column(DateTime(timezone=True), nullable=True)  # latest clock-out
+    scheduled_start = Column(DateTime(timezone=True), nullable=False)
+    shift_minutes = Column(Integer, nullable=False)
+    worked_minutes = Column(Integer, nullable=False, default=0, server_default="0")
+    late_minutes = Column(Integer, nullable=False, default=0, server_default="0")
+    overtime_minutes = Column(Integer, nullable=False, default=0, server_default="0")
+    status = Column(String, nullable=False)  # present, late, incomplete
+    events = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Dashboards and reports read a day or period per division or department
+    __table_args__ = (
+        Index("ix_attendance_daily_work_day_division_id", work_day, division_id),
+        Index("ix_attendance_daily_work_day_department_id", work_day, department_id),
+    )
+    
     def __repr__(self):
-        return f"<AuditLog {self.action} {self.resource}>"
\ No newline at end of file
+        return f"<AttendanceDaily {self.user_id} {self.work_day} {self.status}>"
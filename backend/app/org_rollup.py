@@ -0,0 +1,226 @@
+# app/org_rollup.py - INCREMENTALLY MAINTAINED DIVISION/DEPARTMENT HEADCOUNTS
+"""Headcounts per (division, department) in ``org_headcounts``.
+
+Every ORM flush that adds, deletes or changes the division, department,
+role or active flag of a ``User`` applies the matching +/- deltas to the
+rollup in the same transaction, so create, update, delete and manager
+reassignment paths keep it in step without calling anything. Writes that
+bypass the ORM unit of work (bulk ``insert()``/``update()``, raw SQL,
+restores) are not seen; ``reconcile()`` (``python reconcile_headcounts.py``)
+recomputes the table from ``users`` and repairs any drift.
+
+The listener is registered on import; the API imports this module through
+the routers that read the rollup.
+"""
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, event, func, insert, select, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+MANAGER_ROLES = (models.Role.DIVISION_MANAGER, models.Role.DEPARTMENT_MANAGER)
+# User attributes the rollup depends on
+_TRACKED = ("division_id", "department_id", "is_active", "role")
+_COUNTS = ("total", "active", "managers")
+
+Headcounts = models.OrgHeadcount
+_table = Headcounts.__table__
+_stats = {"flushes": 0, "rows_changed": 0, "reconciles": 0, "drifted_rows": 0}
+
+def rollup_key(division_id: Optional[int], department_id: Optional[int]) -> Tuple[int, int]:
+    """Rollup primary key; users without a division or department count under 0."""
+    return (division_id or 0, department_id or 0)
+
+def _contribution(division_id, department_id, is_active, role) -> Tuple[Tuple[int, int], Tuple[int, int, int]]:
+    return rollup_key(division_id, department_id), (1, 1 if is_active else 0, 1 if role in MANAGER_ROLES else 0)
+
+def _tracked_changed(user: models.User) -> bool:
+    attrs = sa_inspect(user).attrs
+    return any(attrs[name].history.has_changes() for name in _TRACKED)
+
+def _committed_rows(session: Session, user_ids: List[int]) -> Dict[int, Any]:
+    """Users' rows as stored so far in this transaction (before this flush)."""
+    if not user_ids:
+        return {}
+    rows = session.connection().execute(
+        select(models.User.id, *(getattr(models.User, name) for name in _TRACKED)).where(
+            models.User.id.in_(user_ids)
+        )
+    )
+    return {row.id: row for row in rows}
+
+def _apply(session: Session, deltas: Dict[Tuple[int, int], List[int]]) -> None:
+    rows = [
+        {"division_id": key[0], "department_id": key[1], **dict(zip(_COUNTS, values))}
+        for key, values in sorted(deltas.items())  # fixed order: concurrent writers can't deadlock
+        if any(values)
+    ]
+    if not rows:
+        return
+
+    connection = session.connection()
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(_table).values(rows)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=["division_id", "department_id"],
+            set_={
+                **{name: _table.c[name] + statement.excluded[name] for name in _COUNTS},
+                "updated_at": func.now(),
+            }
+        ))
+    else:
+        for row in rows:
+            result = connection.execute(
+                update(_table).where(
+                    _table.c.division_id == row["division_id"],
+                    _table.c.department_id == row["department_id"]
+                ).values({name: _table.c[name] + row[name] for name in _COUNTS})
+            )
+            if result.rowcount == 0:
+                connection.execute(insert(_table).values(row))
+    _stats["rows_changed"] += len(rows)
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session: Session, flush_context, instances) -> None:
+    new = [obj for obj in session.new if isinstance(obj, models.User)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, models.User)]
+    changed = [obj for obj in session.dirty if isinstance(obj, models.User) and _tracked_changed(obj)]
+    if not (new or deleted or changed):
+        return
+
+    deltas: Dict[Tuple[int, int], List[int]] = {}
+
+    def add(contribution, sign: int) -> None:
+        key, values = contribution
+        totals = deltas.setdefault(key, [0, 0, 0])
+        for index, value in enumerate(values):
+            totals[index] += sign * value
+
+    previous = _committed_rows(session, [obj.id for obj in deleted + changed if obj.id is not None])
+    for obj in new:
+        # Column defaults (is_active=True, role=EMPLOYEE) aren't applied until the INSERT
+        is_active = True if obj.is_active is None else obj.is_active
+        add(_contribution(obj.division_id, obj.department_id, is_active, obj.role), +1)
+    for obj in deleted + changed:
+        row = previous.get(obj.id)
+        if row is not None:
+            add(_contribution(row.division_id, row.department_id, row.is_active, row.role), -1)
+    for obj in changed:
+        if obj.id in previous:
+            add(_contribution(obj.division_id, obj.department_id, obj.is_active, obj.role), +1)
+
+    _apply(session, deltas)
+    _stats["flushes"] += 1
+
+# --- Reads -----------------------------------------------------------------
+
+def headcount_query(*criteria):
+    """SELECT total, active, managers summed over the rollup rows matching ``criteria``."""
+    return select(*(func.coalesce(func.sum(_table.c[name]), 0).label(name) for name in _COUNTS)).where(*criteria)
+
+def in_division(division_id: Optional[int]):
+    return Headcounts.division_id == (division_id or 0)
+
+def in_department(department_id: Optional[int]):
+    return Headcounts.department_id == (department_id or 0)
+
+def division_headcount(db: Session, division_id: Optional[int]) -> Dict[str, int]:
+    return dict(db.execute(headcount_query(in_division(division_id))).one()._mapping)
+
+def department_headcounts(db: Session, department_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """``{department_id: {"total", "active", "managers"}}``; missing departments have none."""
+    department_ids = list(department_ids)
+    if not department_ids:
+        return {}
+    rows = db.execute(
+        select(Headcounts.department_id, *(func.sum(_table.c[name]).label(name) for name in _COUNTS)).where(
+            Headcounts.department_id.in_(department_ids)
+        ).group_by(Headcounts.department_id)
+    )
+    counts = {row.department_id: {name: row._mapping[name] for name in _COUNTS} for row in rows}
+    return {department_id: counts.get(department_id, dict.fromkeys(_COUNTS, 0)) for department_id in department_ids}
+
+# --- Reconciliation ----------------------------------------------------------
+
+def _actual_counts(db: Session) -> Dict[Tuple[int, int], Tuple[int, int, int]]:
+    rows = db.execute(
+        select(
+            models.User.division_id,
+            models.User.department_id,
+            func.count(),
+            func.sum(case((models.User.is_active == True, 1), else_=0)),
+            func.sum(case((models.User.role.in_(MANAGER_ROLES), 1), else_=0))
+        ).group_by(models.User.division_id, models.User.department_id)
+    )
+    actual: Dict[Tuple[int, int], List[int]] = {}
+    for division_id, department_id, total, active, managers in rows:
+        # NULL and 0 share a key
+        totals = actual.setdefault(rollup_key(division_id, department_id), [0, 0, 0])
+        for index, value in enumerate((total, active, managers)):
+            totals[index] += int(value or 0)
+    return {key: tuple(values) for key, values in actual.items()}
+
+def reconcile(db: Session, dry_run: bool = False) -> List[Dict[str, Any]]:
+    """Recompute the rollup from ``users``; returns the rows that had drifted.
+
+    On Postgres the rollup is locked against writers for the duration, so no
+    delta applied concurrently is lost or counted twice. Commits unless
+    ``dry_run``.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection().exec_driver_sql("LOCK TABLE org_headcounts IN SHARE ROW EXCLUSIVE MODE")
+
+    actual = _actual_counts(db)
+    stored = {
+        (row.division_id, row.department_id): tuple(row._mapping[name] for name in _COUNTS)
+        for row in db.execute(select(_table))
+    }
+    zero = (0, 0, 0)
+    drift = [
+        {
+            "division_id": key[0],
+            "department_id": key[1],
+            "stored": dict(zip(_COUNTS, stored.get(key, zero))),
+            "actual": dict(zip(_COUNTS, actual.get(key, zero))),
+        }
+        for key in sorted(set(actual) | set(stored))
+        if actual.get(key, zero) != stored.get(key, zero) or (key in stored and key not in actual)
+    ]
+
+    if dry_run:
+        db.rollback()
+        return drift
+
+    for entry in drift:
+        key = (entry["division_id"], entry["department_id"])
+        if key not in actual:
+            db.execute(delete(_table).where(_table.c.division_id == key[0], _table.c.department_id == key[1]))
+        elif key in stored:
+            db.execute(
+                update(_table).where(
+                    _table.c.division_id == key[0], _table.c.department_id == key[1]
+                ).values(**entry["actual"], updated_at=func.now())
+            )
+        else:
+            db.execute(insert(_table).values(division_id=key[0], department_id=key[1], **entry["actual"]))
+    db.commit()
+
+    _stats["reconciles"] += 1
+    _stats["drifted_rows"] += len(drift)
+    if drift:
+        logger.warning(
+            "Org headcount rollup drift repaired",
+            extra={"event": "org_rollup.drift", "rows": len(drift)}
+        )
+    return drift
+
+def stats() -> Dict[str, Any]:
+    return dict(_stats)
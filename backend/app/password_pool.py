@@ -0,0 +1,132 @@
+# app/password_pool.py - BCRYPT WORK ON A DEDICATED PROCESS POOL
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from anyio import from_thread
+from starlette.concurrency import run_in_threadpool
+
+# Number of worker processes doing bcrypt. 0 keeps hashing in-process on the
+# request threadpool (the old behaviour), which is handy for comparisons.
+BCRYPT_POOL_SIZE = int(os.getenv("BCRYPT_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+# Hash/verify jobs allowed to run at once; the rest wait on a semaphore.
+BCRYPT_MAX_CONCURRENCY = int(os.getenv("BCRYPT_MAX_CONCURRENCY", str(max(BCRYPT_POOL_SIZE, 1) * 2)))
+# Jobs allowed to wait for a slot before new ones are rejected outright.
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "256"))
+
+class PasswordPoolBusy(Exception):
+    """Raised when the bcrypt queue is full; callers should answer 503."""
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_semaphore: Optional[asyncio.Semaphore] = None
+_waiting = 0
+_running = 0
+_stats = {"completed": 0, "rejected": 0}
+
+def _init_worker(bcrypt_rounds: Optional[int]) -> None:
+    # Workers must hash with the cost the parent calibrated, not recalibrate.
+    if bcrypt_rounds is not None:
+        from app.auth_utils import configure_password_hashing
+        configure_password_hashing(bcrypt_rounds)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    from app.auth_utils import verify_password
+    return verify_password(plain_password, hashed_password)
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    from app.auth_utils import verify_and_update_password
+    return verify_and_update_password(plain_password, hashed_password)
+
+def _hash(password: str) -> str:
+    from app.auth_utils import get_password_hash
+    return get_password_hash(password)
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: forking a process that already runs uvicorn's threads is unsafe
+                from app.auth_utils import current_bcrypt_rounds
+                _executor = ProcessPoolExecutor(
+                    max_workers=BCRYPT_POOL_SIZE,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(current_bcrypt_rounds(),)
+                )
+    return _executor
+
+async def _submit(fn: Callable[..., Any], *args: Any) -> Any:
+    global _semaphore, _waiting, _running
+    if _waiting >= BCRYPT_MAX_PENDING:
+        _stats["rejected"] += 1
+        raise PasswordPoolBusy()
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(BCRYPT_MAX_CONCURRENCY)
+
+    _waiting += 1
+    try:
+        await _semaphore.acquire()
+    finally:
+        _waiting -= 1
+
+    _running += 1
+    try:
+        if BCRYPT_POOL_SIZE <= 0:
+            return await run_in_threadpool(fn, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _running -= 1
+        _stats["completed"] += 1
+        _semaphore.release()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _submit(_verify, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (ok, new_hash); new_hash is set when the stored cost is outdated."""
+    return await _submit(_verify_and_update, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await _submit(_hash, password)
+
+def hash_password(password: str) -> str:
+    """Blocking variant for sync routes (must run on the request threadpool).
+
+    The job is queued through the event loop, so it shares the async
+    variants' concurrency limit and raises PasswordPoolBusy the same way.
+    """
+    return from_thread.run(hash_password_async, password)
+
+def start() -> None:
+    """Spawn the workers up front so the first logins don't pay for it.
+
+    Call after auth_utils.init_password_hashing() so workers inherit its cost.
+    """
+    if BCRYPT_POOL_SIZE > 0:
+        executor = _get_executor()
+        for future in [executor.submit(os.getpid) for _ in range(BCRYPT_POOL_SIZE)]:
+            future.result()
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+def stats() -> Dict[str, Any]:
+    return {
+        "pool_size": BCRYPT_POOL_SIZE,
+        "max_concurrency": BCRYPT_MAX_CONCURRENCY,
+        "max_pending": BCRYPT_MAX_PENDING,
+        "running": _running,
+        "waiting": _waiting,
+        "completed": _stats["completed"],
+        "rejected": _stats["rejected"],
+    }
@@ -0,0 +1,182 @@
+# app/query_stats.py - PER-REQUEST SQL COUNTS AND N+1 DETECTION
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Warn when one statement shape runs more than this many times in a request.
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+# "IN (?, ?, ?)" / "IN ($1, $2)" / "IN (%(a)s, %(b)s)" all become "IN (?)"
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|\$\d+|%\([^)]+\)s|%s|:\w+)\s*,?)+\)")
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(?)", " ".join(statement.split()))
+
+class QueryLog:
+    """Statements seen while active: count, time and repeated shapes."""
+
+    def __init__(self, scope: Optional[Scope] = None):
+        self.scope = scope
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.duration += duration
+            self.shapes[statement_shape(statement)] += 1
+            self.statements.append(statement)
+
+    def repeated(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> List[tuple]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    @property
+    def route(self) -> Optional[str]:
+        """Route template and endpoint name, once the router has matched."""
+        if not self.scope:
+            return None
+        route = self.scope.get("route")
+        endpoint = self.scope.get("endpoint")
+        path = getattr(route, "path", None) or self.scope.get("path")
+        name = getattr(endpoint, "__qualname__", None)
+        return f"{path} ({endpoint.__module__}.{name})" if name else path
+
+_current: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+# Extra logs fed from every thread (capture_queries / assert_max_queries)
+_captures: List[QueryLog] = []
+_captures_lock = threading.Lock()
+_observers: List[Callable[..., None]] = []
+_stats = {"requests": 0, "statements": 0, "repeat_warnings": 0}
+
+def current_query_log() -> Optional[QueryLog]:
+    return _current.get()
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def add_observer(observer: Callable[..., None]) -> None:
+    """Call ``observer(conn, statement, parameters, context, duration)`` after each statement."""
+    _observers.append(observer)
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    duration = time.perf_counter() - starts.pop() if starts else 0.0
+    log = _current.get()
+    if log is not None:
+        log.record(statement, duration)
+    if _captures:
+        with _captures_lock:
+            for capture in _captures:
+                capture.record(statement, duration)
+    for observer in _observers:
+        observer(conn, statement, parameters, context, duration)
+
+def _on_error(exception_context):
+    connection = exception_context.connection
+    starts = connection.info.get("query_start") if connection is not None else None
+    if starts:
+        starts.pop()
+
+def instrument_queries(engine: Engine) -> None:
+    """Count statements on ``engine`` (``async_engine.sync_engine`` for async ones)."""
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    event.listen(engine, "handle_error", _on_error)
+
+class QueryStatsMiddleware:
+    """Adds Server-Timing and X-DB-Queries headers and warns about N+1 patterns.
+
+    Queries run after the response has started (streaming bodies) are still
+    checked for repeats but are not in the headers.
+    """
+
+    def __init__(self, app: ASGIApp, threshold: int = QUERY_REPEAT_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog(scope)
+        token = _current.set(log)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(log.count).encode()))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={log.duration * 1000:.1f};desc="{log.count} queries"'.encode()
+                ))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _stats["requests"] += 1
+            _stats["statements"] += log.count
+            for shape, count in log.repeated(self.threshold):
+                _stats["repeat_warnings"] += 1
+                logger.warning(
+                    "Repeated query shape",
+                    extra={
+                        "event": "db.n_plus_one",
+                        "route": log.route,
+                        "count": count,
+                        "shape": shape[:300],
+                    }
+                )
+
+@contextmanager
+def capture_queries() -> Iterator[QueryLog]:
+    """Record every statement run on instrumented engines, from any thread."""
+    log = QueryLog()
+    with _captures_lock:
+        _captures.append(log)
+    try:
+        yield log
+    finally:
+        with _captures_lock:
+            _captures.remove(log)
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[QueryLog]:
+    """Fail if the block runs more than ``max_queries`` statements.
+
+    Works around a TestClient call too, since it captures from all threads::
+
+        with assert_max_queries(4):
+            client.get("/api/v1/dashboard/division-overview", headers=auth)
+    """
+    with capture_queries() as log:
+        yield log
+    if log.count > max_queries:
+        listing = "\n".join(f"  {count}x {shape[:200]}" for shape, count in log.shapes.most_common())
+        raise AssertionError(f"Expected at most {max_queries} queries, ran {log.count}:\n{listing}")
+
+def stats() -> Dict[str, Any]:
+    return {
+        "enabled": QUERY_STATS_ENABLED,
+        "repeat_threshold": QUERY_REPEAT_THRESHOLD,
+        **_stats,
+    }
@@ -0,0 +1,217 @@
+# app/rate_limit.py - SLIDING-WINDOW LOGIN LIMITER
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from app import models
+from app.cache import TTLCache
+from app.database import SessionLocal
+
+# Failed attempts are counted over this window (per username and per IP).
+LOGIN_WINDOW_SECONDS = float(os.getenv("LOGIN_WINDOW_SECONDS", "900"))
+# Per-IP limit = max_login_attempts * this. Kiosks and NAT'd shop floors put
+# many users behind one address, so the IP limit only stops spraying.
+LOGIN_IP_LIMIT_MULTIPLIER = int(os.getenv("LOGIN_IP_LIMIT_MULTIPLIER", "20"))
+# Keys tracked per limiter; the least recently used are dropped beyond this.
+LOGIN_LIMITER_MAX_KEYS = int(os.getenv("LOGIN_LIMITER_MAX_KEYS", "100000"))
+# How long security.max_login_attempts is cached after being read from the DB.
+LOGIN_SETTINGS_TTL_SECONDS = float(os.getenv("LOGIN_SETTINGS_TTL_SECONDS", "60"))
+
+class SlidingWindowLimiter:
+    """Sliding-window counter: two fixed-window counts per key, weighted.
+
+    The estimate is ``previous * (1 - elapsed / window) + current``, which
+    approximates a true sliding log with O(1) memory per key. Keys idle for
+    two windows count as zero and are evicted from the LRU end as new keys
+    arrive, so memory stays bounded without a sweeper thread.
+    """
+
+    def __init__(self, window: float, maxsize: int, name: str = "limiter"):
+        self.window = window
+        self.maxsize = maxsize
+        self.name = name
+        # key -> [window_index, current_count, previous_count]
+        self._counts: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.refunded = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def _state(self, key: Hashable, now: float) -> Optional[list]:
+        state = self._counts.get(key)
+        if state is None:
+            return None
+        index = int(now // self.window)
+        if state[0] != index:
+            state[2] = state[1] if state[0] == index - 1 else 0
+            state[1] = 0
+            state[0] = index
+        return state
+
+    def _evict_idle(self, now: float) -> None:
+        stale_before = int(now // self.window) - 1
+        while self._counts:
+            key, state = next(iter(self._counts.items()))
+            if len(self._counts) <= self.maxsize and state[0] >= stale_before:
+                break
+            del self._counts[key]
+            self.evictions += 1
+
+    def _wait(self, state: list, now: float, limit: int) -> Optional[int]:
+        _, current, previous = state
+        elapsed = now - (now // self.window) * self.window
+        weight = 1 - elapsed / self.window
+        if previous * weight + current < limit:
+            return None
+        if current < limit:
+            # Wait for the previous window's share to decay below the limit
+            wait = self.window * (1 - (limit - current) / previous) - elapsed
+        else:
+            # Current window alone is over; wait for it to roll over and decay
+            wait = (self.window - elapsed) + self.window * (1 - limit / current)
+        return max(1, math.ceil(wait))
+
+    def acquire(self, key: Hashable, limit: int) -> Optional[int]:
+        """Count an attempt if ``key`` is under ``limit``, else return the wait.
+
+        Check and count happen under one lock, so concurrent attempts can't
+        all pass the check before any of them is recorded.
+        """
+        now = time.time()
+        with self._lock:
+            state = self._state(key, now)
+            if state is not None:
+                wait = self._wait(state, now, limit)
+                if wait is not None:
+                    self.rejected += 1
+                    return wait
+            self._hit(key, state, now)
+            return None
+
+    def _hit(self, key: Hashable, state: Optional[list], now: float) -> None:
+        if state is None:
+            state = self._counts[key] = [int(now // self.window), 0, 0]
+        state[1] += 1
+        self._counts.move_to_end(key)
+        self.recorded += 1
+        self._evict_idle(now)
+
+    def refund(self, key: Hashable) -> None:
+        """Take back one attempt counted by acquire()."""
+        now = time.time()
+        with self._lock:
+            state = self._state(key, now)
+            if state is None:
+                return
+            if state[1] > 0:
+                state[1] -= 1
+            elif state[2] > 0:
+                # Counted just before the window rolled over
+                state[2] -= 1
+            else:
+                return
+            self.refunded += 1
+
+    def reset(self, key: Hashable) -> None:
+        with self._lock:
+            self._counts.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "keys": len(self._counts),
+            "maxsize": self.maxsize,
+            "window_seconds": self.window,
+            "recorded": self.recorded,
+            "refunded": self.refunded,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+        }
+
+username_limiter = SlidingWindowLimiter(LOGIN_WINDOW_SECONDS, LOGIN_LIMITER_MAX_KEYS, name="login_username")
+ip_limiter = SlidingWindowLimiter(LOGIN_WINDOW_SECONDS, LOGIN_LIMITER_MAX_KEYS, name="login_ip")
+_settings_cache = TTLCache(maxsize=1, ttl=LOGIN_SETTINGS_TTL_SECONDS, name="login_settings")
+
+def max_login_attempts() -> int:
+    """security.max_login_attempts from system_settings, falling back to the default.
+
+    The limiters live in each API process, not in shared storage, so the
+    limit is enforced per worker: with N uvicorn workers (or N hosts) an
+    attacker spreading requests across them gets up to N * max_login_attempts
+    tries per window. Size the setting with the worker count in mind.
+    """
+    cached = _settings_cache.get("max_login_attempts")
+    if cached is not None:
+        return cached
+
+    from app.api.v1.settings import DEFAULT_SETTINGS
+    limit = DEFAULT_SETTINGS["security"]["max_login_attempts"]
+    db = SessionLocal()
+    try:
+        setting = db.query(models.SystemSettings.value).filter(
+            models.SystemSettings.key == "max_login_attempts"
+        ).first()
+        if setting is not None and setting.value is not None:
+            limit = int(setting.value)
+    except (TypeError, ValueError):
+        pass
+    finally:
+        db.close()
+
+    _settings_cache.set("max_login_attempts", limit)
+    return limit
+
+def invalidate_settings() -> None:
+    """Call after security settings change so the next login re-reads them."""
+    _settings_cache.clear()
+
+def _username_key(username: str) -> str:
+    return (username or "").strip().lower()
+
+def begin_login_attempt(username: str, client_ip: Optional[str], max_attempts: int) -> Optional[int]:
+    """Count a login attempt up front; returns seconds to wait if over the limit.
+
+    Every attempt is counted before the password is checked, so parallel
+    guesses can't slip past the limit while bcrypt runs. Call
+    record_login_success() or refund_login_attempt() when the attempt turns
+    out not to be a failure.
+    """
+    if max_attempts <= 0:
+        return None
+    user_key = _username_key(username)
+    retry = username_limiter.acquire(user_key, max_attempts)
+    if retry is None and client_ip:
+        retry = ip_limiter.acquire(client_ip, max_attempts * LOGIN_IP_LIMIT_MULTIPLIER)
+        if retry is not None:
+            username_limiter.refund(user_key)
+    return retry
+
+def refund_login_attempt(username: str, client_ip: Optional[str], max_attempts: int) -> None:
+    """Undo begin_login_attempt() for an attempt that wasn't a wrong password."""
+    if max_attempts <= 0:
+        return
+    username_limiter.refund(_username_key(username))
+    if client_ip:
+        ip_limiter.refund(client_ip)
+
+def record_login_success(username: str, client_ip: Optional[str], max_attempts: int) -> None:
+    # The username's history is cleared; a shared IP only gets this attempt back
+    username_limiter.reset(_username_key(username))
+    if max_attempts > 0 and client_ip:
+        ip_limiter.refund(client_ip)
+
+def stats() -> Dict[str, Any]:
+    return {
+        "max_login_attempts": _settings_cache.get("max_login_attempts"),
+        "ip_limit_multiplier": LOGIN_IP_LIMIT_MULTIPLIER,
+        "username": username_limiter.stats(),
+        "ip": ip_limiter.stats(),
+    }
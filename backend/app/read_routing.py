@@ -0,0 +1,183 @@
+# app/read_routing.py - SEND SAFE READS TO THE REPLICA
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import text
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth_utils import verify_token
+from app.cache import TTLCache
+from app.database import (
+    AsyncReplicaSessionLocal, AsyncSessionLocal, ReplicaSessionLocal, SessionLocal,
+    replica_async_engine, replica_engine
+)
+
+# After a user's own write, their reads go to the primary for this long.
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+# Replica is skipped while its replay lag is above this.
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+# How long a lag measurement is trusted before it is taken again.
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "1"))
+
+# Lag is 0 when the replica has replayed everything it received, otherwise
+# the age of the last replayed transaction. "Replayed everything" only means
+# fresh while WAL is still arriving: a replica that lost its upstream shows
+# the same, so one without a WAL receiver (pg_stat_wal_receiver has a row
+# only while it runs) is never used, whatever its lag. Streaming replicas only.
+_LAG_SQL = text("""
+    SELECT
+        CASE
+            WHEN NOT pg_is_in_recovery() THEN 0
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+        END,
+        NOT pg_is_in_recovery() OR EXISTS (SELECT 1 FROM pg_stat_wal_receiver)
+""")
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# Per worker: a write handled by one worker does not make the user sticky on
+# the others, so keep REPLICA_MAX_LAG_SECONDS below REPLICA_STICKY_SECONDS.
+_sticky_users = TTLCache(maxsize=100000, ttl=REPLICA_STICKY_SECONDS, name="replica_sticky")
+
+class _ReplicaState:
+    lag: Optional[float] = None
+    receiving = True
+    checked_at = 0.0
+    healthy = False
+    checking = False
+    lock = threading.Lock()
+
+_state = _ReplicaState()
+_stats = {"replica": 0, "primary_sticky": 0, "primary_lagging": 0, "lag_check_errors": 0}
+
+def _lag_sql(dialect_name: str):
+    return _LAG_SQL if dialect_name == "postgresql" else text("SELECT 0, 1")
+
+def _record_lag(lag: Optional[float], receiving: bool = True) -> None:
+    _state.lag = lag
+    _state.receiving = receiving
+    _state.healthy = lag is not None and receiving and lag <= REPLICA_MAX_LAG_SECONDS
+    _state.checked_at = time.monotonic()
+    if lag is None:
+        _stats["lag_check_errors"] += 1
+
+def _lag_check_due() -> bool:
+    return time.monotonic() - _state.checked_at >= REPLICA_LAG_CHECK_SECONDS
+
+def _check_lag() -> None:
+    if not _state.lock.acquire(blocking=False):
+        return
+    receiving = True
+    try:
+        with replica_engine.connect() as conn:
+            lag, receiving = conn.execute(_lag_sql(replica_engine.dialect.name)).one()
+        lag = float(lag or 0)
+    except Exception:
+        lag = None
+    finally:
+        _state.lock.release()
+    _record_lag(lag, bool(receiving))
+
+async def _check_lag_async() -> None:
+    if _state.checking:
+        return
+    _state.checking = True
+    receiving = True
+    try:
+        async with replica_async_engine.connect() as conn:
+            lag, receiving = (await conn.execute(_lag_sql(replica_async_engine.dialect.name))).one()
+        lag = float(lag or 0)
+    except Exception:
+        lag = None
+    finally:
+        _state.checking = False
+    _record_lag(lag, bool(receiving))
+
+def _request_user_id(request_headers) -> Optional[int]:
+    authorization = request_headers.get("authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = verify_token(token)
+    return payload.get("user_id") if payload else None
+
+def mark_write(user_id: Optional[int]) -> None:
+    """Route ``user_id``'s reads to the primary for REPLICA_STICKY_SECONDS."""
+    if user_id is not None:
+        _sticky_users.set(user_id, True)
+
+def _use_replica(request: Request) -> bool:
+    user_id = _request_user_id(request.headers)
+    if user_id is not None and _sticky_users.get(user_id):
+        _stats["primary_sticky"] += 1
+        return False
+    if not _state.healthy:
+        _stats["primary_lagging"] += 1
+        return False
+    _stats["replica"] += 1
+    return True
+
+def read_session_factory(request: Request):
+    """Session factory ``get_read_db`` would use for this request.
+
+    For sessions that outlive the route body, e.g. streamed exports.
+    """
+    if ReplicaSessionLocal is not None:
+        if _lag_check_due():
+            _check_lag()
+        if _use_replica(request):
+            return ReplicaSessionLocal
+    return SessionLocal
+
+def get_read_db(request: Request):
+    """Session for read-only routes: the replica unless lagging or the user just wrote."""
+    db = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    """``get_read_db`` for async routes."""
+    factory = AsyncSessionLocal
+    if AsyncReplicaSessionLocal is not None:
+        if _lag_check_due():
+            await _check_lag_async()
+        if _use_replica(request):
+            factory = AsyncReplicaSessionLocal
+    async with factory() as db:
+        yield db
+
+class ReplicaStickinessMiddleware:
+    """Marks the caller sticky to the primary after any successful write request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in _WRITE_METHODS or ReplicaSessionLocal is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+                mark_write(_request_user_id(headers))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+def stats() -> Dict[str, Any]:
+    return {
+        "configured": ReplicaSessionLocal is not None,
+        "healthy": _state.healthy,
+        "lag_seconds": _state.lag,
+        "receiving_wal": _state.receiving,
+        "max_lag_seconds": REPLICA_MAX_LAG_SECONDS,
+        "sticky_seconds": REPLICA_STICKY_SECONDS,
+        "sticky_users": len(_sticky_users),
+        "reads": dict(_stats),
+    }
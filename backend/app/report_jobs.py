@@ -0,0 +1,242 @@
+# app/report_jobs.py - REPORT JOB QUEUE (report_jobs TABLE + SKIP LOCKED WORKERS)
+"""Reports too slow for a request are queued in ``report_jobs`` and built by
+``report_worker.py`` processes.
+
+Workers claim the oldest queued job with ``SELECT ... FOR UPDATE SKIP
+LOCKED``, so any number of them can poll the same table without handing a
+job out twice or waiting on each other's row locks. While a job runs, a
+heartbeat thread touches ``heartbeat_at`` every REPORT_JOB_HEARTBEAT_SECONDS;
+one whose worker died is requeued after REPORT_JOB_STALE_SECONDS, up to
+REPORT_JOB_MAX_ATTEMPTS runs. Every write a worker makes to its job is
+conditional on still owning it (``worker`` and ``status = 'running'``), so a
+worker that was presumed dead can't overwrite the job's new run. Finished
+jobs are deleted after REPORT_JOB_RETENTION_DAYS.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app import models, reports
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls when the queue is empty
+REPORT_WORKER_POLL_SECONDS = float(os.getenv("REPORT_WORKER_POLL_SECONDS", "2"))
+# A running job without a heartbeat for this long is assumed lost
+REPORT_JOB_STALE_SECONDS = float(os.getenv("REPORT_JOB_STALE_SECONDS", "300"))
+REPORT_JOB_MAX_ATTEMPTS = int(os.getenv("REPORT_JOB_MAX_ATTEMPTS", "3"))
+# How often a running job's heartbeat is written (well under the stale limit)
+REPORT_JOB_HEARTBEAT_SECONDS = float(os.getenv("REPORT_JOB_HEARTBEAT_SECONDS", str(REPORT_JOB_STALE_SECONDS / 5)))
+# Done and failed jobs (and their stored results) are deleted after this many days; 0 keeps them
+REPORT_JOB_RETENTION_DAYS = float(os.getenv("REPORT_JOB_RETENTION_DAYS", "30"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def enqueue(db: Session, report_type: str, user_id: int, start: datetime, end: datetime) -> models.ReportJob:
+    if report_type not in reports.REPORT_BUILDERS:
+        raise ValueError(f"Invalid report type: {report_type}")
+    job = models.ReportJob(
+        report_type=report_type,
+        requested_by=user_id,
+        start_date=start,
+        end_date=end,
+        status=QUEUED,
+        created_at=_now()
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+def claim_next(db: Session, worker: str) -> Optional[models.ReportJob]:
+    """Mark the oldest queued job as running for ``worker`` and commit; None if the queue is empty."""
+    job = db.execute(
+        select(models.ReportJob).where(
+            models.ReportJob.status == QUEUED
+        ).order_by(
+            models.ReportJob.created_at, models.ReportJob.id
+        ).limit(1).with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+    if job is None:
+        db.rollback()
+        return None
+    now = _now()
+    job.status = RUNNING
+    job.worker = worker
+    job.attempts += 1
+    job.progress = 0
+    job.started_at = now
+    job.heartbeat_at = now
+    db.commit()
+    return job
+
+def _update_owned(db: Session, job_id: int, worker: str, **values) -> bool:
+    """Update the job only while ``worker`` still runs it; False once it was taken away."""
+    owned = db.execute(
+        update(models.ReportJob).where(
+            models.ReportJob.id == job_id,
+            models.ReportJob.worker == worker,
+            models.ReportJob.status == RUNNING
+        ).values(**values).execution_options(synchronize_session=False)
+    ).rowcount == 1
+    db.commit()
+    return owned
+
+def set_progress(db: Session, job: models.ReportJob, worker: str, progress: int) -> bool:
+    """Record progress (percent) and heartbeat; committed so pollers see it."""
+    return _update_owned(db, job.id, worker, progress=max(0, min(100, int(progress))), heartbeat_at=_now())
+
+class _Heartbeat(threading.Thread):
+    """Touches ``heartbeat_at`` on its own connection while the report is built."""
+
+    def __init__(self, job_id: int, worker: str):
+        super().__init__(name=f"report-job-{job_id}-heartbeat", daemon=True)
+        self.job_id = job_id
+        self.worker = worker
+        self.lost = False
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(REPORT_JOB_HEARTBEAT_SECONDS):
+            db = SessionLocal()
+            try:
+                if not _update_owned(db, self.job_id, self.worker, heartbeat_at=_now()):
+                    self.lost = True
+                    return
+            except Exception:
+                # A missed beat or two is fine; the stale limit is several beats
+                logger.warning("Report job heartbeat failed", exc_info=True,
+                               extra={"event": "report_job.heartbeat_error", "job_id": self.job_id})
+            finally:
+                db.close()
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+def run_job(db: Session, job: models.ReportJob) -> None:
+    job_id, worker, report_type = job.id, job.worker, job.report_type
+    heartbeat = _Heartbeat(job_id, worker)
+    heartbeat.start()
+    try:
+        user = db.get(models.User, job.requested_by)
+        if user is None:
+            raise ValueError("Requesting user no longer exists")
+        set_progress(db, job, worker, 10)
+        result = reports.build_report(db, report_type, user, job.start_date, job.end_date)
+        heartbeat.stop()
+        finished = _update_owned(
+            db, job_id, worker, result=result, status=DONE, progress=100, finished_at=_now()
+        )
+        event = "report_job.done" if finished else "report_job.lost"
+    except Exception as e:
+        heartbeat.stop()
+        db.rollback()
+        finished = _update_owned(
+            db, job_id, worker, status=FAILED, error=getattr(e, "detail", None) or str(e), finished_at=_now()
+        )
+        logger.exception(
+            "Report job failed",
+            extra={"event": "report_job.failed", "job_id": job_id, "report_type": report_type}
+        )
+        if finished:
+            return
+        event = "report_job.lost"
+    if finished:
+        logger.info("Report job finished", extra={"event": event, "job_id": job_id, "report_type": report_type})
+    else:
+        # Requeued (or failed) as stale meanwhile; that run's outcome stands
+        logger.warning(
+            "Report job was taken away from this worker; result dropped",
+            extra={"event": event, "job_id": job_id, "report_type": report_type, "worker": worker}
+        )
+
+def requeue_stale(db: Session) -> int:
+    """Requeue running jobs whose worker stopped heartbeating (or fail them after too many attempts)."""
+    cutoff = _now() - timedelta(seconds=REPORT_JOB_STALE_SECONDS)
+    stale = (models.ReportJob.status == RUNNING, models.ReportJob.heartbeat_at < cutoff)
+    failed = db.execute(
+        update(models.ReportJob).where(
+            *stale, models.ReportJob.attempts >= REPORT_JOB_MAX_ATTEMPTS
+        ).values(status=FAILED, error="Worker stopped responding", finished_at=_now())
+    ).rowcount
+    requeued = db.execute(
+        update(models.ReportJob).where(*stale).values(status=QUEUED, worker=None)
+    ).rowcount
+    db.commit()
+    if failed or requeued:
+        logger.warning(
+            "Stale report jobs recovered",
+            extra={"event": "report_job.stale", "requeued": requeued, "failed": failed}
+        )
+    return requeued
+
+def purge_finished(db: Session) -> int:
+    """Delete done and failed jobs older than REPORT_JOB_RETENTION_DAYS."""
+    if REPORT_JOB_RETENTION_DAYS <= 0:
+        return 0
+    cutoff = _now() - timedelta(days=REPORT_JOB_RETENTION_DAYS)
+    purged = db.execute(
+        delete(models.ReportJob).where(
+            models.ReportJob.status.in_((DONE, FAILED)),
+            models.ReportJob.finished_at < cutoff
+        )
+    ).rowcount
+    db.commit()
+    if purged:
+        logger.info("Old report jobs purged", extra={"event": "report_job.purged", "purged": purged})
+    return purged
+
+def job_status(job: models.ReportJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "report_type": job.report_type,
+        "status": job.status,
+        "progress": job.progress,
+        "attempts": job.attempts,
+        "error": job.error,
+        "period": {"start": job.start_date.isoformat(), "end": job.end_date.isoformat()},
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "download_url": f"/api/v1/dashboard/report-jobs/{job.id}/download" if job.status == DONE else None
+    }
+
+def run_worker(once: bool = False) -> None:
+    """Claim and build jobs until interrupted (or until the queue is empty with ``once``)."""
+    worker = worker_name()
+    logger.info("Report worker started", extra={"event": "report_worker.start", "worker": worker})
+    last_recovery = -REPORT_JOB_STALE_SECONDS
+    while True:
+        job = None
+        db = SessionLocal()
+        try:
+            if time.monotonic() - last_recovery >= REPORT_JOB_STALE_SECONDS / 2:
+                requeue_stale(db)
+                purge_finished(db)
+                last_recovery = time.monotonic()
+            job = claim_next(db, worker)
+            if job is not None:
+                run_job(db, job)
+        except Exception:
+            # e.g. the database is unreachable; keep polling
+            logger.exception("Report worker error", extra={"event": "report_worker.error", "worker": worker})
+        finally:
+            db.close()
+        if job is None:
+            if once:
+                return
+            time.sleep(REPORT_WORKER_POLL_SECONDS)
@@ -0,0 +1,252 @@
+# app/reports.py - REPORT BUILDERS SHARED BY THE API AND THE REPORT WORKER
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import attendance, models, org_rollup
+from app.exports import flatten
+
+def parse_period(start_date: Optional[str], end_date: Optional[str]):
+    """``YYYY-MM-DD`` strings to datetimes; defaults to the last 30 days."""
+    start = datetime.strptime(start_date, "%Y-%m-%d") if start_date else datetime.now() - timedelta(days=30)
+    end = datetime.strptime(end_date, "%Y-%m-%d") if end_date else datetime.now()
+    return start, end
+
+def summary_period(db: Session, start: datetime, end: datetime):
+    """Summary figures counted from rows dated inside the period"""
+    # Get new users in date range
+    new_users = db.query(models.User).filter(
+        models.User.created_at.between(start, end)
+    ).count()
+    
+    # Get audit logs in date range
+    activity_count = db.query(models.AuditLog).filter(
+        models.AuditLog.created_at.between(start, end)
+    ).count()
+    
+    return {
+        "period": {
+            "start": start.isoformat(),
+            "end": end.isoformat()
+        },
+        "new_users": new_users,
+        "activities": activity_count
+    }
+
+def finish_summary_report(db: Session, period_part: dict, user: models.User):
+    """Add today's totals and the requester to ``summary_period()``'s figures"""
+    # Get basic counts
+    user_count = db.query(models.User).count()
+    division_count = db.query(models.Division).count()
+    department_count = db.query(models.Department).count()
+    
+    return {
+        "period": period_part["period"],
+        "summary": {
+            "total_users": user_count,
+            "total_divisions": division_count,
+            "total_departments": department_count,
+            "new_users": period_part["new_users"],
+            "activities": period_part["activities"]
+        },
+        "generated_by": user.full_name,
+        "generated_at": datetime.now().isoformat()
+    }
+
+def generate_summary_report(db: Session, user: models.User, start: datetime, end: datetime):
+    """Generate summary report"""
+    return finish_summary_report(db, summary_period(db, start, end), user)
+
+def generate_attendance_report(db: Session, user: models.User, start: datetime, end: datetime):
+    """Generate attendance report from the daily attendance rollup
+
+    Attendance is present person-days over active headcount times working
+    days in the period, for the divisions/departments ``user`` manages.
+    """
+    first, last = start.date(), end.date()
+    
+    departments = db.query(models.Department)
+    if user.role == models.Role.DIVISION_MANAGER:
+        departments = departments.filter(models.Department.division_id == user.division_id)
+        scope = (attendance.in_division(user.division_id),)
+        active = org_rollup.division_headcount(db, user.division_id)["active"]
+    elif user.role == models.Role.DEPARTMENT_MANAGER:
+        departments = departments.filter(models.Department.id == user.department_id)
+        scope = (attendance.in_department(user.department_id),)
+        active = org_rollup.department_headcounts(db, [user.department_id])[user.department_id]["active"]
+    else:
+        scope = ()
+        active = db.execute(org_rollup.headcount_query()).one().active
+    departments = departments.order_by(models.Department.name).all()
+    headcounts = org_rollup.department_headcounts(db, [dept.id for dept in departments])
+    
+    counts = attendance.department_counts(db, first, last, *scope)
+    days = attendance.expected_days(first, last)
+    expected = active * days
+    total_present = sum(c["present"] for c in counts.values())
+    
+    return {
+        "period": {
+            "start": start.isoformat(),
+            "end": end.isoformat()
+        },
+        "attendance_summary": {
+            "average_attendance": attendance.attendance_rate(total_present, expected),
+            "total_present": total_present,
+            "total_absent": max(0, expected - total_present),
+            "total_late": sum(c["late"] for c in counts.values()),
+            "overtime_hours": round(sum(c["overtime_minutes"] for c in counts.values()) / 60, 1)
+        },
+        "by_department": [
+            {
+                "department_id": dept.id,
+                "department": dept.name,
+                "attendance": attendance.attendance_rate(
+                    counts.get(dept.id, {}).get("present", 0), headcounts[dept.id]["active"] * days
+                )
+            }
+            for dept in departments
+        ]
+    }
+
+# Rows fetched per round trip when streaming detail rows
+REPORT_STREAM_BATCH = 1000
+
+def iter_user_activities(db: Session, start: datetime, end: datetime, batch_size: int = REPORT_STREAM_BATCH):
+    """Audit rows in the period with the actor's name, oldest first.
+
+    Streamed through a server-side cursor ``batch_size`` rows at a time, so
+    memory doesn't grow with the period.
+    """
+    statement = select(
+        models.AuditLog.user_id,
+        models.User.full_name,
+        models.AuditLog.action,
+        models.AuditLog.resource,
+        models.AuditLog.created_at,
+        models.AuditLog.details
+    ).outerjoin(
+        models.User, models.User.id == models.AuditLog.user_id
+    ).where(
+        models.AuditLog.created_at.between(start, end),
+        models.AuditLog.user_id.isnot(None)
+    ).order_by(
+        models.AuditLog.created_at, models.AuditLog.id
+    ).execution_options(yield_per=batch_size)
+    yield from db.execute(statement)
+
+def user_report_period(db: Session, start: datetime, end: datetime):
+    """Per-user activity figures for the period, by user id (names are added later)"""
+    in_period = models.AuditLog.created_at.between(start, end)
+    
+    total_activities = db.query(func.count(models.AuditLog.id)).filter(in_period).scalar()
+    
+    # One row per user
+    per_user = db.query(
+        models.AuditLog.user_id,
+        func.count(models.AuditLog.id).label("activities"),
+        func.min(models.AuditLog.created_at).label("first_activity"),
+        func.max(models.AuditLog.created_at).label("last_activity")
+    ).filter(
+        in_period, models.AuditLog.user_id.isnot(None)
+    ).group_by(
+        models.AuditLog.user_id
+    ).order_by(func.count(models.AuditLog.id).desc()).all()
+    
+    # One row per (user, action)
+    actions: Dict[int, Dict[str, int]] = {}
+    for user_id, action, count in db.query(
+        models.AuditLog.user_id, models.AuditLog.action, func.count(models.AuditLog.id)
+    ).filter(
+        in_period, models.AuditLog.user_id.isnot(None)
+    ).group_by(models.AuditLog.user_id, models.AuditLog.action):
+        actions.setdefault(user_id, {})[action] = count
+    
+    return {
+        "period": {
+            "start": start.isoformat(),
+            "end": end.isoformat()
+        },
+        "total_activities": total_activities,
+        "users": [
+            {
+                "user_id": row.user_id,
+                "activities": row.activities,
+                "first_activity": row.first_activity.isoformat() if row.first_activity else None,
+                "last_activity": row.last_activity.isoformat() if row.last_activity else None,
+                "actions": actions.get(row.user_id, {})
+            }
+            for row in per_user
+        ]
+    }
+
+def finish_user_report(db: Session, period_part: dict, user: models.User):
+    """Add current user names to ``user_report_period()``'s figures"""
+    user_ids = [row["user_id"] for row in period_part["users"]]
+    names = dict(
+        db.query(models.User.id, models.User.full_name).filter(models.User.id.in_(user_ids)).all()
+    ) if user_ids else {}
+    
+    return {
+        "period": period_part["period"],
+        "total_activities": period_part["total_activities"],
+        "users": [
+            {
+                "user_id": row["user_id"],
+                "user": names.get(row["user_id"]) or f"User {row['user_id']}",
+                **{key: value for key, value in row.items() if key != "user_id"}
+            }
+            for row in period_part["users"]
+        ]
+    }
+
+def generate_user_report(db: Session, user: models.User, start: datetime, end: datetime):
+    """Generate user activity report
+
+    Counts, per-action histograms and first/last timestamps are computed in
+    SQL. Individual activities are only served streamed (``iter_report_rows``),
+    never gathered into one document.
+    """
+    return finish_user_report(db, user_report_period(db, start, end), user)
+
+# Reports whose figures depend only on rows dated inside the period, split
+# into that part (stable once the period has ended unless users or audit
+# rows from it are deleted, so it can be cached for long) and a finisher
+# adding what is current state: totals, names and the requester. Attendance isn't here: its rates use today's headcount and
+# badge events can arrive for past days.
+PERIOD_REPORTS: Dict[str, Tuple[Callable, Callable]] = {
+    "summary": (summary_period, finish_summary_report),
+    "user": (user_report_period, finish_user_report),
+}
+
+REPORT_BUILDERS: Dict[str, Callable] = {
+    "summary": generate_summary_report,
+    "attendance": generate_attendance_report,
+    "user": generate_user_report,
+}
+
+def build_report(db: Session, report_type: str, user: models.User, start: datetime, end: datetime):
+    builder = REPORT_BUILDERS.get(report_type)
+    if builder is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid report type: {report_type}"
+        )
+    return builder(db, user, start, end)
+
+# Streaming exports (format=csv|ndjson): the user report streams one row per
+# activity; the others are small and go out flattened to field/value rows.
+USER_ACTIVITY_COLUMNS = ("timestamp", "user_id", "user", "action", "resource", "details")
+
+def export_columns(report_type: str):
+    return USER_ACTIVITY_COLUMNS if report_type == "user" else ("field", "value")
+
+def iter_report_rows(db: Session, report_type: str, user: models.User, start: datetime, end: datetime):
+    if report_type == "user":
+        for row in iter_user_activities(db, start, end):
+            yield row.created_at, row.user_id, row.full_name, row.action, row.resource, row.details
+    else:
+        yield from flatten(build_report(db, report_type, user, start, end))
@@ -0,0 +1,209 @@
+# app/revocation.py - REVOKED TOKEN DENYLIST
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# How often each worker pulls revocations made by other workers.
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+# Re-read this much history on every sync so rows from transactions that
+# committed late (revoked_at is their start time) are not missed.
+REVOCATION_SYNC_OVERLAP_SECONDS = float(os.getenv("REVOCATION_SYNC_OVERLAP_SECONDS", "60"))
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "100000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+# Rebuild the Bloom filter (dropping expired ids) once this many have expired.
+REVOCATION_REBUILD_EXPIRED = int(os.getenv("REVOCATION_REBUILD_EXPIRED", "1000"))
+# Expired rows are deleted from the table at most this often (per worker).
+REVOCATION_PURGE_SECONDS = float(os.getenv("REVOCATION_PURGE_SECONDS", "3600"))
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class RevocationStore:
+    """Revoked token ids, persisted in ``revoked_tokens`` and mirrored per worker.
+
+    Each worker keeps a Bloom filter plus an exact ``jti -> expiry`` map and
+    pulls new rows incrementally every ``REVOCATION_SYNC_SECONDS``, so the
+    common "not revoked" answer comes from the Bloom filter without touching
+    the database. A revocation made by another worker is therefore visible
+    here after at most one sync interval.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self._session_factory = session_factory
+        self._sync_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._bloom = BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+        self._revoked: Dict[str, float] = {}
+        self._synced_until: Optional[datetime] = None
+        self._last_sync = 0.0
+        self._last_purge = time.monotonic()
+        self.checks = 0
+        self.bloom_negatives = 0
+        self.false_positives = 0
+        self.sync_errors = 0
+        self.rebuilds = 0
+
+    def _remember(self, jti: str, expires_at: datetime) -> None:
+        if jti not in self._revoked:
+            self._bloom.add(jti)
+        self._revoked[jti] = expires_at.timestamp()
+
+    def _rebuild(self, now: float) -> None:
+        """Drop expired ids and rebuild the Bloom filter from what is left."""
+        live = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        bloom = BloomFilter(max(REVOCATION_BLOOM_CAPACITY, len(live) * 2), REVOCATION_BLOOM_ERROR_RATE)
+        for jti in live:
+            bloom.add(jti)
+        self._bloom, self._revoked = bloom, live
+        self.rebuilds += 1
+
+    def _needs_rebuild(self, now: float) -> bool:
+        # Past capacity the false-positive rate climbs and checks fall through
+        # to the exact map; expired ids only cost memory and filter bits.
+        if self._bloom.count >= self._bloom.capacity:
+            return True
+        expired = sum(1 for exp in self._revoked.values() if exp <= now)
+        return expired >= max(REVOCATION_REBUILD_EXPIRED, self._bloom.count // 4)
+
+    def sync(self) -> None:
+        """Pull revocations recorded since the last sync (all live ones on first call)."""
+        started = datetime.now(timezone.utc)
+        db = self._session_factory()
+        try:
+            query = db.query(models.RevokedToken.jti, models.RevokedToken.expires_at)
+            if self._synced_until is None:
+                query = query.filter(models.RevokedToken.expires_at > started)
+            else:
+                since = self._synced_until - timedelta(seconds=REVOCATION_SYNC_OVERLAP_SECONDS)
+                query = query.filter(models.RevokedToken.revoked_at >= since)
+            rows = query.all()
+
+            if time.monotonic() - self._last_purge >= REVOCATION_PURGE_SECONDS:
+                db.query(models.RevokedToken).filter(
+                    models.RevokedToken.expires_at < started
+                ).delete(synchronize_session=False)
+                db.commit()
+                self._last_purge = time.monotonic()
+        finally:
+            db.close()
+
+        # revoke() adds ids from request threads; hold the lock while the
+        # filter and map may be replaced
+        with self._state_lock:
+            for jti, expires_at in rows:
+                self._remember(jti, expires_at)
+            now = time.time()
+            if self._needs_rebuild(now):
+                self._rebuild(now)
+        self._synced_until = started
+
+    def sync_due(self) -> bool:
+        """True when the next check would sync; async callers sync off the loop first."""
+        return time.monotonic() - self._last_sync >= REVOCATION_SYNC_SECONDS
+
+    def maybe_sync(self) -> None:
+        if not self.sync_due():
+            return
+        # One thread syncs; the others keep answering from the current state
+        if not self._sync_lock.acquire(blocking=self._synced_until is None):
+            return
+        try:
+            if time.monotonic() - self._last_sync < REVOCATION_SYNC_SECONDS:
+                return
+            self.sync()
+        except Exception:
+            self.sync_errors += 1
+            logger.warning("Revocation sync failed", exc_info=True, extra={"event": "auth.revocation_sync_error"})
+        finally:
+            self._last_sync = time.monotonic()
+            self._sync_lock.release()
+
+    def is_revoked(self, jti: str) -> bool:
+        self.maybe_sync()
+        self.checks += 1
+        if jti not in self._bloom:
+            self.bloom_negatives += 1
+            return False
+        if jti in self._revoked:
+            return True
+        self.false_positives += 1
+        return False
+
+    def revoke(self, db: Session, jti: str, expires_at: datetime,
+               user_id: Optional[int] = None, token_type: str = "access") -> bool:
+        """Persist a revocation; returns False if ``jti`` was already revoked."""
+        db.add(models.RevokedToken(
+            jti=jti,
+            user_id=user_id,
+            token_type=token_type,
+            expires_at=expires_at
+        ))
+        try:
+            db.commit()
+            newly_revoked = True
+        except IntegrityError:
+            db.rollback()
+            newly_revoked = False
+        with self._state_lock:
+            self._remember(jti, expires_at)
+        return newly_revoked
+
+    def clear(self) -> None:
+        """Forget local state; the next check reloads everything from the table."""
+        with self._sync_lock, self._state_lock:
+            self._bloom = BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+            self._revoked = {}
+            self._synced_until = None
+            self._last_sync = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked_ids": len(self._revoked),
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hash_count,
+            "bloom_entries": self._bloom.count,
+            "bloom_capacity": self._bloom.capacity,
+            "rebuilds": self.rebuilds,
+            "checks": self.checks,
+            "bloom_negatives": self.bloom_negatives,
+            "false_positives": self.false_positives,
+            "sync_errors": self.sync_errors,
+            "last_synced_at": self._synced_until.isoformat() if self._synced_until else None,
+        }
+
+revocation_store = RevocationStore()
@@ -119,6 +119,32 @@ class NotificationResponse(NotificationBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+# Attendance Schemas
+class AttendanceEventType(str, Enum):
+    clock_in = "clock_in"
+    clock_out = "clock_out"
+
+class AttendanceEventIn(BaseModel):
+    user_id: int
+    type: AttendanceEventType
+    timestamp: datetime  # without an offset: ATTENDANCE_TIMEZONE local time
+    device_id: Optional[str] = None
+    source: str = "badge"
+
+class AttendanceEventBatch(BaseModel):
+    events: List[AttendanceEventIn]
+
+class DeviceTokenCreate(BaseModel):
+    device: str = Field(..., min_length=1, max_length=100)
+    expires_days: Optional[int] = Field(None, ge=1, le=3650)
+
+class DeviceTokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    device: str
+    scopes: List[str]
+    expires_at: datetime
+
 # Settings Schemas
 class SettingsBase(BaseModel):
     key: str
@@ -0,0 +1,161 @@
+# app/slow_queries.py - SLOW-QUERY LOG WITH EXPLAIN CAPTURE
+import logging
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.query_stats import add_observer, current_query_log, statement_shape
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are recorded; 0 disables the log.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# "off", "plan" (EXPLAIN) or "analyze" (EXPLAIN ANALYZE, plain SELECTs only: it runs the query again)
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "plan").lower()
+# Explain each statement shape at most once per this many seconds.
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "60"))
+# Entries kept in memory (per worker) for /settings/slow-queries.
+SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+
+# Bind parameters whose names contain these are never recorded.
+_SECRET_NAMES = ("password", "hash", "token", "jti", "secret")
+_APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+_SKIP_FILES = {os.path.join(_APP_ROOT, name) for name in ("query_stats.py", "slow_queries.py", "database.py")}
+
+_entries: deque = deque(maxlen=SLOW_QUERY_BUFFER)
+_lock = threading.Lock()
+_explained_at: Dict[str, float] = {}
+_stats = {"recorded": 0, "explained": 0, "explain_errors": 0}
+
+def _parameters(parameters: Any, context: Any) -> Any:
+    """Bind values by name where the compiled statement knows them, secrets masked."""
+    compiled = getattr(context, "compiled_parameters", None)
+    if compiled:
+        values = compiled[0]  # first row only for executemany
+        return {
+            key: "***" if any(word in key.lower() for word in _SECRET_NAMES) else repr(value)[:200]
+            for key, value in values.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        return [repr(value)[:200] for value in parameters][:50]
+    return repr(parameters)[:500]
+
+def _origin() -> Optional[str]:
+    """Innermost app frame that issued the statement (sync code paths only)."""
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        if frame.filename.startswith(_APP_ROOT) and frame.filename not in _SKIP_FILES:
+            return f"{os.path.relpath(frame.filename, os.path.dirname(_APP_ROOT))}:{frame.lineno} in {frame.name}"
+    return None
+
+def _explain(conn, statement: str, parameters: Any, context: Any) -> Optional[str]:
+    """The plan for ``statement``, run on the caller's connection and transaction.
+
+    On Postgres a failed statement aborts the whole transaction, so EXPLAIN
+    runs inside a savepoint that is always rolled back: an error leaves the
+    request's transaction as it was, and so does anything EXPLAIN ANALYZE
+    executed. ANALYZE is still limited to statements starting with SELECT
+    (a WITH may hide an INSERT/UPDATE/DELETE, which would take locks).
+    """
+    if SLOW_QUERY_EXPLAIN not in ("plan", "analyze"):
+        return None
+    if context is not None and context.execution_options.get("stream_results"):
+        return None  # a server-side cursor is still open on this connection
+    dialect = conn.dialect.name
+    is_select = statement.lstrip().upper().startswith("SELECT")
+    if dialect == "postgresql":
+        options = "ANALYZE, BUFFERS, FORMAT TEXT" if SLOW_QUERY_EXPLAIN == "analyze" and is_select else "FORMAT TEXT"
+        prefix = f"EXPLAIN ({options}) "
+    elif dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+
+    # Outside a transaction block (autocommit) there is nothing to protect
+    savepoint = dialect == "postgresql" and not getattr(conn.connection.dbapi_connection, "autocommit", False)
+    cursor = conn.connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        finally:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+    return "\n".join(str(row[-1]) for row in rows)
+
+def _observe(conn, statement: str, parameters: Any, context: Any, duration: float) -> None:
+    if SLOW_QUERY_MS <= 0 or duration * 1000 < SLOW_QUERY_MS:
+        return
+
+    shape = statement_shape(statement)
+    log = current_query_log()
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(duration * 1000, 1),
+        "statement": statement[:4000],
+        "parameters": _parameters(parameters, context),
+        "route": log.route if log else None,
+        "origin": _origin(),
+        "database": conn.engine.url.render_as_string(hide_password=True).split("@")[-1],
+        "plan": None,
+    }
+
+    now = time.monotonic()
+    if now - _explained_at.get(shape, -SLOW_QUERY_EXPLAIN_INTERVAL) >= SLOW_QUERY_EXPLAIN_INTERVAL:
+        _explained_at[shape] = now
+        try:
+            entry["plan"] = _explain(conn, statement, parameters, context)
+            if entry["plan"] is not None:
+                _stats["explained"] += 1
+        except Exception as e:
+            # Never let the diagnostics fail the statement being diagnosed
+            _stats["explain_errors"] += 1
+            entry["plan"] = f"EXPLAIN failed: {e}"
+            logger.warning(
+                "Slow query EXPLAIN failed",
+                extra={"event": "db.slow_query_explain_error", "shape": shape[:300], "error": str(e)[:300]}
+            )
+        if len(_explained_at) > 10 * SLOW_QUERY_BUFFER:
+            _explained_at.clear()
+
+    with _lock:
+        _entries.append(entry)
+        _stats["recorded"] += 1
+    logger.warning(
+        "Slow query",
+        extra={
+            "event": "db.slow_query",
+            "duration_ms": entry["duration_ms"],
+            "route": entry["route"],
+            "origin": entry["origin"],
+            "shape": shape[:300],
+        }
+    )
+
+def recent(limit: int = 50) -> List[Dict[str, Any]]:
+    """Newest first."""
+    with _lock:
+        return list(_entries)[::-1][:limit]
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+    _explained_at.clear()
+
+def stats() -> Dict[str, Any]:
+    return {
+        "threshold_ms": SLOW_QUERY_MS,
+        "explain": SLOW_QUERY_EXPLAIN,
+        "buffered": len(_entries),
+        **_stats,
+    }
+
+add_observer(_observe)
@@ -0,0 +1,81 @@
+# benchmarks/async_concurrency.py - SYNC VS ASYNC ROUTES UNDER CONCURRENCY
+"""Compare a sync ``def`` route on get_db with an ``async def`` route on get_async_db.
+
+Starts a small app in-process on --port, using the configured DATABASE_URL
+and the same engines and pools as the API::
+
+    python benchmarks/async_concurrency.py --concurrency 200 --query-ms 50
+
+Each request runs one query that takes --query-ms on the server (pg_sleep on
+Postgres; other databases run a plain SELECT 1). Sync routes are capped by
+the threadpool (40 threads by default); async routes by the async pool size.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import uvicorn
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import engine, get_async_db, get_db
+from app.db_metrics import pool_stats
+from common import http_request, print_result, run_load
+
+def build_app(query_ms: int) -> FastAPI:
+    if engine.dialect.name == "postgresql":
+        statement = text(f"SELECT pg_sleep({query_ms / 1000})")
+    else:
+        statement = text("SELECT 1")
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_route(db: Session = Depends(get_db)):
+        db.execute(statement)
+        return {"ok": True}
+
+    @app.get("/async")
+    async def async_route(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(statement)
+        return {"ok": True}
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--query-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    server = uvicorn.Server(uvicorn.Config(build_app(args.query_ms), port=args.port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        for mode in ("sync", "async"):
+            def call(path=f"{base_url}/{mode}"):
+                status, _ = http_request("GET", path)
+                return status
+            run_load(call, min(args.requests, 50), 10)  # warm the pool
+            print_result(f"{mode} (c={args.concurrency})", run_load(call, args.requests, args.concurrency))
+        for name, stats in pool_stats().items():
+            print(f"{name:<28} peak_checked_out={stats['peak_checked_out']} "
+                  f"wait_avg_ms={stats['wait']['avg_ms']} timeouts={stats['timeouts']}")
+    finally:
+        server.should_exit = True
+        thread.join()
+
+if __name__ == "__main__":
+    main()
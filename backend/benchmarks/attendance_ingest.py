@@ -0,0 +1,135 @@
+# benchmarks/attendance_ingest.py - BULK ATTENDANCE INGEST THROUGHPUT
+"""Events per second through POST /attendance/events/bulk.
+
+Start the API (``uvicorn main:app``) against the same DATABASE_URL and run::
+
+    python benchmarks/attendance_ingest.py --batch 5000 --batches 40 --concurrency 4
+
+Request bodies are encoded before the clock starts, so the figure is the
+server's. ``--in-process`` also times the write path alone: one ORM object
+per event (the obvious way) against ``attendance.ingest`` (COPY on Postgres,
+plus the attendance_daily rollup update for the same events).
+The target is 50k events/s on one node, on Postgres: only a run against a
+Postgres DATABASE_URL says anything about it. The HTTP run posts with a
+device token (``POST /attendance/device-tokens``), as the gateways do.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common import http_request, login, print_result, run_load
+
+from app import attendance, models, schemas
+from app.database import SessionLocal, engine
+
+def user_ids(limit: int):
+    db = SessionLocal()
+    try:
+        return [row[0] for row in db.query(models.User.id).order_by(models.User.id).limit(limit).all()]
+    finally:
+        db.close()
+
+def make_events(ids, count: int, day: datetime):
+    events = []
+    for n in range(count):
+        # In and out for each user in turn
+        user_id = ids[n // 2 % len(ids)]
+        clock_in = n % 2 == 0
+        at = day + timedelta(hours=8 if clock_in else 16, minutes=random.randint(-20, 20))
+        events.append({
+            "user_id": user_id,
+            "type": "clock_in" if clock_in else "clock_out",
+            "timestamp": at.isoformat(),
+            "device_id": f"gate-{user_id % 12}",
+            "source": "badge",
+        })
+    return events
+
+def post_raw(url: str, body: bytes, token: str) -> int:
+    request = urllib.request.Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json", "Authorization": f"Bearer {token}"
+    })
+    with urllib.request.urlopen(request, timeout=120) as response:
+        response.read()
+        return response.status
+
+def orm_per_row(events) -> None:
+    db = SessionLocal()
+    try:
+        for event in events:
+            db.add(models.AttendanceEvent(
+                user_id=event.user_id,
+                event_type=event.type.value,
+                occurred_at=attendance.to_utc(event.timestamp),
+                device_id=event.device_id,
+                source=event.source
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+def bulk(events) -> None:
+    db = SessionLocal()
+    try:
+        attendance.ingest(db, events)
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="1234")
+    parser.add_argument("--users", type=int, default=5000, help="spread events over this many users")
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--batches", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--in-process", action="store_true", help="also time the write path without HTTP")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print(f"⚠️  Running on {engine.dialect.name}: the 50k events/s target is for Postgres (COPY)")
+
+    ids = user_ids(args.users)
+    if not ids:
+        raise SystemExit("No users; seed the database first")
+    day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+
+    if args.in_process:
+        events = schemas.AttendanceEventBatch(events=make_events(ids, args.batch, day)).events
+        for name, write in [("orm per row", orm_per_row), ("attendance.ingest", bulk)]:
+            start = time.perf_counter()
+            write(events)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<28} {len(events)} events in {elapsed:.3f} s = {len(events) / elapsed:,.0f} events/s")
+
+    admin_token = login(args.base_url, args.username, args.password)
+    status, body = http_request("POST", f"{args.base_url}/api/v1/attendance/device-tokens",
+                                data={"device": "ingest-benchmark", "expires_days": 1}, token=admin_token)
+    if status != 200:
+        raise SystemExit(f"Could not issue a device token ({status}): {body[:200]!r}")
+    token = json.loads(body)["access_token"]
+    url = f"{args.base_url}/api/v1/attendance/events/bulk"
+    bodies = [
+        json.dumps({"events": make_events(ids, args.batch, day - timedelta(days=n % 28))}).encode()
+        for n in range(args.batches)
+    ]
+    pending = list(bodies)
+
+    def send() -> int:
+        return post_raw(url, pending.pop(), token)
+
+    result = run_load(send, args.batches, args.concurrency)
+    result["events_per_second"] = round(args.batch * result["statuses"].get(200, 0) / result["wall_seconds"])
+    print_result("bulk ingest over HTTP", result)
+
+if __name__ == "__main__":
+    main()
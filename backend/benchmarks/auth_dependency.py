@@ -0,0 +1,71 @@
+# benchmarks/auth_dependency.py - USER-ROW VS CLAIMS AUTH DEPENDENCY
+"""Compare get_current_user and get_current_claims per request.
+
+Runs in-process against the configured DATABASE_URL and an existing user::
+
+    python benchmarks/auth_dependency.py --username admin --iterations 5000
+
+"cold" clears the auth caches before every call, "warm" keeps them.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import event
+
+from app import models
+from app.database import SessionLocal, engine
+from app.auth_utils import create_access_token
+from app.api.v1.auth import (
+    access_token_claims, get_current_claims, get_current_user,
+    principal_cache, token_version_cache
+)
+
+statements = 0
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+def run(dependency, token: str, iterations: int, cold: bool):
+    global statements
+    statements = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if cold:
+            principal_cache.clear()
+            token_version_cache.clear()
+        db = SessionLocal()
+        try:
+            dependency(token, db)
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, statements / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user = db.query(models.User).filter(models.User.username == args.username).first()
+    if not user:
+        print(f"❌ User '{args.username}' not found")
+        return
+    token = create_access_token(access_token_claims(user))
+    db.close()
+
+    for name, dependency in [("get_current_user", get_current_user), ("get_current_claims", get_current_claims)]:
+        for cold in (True, False):
+            rate, per_call = run(dependency, token, args.iterations, cold)
+            label = f"{name} ({'cold' if cold else 'warm'})"
+            print(f"{label:<28} {rate:>10.0f} calls/s  {per_call:.2f} SQL statements/call")
+
+if __name__ == "__main__":
+    main()
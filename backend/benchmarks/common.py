@@ -0,0 +1,108 @@
+# benchmarks/common.py - SHARED HELPERS FOR THE LOAD SCRIPTS
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def http_request(method: str, url: str, data: Optional[dict] = None, form: Optional[dict] = None,
+                 token: Optional[str] = None, timeout: float = 60.0) -> Tuple[int, bytes]:
+    headers = {"Accept": "application/json"}
+    body = None
+    if form is not None:
+        body = urllib.parse.urlencode(form).encode()
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    elif data is not None:
+        body = json.dumps(data).encode()
+        headers["Content-Type"] = "application/json"
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    request = urllib.request.Request(url, data=body, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def login(base_url: str, username: str, password: str) -> str:
+    status, body = http_request("POST", f"{base_url}/api/v1/auth/login",
+                                form={"username": username, "password": password})
+    if status != 200:
+        raise SystemExit(f"Login failed ({status}): {body[:200]!r}")
+    return json.loads(body)["access_token"]
+
+def timed(fn: Callable[[], int]) -> Tuple[int, float]:
+    start = time.perf_counter()
+    status = fn()
+    return status, time.perf_counter() - start
+
+def run_load(fn: Callable[[], int], total: int, concurrency: int) -> Dict[str, object]:
+    """Call ``fn`` ``total`` times from ``concurrency`` threads and summarize latencies."""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+
+    def one(_):
+        try:
+            status, elapsed = timed(fn)
+        except Exception:
+            status, elapsed = -1, 0.0
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status > 0:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+    return summarize(latencies, wall, statuses)
+
+def run_for(fn: Callable[[], int], stop: threading.Event, concurrency: int = 1) -> Dict[str, object]:
+    """Call ``fn`` in a loop from ``concurrency`` threads until ``stop`` is set."""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+
+    def loop():
+        while not stop.is_set():
+            try:
+                status, elapsed = timed(fn)
+            except Exception:
+                status, elapsed = -1, 0.0
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status > 0:
+                    latencies.append(elapsed)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - start, statuses)
+
+def summarize(latencies: List[float], wall: float, statuses: Dict[int, int]) -> Dict[str, object]:
+    return {
+        "requests": sum(statuses.values()),
+        "statuses": statuses,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+def print_result(name: str, result: Dict[str, object]) -> None:
+    print(f"{name:<28} " + "  ".join(f"{key}={value}" for key, value in result.items()))
@@ -0,0 +1,132 @@
+# benchmarks/dashboard_stats.py - /dashboard/stats BEFORE AND AFTER
+"""Time the dashboard stats query per scope against a large users table.
+
+Runs in-process against the configured DATABASE_URL. ``--seed`` first tops
+the users table up to ``--users`` rows (spread over the existing divisions
+and departments); only use it on a scratch database::
+
+    python benchmarks/dashboard_stats.py --seed --users 50000
+
+"separate counts" is the original implementation (one COUNT over users per
+figure), kept here only for comparison; "aggregate" is one round trip
+reading the org_headcounts rollup and "cached" is the route as served
+between writes.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import func, insert, select
+
+from app import models, org_rollup
+from app.database import AsyncSessionLocal, SessionLocal, async_engine
+from app.query_stats import capture_queries
+from app.api.v1.auth import Principal
+from app.api.v1.dashboard import _load_dashboard_stats, get_dashboard_stats, invalidate_dashboard_stats
+
+BATCH = 5000
+
+def seed(target: int) -> None:
+    db = SessionLocal()
+    try:
+        existing = db.query(func.count(models.User.id)).scalar()
+        divisions = [row[0] for row in db.query(models.Division.id).all()] or [None]
+        departments = db.query(models.Department.id, models.Department.division_id).all()
+        start = db.query(func.coalesce(func.max(models.User.id), 0)).scalar() + 1
+        missing = max(0, target - existing)
+        for offset in range(0, missing, BATCH):
+            rows = []
+            for n in range(start + offset, start + min(offset + BATCH, missing)):
+                if departments:
+                    department_id, division_id = departments[n % len(departments)]
+                else:
+                    department_id, division_id = None, divisions[n % len(divisions)]
+                rows.append({
+                    "email": f"bench{n}@example.com",
+                    "username": f"bench{n}",
+                    "password_hash": "!",
+                    "full_name": f"Bench User {n}",
+                    "employee_id": f"BENCH{n}",
+                    "role": models.Role.EMPLOYEE,
+                    "division_id": division_id,
+                    "department_id": department_id,
+                    "is_active": n % 10 != 0,
+                })
+            db.execute(insert(models.User), rows)
+            db.commit()
+        print(f"users: {existing} existing, {missing} inserted")
+        # Bulk inserts bypass the rollup listener
+        org_rollup.reconcile(db)
+    finally:
+        db.close()
+
+async def _count(db, model, *criteria) -> int:
+    statement = select(func.count()).select_from(model)
+    if criteria:
+        statement = statement.where(*criteria)
+    return (await db.execute(statement)).scalar_one()
+
+async def separate_counts(db, user: Principal) -> dict:
+    """Previous implementation, one statement per figure."""
+    if user.role == models.Role.ADMIN:
+        await _count(db, models.Division)
+        await _count(db, models.Department)
+        await _count(db, models.User)
+    elif user.role == models.Role.DIVISION_MANAGER:
+        await _count(db, models.Department, models.Department.division_id == user.division_id)
+        await _count(db, models.User, models.User.division_id == user.division_id)
+    elif user.role == models.Role.DEPARTMENT_MANAGER:
+        await _count(db, models.User, models.User.department_id == user.department_id)
+    return {"active_shifts": await _count(db, models.Shift)}
+
+async def cached(db, user: Principal) -> dict:
+    return await get_dashboard_stats(db=db, current_user=user)
+
+async def run(implementation, user: Principal, iterations: int):
+    timings = []
+    with capture_queries() as log:
+        for _ in range(iterations):
+            async with AsyncSessionLocal() as db:
+                start = time.perf_counter()
+                await implementation(db, user)
+                timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return sum(timings) / len(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.95) - 1], log.count / iterations
+
+async def main_async(args) -> None:
+    async with AsyncSessionLocal() as db:
+        division = (await db.execute(select(models.Division.id).limit(1))).scalar()
+        department = (await db.execute(select(models.Department.id).limit(1))).scalar()
+        users = (await db.execute(select(func.count()).select_from(models.User))).scalar()
+    print(f"{users} users")
+
+    scopes = [
+        ("admin", Principal(id=0, role=models.Role.ADMIN)),
+        ("division", Principal(id=0, role=models.Role.DIVISION_MANAGER, division_id=division)),
+        ("department", Principal(id=0, role=models.Role.DEPARTMENT_MANAGER, department_id=department)),
+    ]
+    for scope_name, user in scopes:
+        invalidate_dashboard_stats()
+        for name, implementation in [("separate counts", separate_counts), ("aggregate", _load_dashboard_stats), ("cached", cached)]:
+            avg, p50, p95, per_call = await run(implementation, user, args.iterations)
+            label = f"{scope_name} / {name}"
+            print(f"{label:<30} avg {avg:>8.3f} ms  p50 {p50:>8.3f} ms  p95 {p95:>8.3f} ms  {per_call:.2f} queries/call")
+    await async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="insert users up to --users first")
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.users)
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
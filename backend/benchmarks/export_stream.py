@@ -0,0 +1,140 @@
+# benchmarks/export_stream.py - AUDIT LOG EXPORT: BUFFERED JSON VS STREAMED CSV/NDJSON
+"""Time to first byte, total time and peak RSS of a full audit log export.
+
+Runs in-process against the configured DATABASE_URL, each case in a fresh
+child process so peak RSS is its own. ``--seed`` first tops audit_logs up
+to ``--rows`` rows; only use it on a scratch database::
+
+    python benchmarks/export_stream.py --seed --rows 1000000
+
+"buffered json" is the old way of exporting (load every ORM row, build the
+document, serialize it, send it); "csv" and "ndjson" drive the
+/settings/audit-logs/export route and consume its streamed body.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import func, insert
+from starlette.requests import Request
+
+from app import models
+from app.database import SessionLocal
+from app.api.v1.auth import Principal
+from app.api.v1.settings import export_audit_logs
+
+BATCH = 10000
+CASES = ("buffered json", "csv", "ndjson")
+
+def seed(target: int) -> None:
+    db = SessionLocal()
+    try:
+        existing = db.query(func.count(models.AuditLog.id)).scalar()
+        user_ids = [row[0] for row in db.query(models.User.id).limit(1000).all()] or [None]
+        missing = max(0, target - existing)
+        base = datetime.now(timezone.utc) - timedelta(seconds=missing)
+        actions = ("login", "create", "update", "delete")
+        for offset in range(0, missing, BATCH):
+            rows = [
+                {
+                    "user_id": user_ids[n % len(user_ids)],
+                    "action": actions[n % len(actions)],
+                    "resource": "user" if n % 3 else "department",
+                    "resource_id": n % 5000,
+                    "details": {"bench": n, "source": "export_stream"},
+                    "ip_address": f"10.0.{n % 256}.{n % 7}",
+                    "user_agent": "bench",
+                    "created_at": base + timedelta(seconds=n),
+                }
+                for n in range(offset, min(offset + BATCH, missing))
+            ]
+            db.execute(insert(models.AuditLog), rows)
+            db.commit()
+        print(f"audit_logs: {existing} existing, {missing} inserted")
+    finally:
+        db.close()
+
+def buffered_json() -> tuple:
+    """Previous approach: everything in memory before the first byte goes out."""
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        logs = db.query(models.AuditLog).order_by(
+            models.AuditLog.created_at.desc(), models.AuditLog.id.desc()
+        ).all()
+        body = json.dumps([
+            {
+                "id": log.id,
+                "created_at": log.created_at,
+                "user_id": log.user_id,
+                "username": log.user.username if log.user else None,
+                "action": log.action,
+                "resource": log.resource,
+                "resource_id": log.resource_id,
+                "ip_address": log.ip_address,
+                "user_agent": log.user_agent,
+                "details": log.details,
+            }
+            for log in logs
+        ], default=str).encode()
+    finally:
+        db.close()
+    first_byte = time.perf_counter() - start
+    return first_byte, time.perf_counter() - start, len(logs), len(body)
+
+async def streamed(format: str) -> tuple:
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""})
+    start = time.perf_counter()
+    response = export_audit_logs(request=request, format=format, current_user=Principal(id=0, role=models.Role.ADMIN))
+    first_byte = None
+    size = lines = 0
+    async for chunk in response.body_iterator:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk.encode())
+        lines += chunk.count("\n")
+    rows = lines - 1 if format == "csv" else lines
+    return first_byte, time.perf_counter() - start, rows, size
+
+def run_case(case: str) -> None:
+    """Child process: run one case and print its figures as JSON."""
+    if case == "buffered json":
+        first_byte, total, rows, size = buffered_json()
+    else:
+        first_byte, total, rows, size = asyncio.run(streamed(case))
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"ttfb_ms": first_byte * 1000, "total_s": total, "rows": rows, "mb": size / 1e6, "peak_rss_mb": peak_mb}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="insert audit logs up to --rows first")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--case", choices=CASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.case)
+        return
+    if args.seed:
+        seed(args.rows)
+
+    for case in CASES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--case", case],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{case:<14} ttfb {result['ttfb_ms']:>10.1f} ms  total {result['total_s']:>7.2f} s  "
+              f"{result['rows']} rows / {result['mb']:.1f} MB  peak RSS {result['peak_rss_mb']:>7.1f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# benchmarks/login_lookup.py - DB ROUND TRIPS PER LOGIN ATTEMPT
+"""Count SQL statements and time the login user lookup per attempt.
+
+Runs in-process against the configured DATABASE_URL; pass an existing
+user's username and email::
+
+    python benchmarks/login_lookup.py --username admin --email admin@example.com
+
+"two-query" is the previous lookup (username, then email on a miss),
+kept here only for comparison.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import event
+
+from app import models
+from app.database import SessionLocal, engine
+from app.api.v1.auth import _find_login_user
+
+statements = 0
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+def two_query_lookup(db, username):
+    user = db.query(models.User).filter(models.User.username == username).first()
+    if not user:
+        user = db.query(models.User).filter(models.User.email == username).first()
+    db.close()
+    return user
+
+def run(lookup, login: str, iterations: int):
+    global statements
+    statements = 0
+    found = None
+    start = time.perf_counter()
+    for _ in range(iterations):
+        found = lookup(SessionLocal(), login)
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations * 1000, statements / iterations, found is not None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--email", default=None)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = [("username", args.username), ("USERNAME", args.username.upper()), ("unknown", "no-such-user")]
+    if args.email:
+        cases.insert(1, ("email", args.email))
+
+    for name, lookup in [("single query", _find_login_user), ("two-query", two_query_lookup)]:
+        for case_name, login in cases:
+            ms, per_attempt, found = run(lookup, login, args.iterations)
+            label = f"{name} / {case_name}"
+            print(f"{label:<28} {ms:>7.3f} ms/attempt  {per_attempt:.2f} round trips/attempt  found={found}")
+
+if __name__ == "__main__":
+    main()
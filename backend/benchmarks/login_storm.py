@@ -0,0 +1,63 @@
+# benchmarks/login_storm.py - LOGIN STORM VS. EVERYTHING ELSE
+"""Fire a burst of logins and measure how the rest of the API copes.
+
+Start the API (``uvicorn main:app``) and run::
+
+    python benchmarks/login_storm.py --username admin --password 1234
+
+Compare a server started with ``BCRYPT_POOL_SIZE=0`` (bcrypt on the request
+threadpool, as before) against the default process pool. The probe hits a
+sync endpoint, so it competes for the same threadpool as login used to.
+"""
+import argparse
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common import http_request, print_result, run_for, run_load
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="1234")
+    parser.add_argument("--logins", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--probe-path", default="/api/v1/divisions/health")
+    parser.add_argument("--probe-concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    def do_login():
+        status, _ = http_request("POST", f"{args.base_url}/api/v1/auth/login",
+                                 form={"username": args.username, "password": args.password})
+        return status
+
+    def do_probe():
+        status, _ = http_request("GET", f"{args.base_url}{args.probe_path}")
+        return status
+
+    # Baseline latency of the probe with no login traffic
+    idle_stop = threading.Event()
+    timer = threading.Timer(3.0, idle_stop.set)
+    timer.start()
+    print_result("probe (idle)", run_for(do_probe, idle_stop, args.probe_concurrency))
+
+    storm_stop = threading.Event()
+    probe_result = {}
+    probe = threading.Thread(
+        target=lambda: probe_result.update(run_for(do_probe, storm_stop, args.probe_concurrency))
+    )
+    probe.start()
+    try:
+        login_result = run_load(do_login, args.logins, args.concurrency)
+    finally:
+        storm_stop.set()
+        probe.join()
+
+    print_result("login (storm)", login_result)
+    print_result("probe (during storm)", probe_result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# calibrate_bcrypt.py - REPORT THE BCRYPT COST FOR THIS MACHINE
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app import models
+from app.auth_utils import (
+    BCRYPT_ROUNDS, BCRYPT_TARGET_MS, BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS, BCRYPT_ROUNDS_SETTING,
+    calibrate_bcrypt_rounds, measure_bcrypt_ms
+)
+from app.database import SessionLocal
+
+def main():
+    parser = argparse.ArgumentParser(description="Choose a bcrypt cost for a target verification time")
+    parser.add_argument("--target-ms", type=float, default=BCRYPT_TARGET_MS,
+                        help="target verification time in ms (default: BCRYPT_TARGET_MS)")
+    parser.add_argument("--samples", type=int, default=5, help="verifications timed per cost")
+    parser.add_argument("--table", action="store_true", help="also time every cost around the chosen one")
+    args = parser.parse_args()
+
+    if BCRYPT_ROUNDS:
+        rounds = int(BCRYPT_ROUNDS)
+        measured_ms = measure_bcrypt_ms(rounds, args.samples)
+        print(f"BCRYPT_ROUNDS is set: the API will use cost {rounds} and skip calibration")
+    else:
+        rounds, measured_ms = calibrate_bcrypt_rounds(args.target_ms, args.samples)
+
+    if not BCRYPT_ROUNDS:
+        try:
+            db = SessionLocal()
+            try:
+                stored = db.query(models.SystemSettings.value).filter(
+                    models.SystemSettings.key == BCRYPT_ROUNDS_SETTING
+                ).scalar()
+            finally:
+                db.close()
+        except Exception as e:
+            stored = None
+            print(f"❌ Could not read the stored cost: {e}")
+        if stored is not None:
+            print(f"stored cost {stored} is what the API uses; delete system_settings.{BCRYPT_ROUNDS_SETTING} to recalibrate")
+
+    print(f"target verification time : {args.target_ms:.0f} ms")
+    print(f"chosen bcrypt cost       : {rounds}")
+    print(f"measured verification    : {measured_ms:.1f} ms")
+
+    if args.table:
+        print("\ncost  verify_ms")
+        for cost in range(max(BCRYPT_MIN_ROUNDS, rounds - 2), min(BCRYPT_MAX_ROUNDS, rounds + 1) + 1):
+            print(f"{cost:>4}  {measure_bcrypt_ms(cost, args.samples):9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import logging
 import os
 
+# Configure logging before the app modules create their loggers
+from app.logging_config import configure_logging, stop_logging
+configure_logging()
+
 # Import the unified api_router instead of individual routers
 from app.api.v1 import api_router
+from app import attendance, auth_utils, password_pool
+from app.database import all_async_engines, engine
+from app.read_routing import ReplicaStickinessMiddleware
+from app.query_stats import QueryStatsMiddleware
 
 app = FastAPI(
     title="FactoryShift API",
@@ -20,11 +29,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-DB-Queries"],
 )
 
+# Keep a user's reads on the primary right after their own writes
+app.add_middleware(ReplicaStickinessMiddleware)
+
+# Count SQL per request (Server-Timing / X-DB-Queries); added last so it's outermost
+app.add_middleware(QueryStatsMiddleware)
+
 # Include the unified router with the base prefix
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+def startup():
+    auth_utils.init_password_hashing()
+    password_pool.start()
+    try:
+        attendance.ensure_future_partitions(engine)
+    except Exception:
+        # Ingest creates what it needs; don't keep the API down over this
+        logging.getLogger(__name__).exception("Could not create attendance partitions")
+
+@app.on_event("shutdown")
+async def shutdown():
+    password_pool.shutdown()
+    for engine in all_async_engines():
+        await engine.dispose()
+    stop_logging()
+
 @app.get("/")
 def root():
     return {
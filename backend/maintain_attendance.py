@@ -0,0 +1,44 @@
+# maintain_attendance.py - ATTENDANCE PARTITIONS AND DAILY ROLLUP MAINTENANCE
+"""Create upcoming attendance_events partitions and rebuild the daily rollup.
+
+The API creates partitions at startup and whenever a batch reaches a new
+month; run this from cron (e.g. daily) so they exist well ahead, and so any
+month that landed in the default partition gets its own. Rebuild
+the rollup after a backfill, a restore or manual SQL on attendance_events::
+
+    python maintain_attendance.py                                   # partitions
+    python maintain_attendance.py --rebuild 2026-09-01 2026-09-30   # and the rollup for September
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal, engine
+from app import attendance
+
+def main():
+    parser = argparse.ArgumentParser(description="Create attendance partitions and rebuild the daily rollup")
+    parser.add_argument("--months-ahead", type=int, default=attendance.ATTENDANCE_PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--rebuild", nargs=2, metavar=("FIRST_DAY", "LAST_DAY"),
+                        help="recompute attendance_daily for these work days (YYYY-MM-DD, inclusive)")
+    args = parser.parse_args()
+
+    created = attendance.ensure_future_partitions(engine, args.months_ahead)
+    created += attendance.drain_default_partition(engine)
+    for name in created:
+        print(f"✓ Partition {name} created")
+    if not created:
+        print("✓ Partitions ready")
+
+    if args.rebuild:
+        first, last = (attendance.parse_day(value) for value in args.rebuild)
+        db = SessionLocal()
+        try:
+            written = attendance.rebuild_daily(db, first, last)
+        finally:
+            db.close()
+        print(f"✅ Rebuilt {written} daily rows for {first} to {last}")
+
+if __name__ == "__main__":
+    main()
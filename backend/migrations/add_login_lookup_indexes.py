@@ -0,0 +1,33 @@
+# migrations/add_login_lookup_indexes.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from sqlalchemy import text
+
+def add_login_lookup_indexes():
+    try:
+        print("Creating lower(username) / lower(email) indexes...")
+        
+        # CONCURRENTLY can't run inside a transaction, and keeps users writable meanwhile
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_username_lower ON users (lower(username))"
+            ))
+            print("✓ ix_users_username_lower")
+            conn.execute(text(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_lower ON users (lower(email))"
+            ))
+            print("✓ ix_users_email_lower")
+            conn.execute(text("ANALYZE users"))
+        
+        print("\n✅ Migration completed successfully!")
+        
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    add_login_lookup_indexes()
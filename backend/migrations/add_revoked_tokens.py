@@ -0,0 +1,40 @@
+# migrations/add_revoked_tokens.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from sqlalchemy import text
+
+def add_revoked_tokens_table():
+    try:
+        print("Creating revoked_tokens table...")
+        
+        with engine.connect() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS revoked_tokens (
+                    id SERIAL PRIMARY KEY,
+                    jti VARCHAR NOT NULL UNIQUE,
+                    user_id INTEGER,
+                    token_type VARCHAR NOT NULL,
+                    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+                    revoked_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                )
+            """))
+            
+            # Workers sync by revoked_at; cleanup deletes by expires_at
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_revoked_tokens_user_id ON revoked_tokens(user_id)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens(expires_at)"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_revoked_tokens_revoked_at ON revoked_tokens(revoked_at)"))
+            
+            conn.commit()
+        
+        print("\n✅ Migration completed successfully!")
+        
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    add_revoked_tokens_table()
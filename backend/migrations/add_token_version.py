@@ -0,0 +1,27 @@
+# migrations/add_token_version.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from sqlalchemy import text
+
+def add_token_version_column():
+    try:
+        print("Adding users.token_version...")
+        
+        with engine.connect() as conn:
+            conn.execute(text(
+                "ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0"
+            ))
+            conn.commit()
+        
+        print("\n✅ Migration completed successfully!")
+        
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+        traceback.print_exc()
+
+if __name__ == "__main__":
+    add_token_version_column()
@@ -0,0 +1,40 @@
+# reconcile_headcounts.py - REPAIR DRIFT IN THE ORG HEADCOUNT ROLLUP
+"""Recompute org_headcounts from users and fix any rows that differ.
+
+The API keeps the rollup in step on every user write; run this from cron
+(e.g. nightly) and after bulk imports, restores or manual SQL on users::
+
+    python reconcile_headcounts.py            # repair
+    python reconcile_headcounts.py --dry-run  # report only
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app import org_rollup
+
+def main():
+    parser = argparse.ArgumentParser(description="Repair drift in the org headcount rollup")
+    parser.add_argument("--dry-run", action="store_true", help="report drift without changing anything")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drift = org_rollup.reconcile(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    for entry in drift:
+        print(f"division {entry['division_id']} / department {entry['department_id']}: "
+              f"stored {entry['stored']} -> actual {entry['actual']}")
+    if not drift:
+        print("✓ Rollup matches users")
+    elif args.dry_run:
+        print(f"❌ {len(drift)} rows drifted (dry run, nothing changed)")
+    else:
+        print(f"✅ Repaired {len(drift)} rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# report_worker.py - BUILD QUEUED REPORTS (POST /api/v1/dashboard/report-jobs)
+"""Run one or more of these next to the API; they share the queue safely::
+
+    python report_worker.py          # poll forever
+    python report_worker.py --once   # drain the queue and exit (cron)
+"""
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.logging_config import configure_logging, stop_logging
+configure_logging()
+
+from app.report_jobs import run_worker
+
+def main():
+    parser = argparse.ArgumentParser(description="Build queued report jobs")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    try:
+        run_worker(once=args.once)
+    except KeyboardInterrupt:
+        print("\nReport worker stopped")
+    finally:
+        stop_logging()
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.database import SessionLocal, engine
 from app import models
+from app import org_rollup  # keeps org_headcounts in step as users are added
 from app.auth_utils import get_password_hash
 from sqlalchemy import text
 from datetime import datetime, timedelta
@@ -19,6 +20,11 @@ def seed_database():
         print("Dropping existing tables...")
         with engine.connect() as conn:
             # Drop tables manually in correct order
+            conn.execute(text("DROP TABLE IF EXISTS attendance_daily CASCADE"))
+            conn.execute(text("DROP TABLE IF EXISTS attendance_events CASCADE"))
+            conn.execute(text("DROP TABLE IF EXISTS report_jobs CASCADE"))
+            conn.execute(text("DROP TABLE IF EXISTS org_headcounts CASCADE"))
+            conn.execute(text("DROP TABLE IF EXISTS revoked_tokens CASCADE"))
             conn.execute(text("DROP TABLE IF EXISTS notifications CASCADE"))
             conn.execute(text("DROP TABLE IF EXISTS audit_logs CASCADE"))
             conn.execute(text("DROP TABLE IF EXISTS system_settings CASCADE"))
@@ -0,0 +1,90 @@
+# tests/conftest.py - SHARED FIXTURES: A SCRATCH SQLITE DATABASE
+import asyncio
+import itertools
+import os
+import tempfile
+
+import pytest
+
+# Set before anything imports app.database, which reads them at import time
+_tmp = tempfile.mkdtemp(prefix="factoryshift-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["DATABASE_REPLICA_URL"] = ""
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("BCRYPT_POOL_SIZE", "0")
+os.environ.setdefault("SLOW_QUERY_MS", "0")
+
+from app import models
+from app.database import SessionLocal, async_engine, engine as app_engine
+from app.query_stats import assert_max_queries
+from app.api.v1.auth import Principal
+
+@pytest.fixture(scope="session")
+def engine():
+    """The app's own engine, on a fresh SQLite file with every table created."""
+    models.Base.metadata.create_all(bind=app_engine)
+    yield app_engine
+    # aiosqlite keeps a worker thread per pooled connection until disposed
+    asyncio.run(async_engine.dispose())
+    app_engine.dispose()
+
+@pytest.fixture
+def db(engine):
+    """A session on the test database; every table is emptied afterwards."""
+    session = SessionLocal()
+    yield session
+    session.close()
+    with engine.begin() as conn:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+@pytest.fixture
+def max_queries():
+    """``with max_queries(n): ...`` fails the test if the block runs more than n statements."""
+    return assert_max_queries
+
+_serial = itertools.count(1)
+
+def _user(db, role: models.Role, **fields) -> models.User:
+    n = next(_serial)
+    user = models.User(
+        username=f"user{n}", email=f"user{n}@example.com", employee_id=f"E{n:05d}",
+        password_hash="not-a-hash", full_name=f"User {n}", role=role, **fields
+    )
+    db.add(user)
+    db.flush()
+    return user
+
+@pytest.fixture
+def make_user(db):
+    """``make_user(role, **fields)`` -> a committed user with a unique username."""
+    def make(role: models.Role, **fields) -> models.User:
+        user = _user(db, role, **fields)
+        db.commit()
+        return user
+    return make
+
+@pytest.fixture
+def make_division(db):
+    """``make_division(departments)`` -> (division, its manager as a Principal).
+
+    Each department gets a department manager and ``employees`` employees.
+    """
+    def make(departments: int, employees: int = 2):
+        n = next(_serial)
+        division = models.Division(name=f"Division {n}", color="blue")
+        db.add(division)
+        db.flush()
+        manager = _user(db, models.Role.DIVISION_MANAGER, division_id=division.id)
+        for d in range(departments):
+            department = models.Department(name=f"Dept {n}-{d}", code=f"D{n}-{d}", division_id=division.id)
+            db.add(department)
+            db.flush()
+            head = _user(db, models.Role.DEPARTMENT_MANAGER, division_id=division.id, department_id=department.id)
+            department.manager_id = head.id
+            for _ in range(employees):
+                _user(db, models.Role.EMPLOYEE, division_id=division.id, department_id=department.id)
+        db.commit()
+        return division, Principal(id=manager.id, role=manager.role, division_id=division.id)
+    return make
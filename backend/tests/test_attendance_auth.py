@@ -0,0 +1,41 @@
+# tests/test_attendance_auth.py - WHO MAY POST ATTENDANCE EVENTS
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.auth_utils import create_access_token, create_service_token
+from app.revocation import revocation_store
+from app.api.v1.attendance import INGEST_SCOPE
+from app.api.v1.auth import access_token_claims, get_current_claims, logout, require_scope
+
+ingest_caller = require_scope(INGEST_SCOPE)
+
+def _status(call) -> int:
+    with pytest.raises(HTTPException) as raised:
+        call()
+    return raised.value.status_code
+
+@pytest.fixture
+def admin(make_user):
+    return make_user(models.Role.ADMIN)
+
+def test_device_token_may_ingest_and_nothing_else(db, admin):
+    token = create_service_token("gate-1", [INGEST_SCOPE], issued_by=admin.id)
+    caller = ingest_caller(token, db)
+    assert (caller.subject, caller.user_id, caller.service) == ("gate-1", admin.id, True)
+    assert _status(lambda: get_current_claims(token, db)) == 401
+
+def test_device_token_without_the_scope_is_refused(db, admin):
+    token = create_service_token("gate-1", ["reports:read"], issued_by=admin.id)
+    assert _status(lambda: ingest_caller(token, db)) == 403
+
+def test_revoked_device_token_is_refused(db, admin):
+    token = create_service_token("gate-1", [INGEST_SCOPE], issued_by=admin.id)
+    logout(None, token, db)
+    assert _status(lambda: ingest_caller(token, db)) == 401
+    revocation_store.clear()
+
+def test_only_admins_may_ingest_with_their_own_token(db, admin, make_user):
+    employee = make_user(models.Role.EMPLOYEE)
+    assert ingest_caller(create_access_token(access_token_claims(admin)), db).service is False
+    assert _status(lambda: ingest_caller(create_access_token(access_token_claims(employee)), db)) == 403
@@ -0,0 +1,56 @@
+# tests/test_attendance_rollup.py - INCREMENTAL ROLLUP MUST MATCH A REBUILD FROM EVENTS
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from app import attendance, models, schemas
+
+COLUMNS = ("first_in", "last_out", "scheduled_start", "shift_minutes", "worked_minutes",
+           "late_minutes", "overtime_minutes", "status", "events")
+
+def _ingest(db, user_id, *events):
+    return attendance.ingest(db, schemas.AttendanceEventBatch(events=[
+        {"user_id": user_id, "type": event_type, "timestamp": timestamp.isoformat()}
+        for event_type, timestamp in events
+    ]).events)
+
+def _rollup(db, user_id):
+    rows = db.query(models.AttendanceDaily).filter(models.AttendanceDaily.user_id == user_id)
+    return {row.work_day: {column: getattr(row, column) for column in COLUMNS} for row in rows}
+
+@pytest.fixture
+def night_worker(db, make_user):
+    shift = models.Shift(name="Night", start_time="22:00", end_time="06:00")
+    db.add(shift)
+    db.commit()
+    return make_user(models.Role.EMPLOYEE, shift_id=shift.id)
+
+def test_night_shift_out_of_order_matches_rebuild(db, night_worker):
+    day = attendance.today() - timedelta(days=3)
+    at = lambda offset, hour, minute: datetime.combine(day + timedelta(days=offset), time(hour, minute))
+
+    _ingest(db, night_worker.id, ("clock_out", at(1, 6, 10)))  # the clock-out arrives first
+    _ingest(db, night_worker.id, ("clock_in", at(0, 22, 20)))
+    _ingest(db, night_worker.id, ("clock_in", at(0, 21, 55)), ("clock_out", at(1, 5, 0)))  # earlier in, earlier out
+    _ingest(db, night_worker.id, ("clock_in", at(1, 22, 0)), ("clock_out", at(2, 7, 30)))  # next night, in one batch
+    incremental = _rollup(db, night_worker.id)
+
+    # Both nights stay on the day their shift started
+    assert {work_day: row["worked_minutes"] for work_day, row in incremental.items()} == {
+        day: 8 * 60 + 15, day + timedelta(days=1): 9 * 60 + 30
+    }
+    assert incremental[day]["status"] == "present" and incremental[day]["overtime_minutes"] == 15
+
+    attendance.rebuild_daily(db, day - timedelta(days=1), day + timedelta(days=3))
+    assert _rollup(db, night_worker.id) == incremental
+
+def test_events_outside_the_window_are_rejected(db, night_worker):
+    now = datetime.now()
+    result = _ingest(
+        db, night_worker.id,
+        ("clock_in", datetime(1970, 1, 1, 8, 0)),
+        ("clock_in", now + timedelta(days=400)),
+        ("clock_in", now - timedelta(hours=1)),
+    )
+    assert result["inserted"] == 1
+    assert [entry["index"] for entry in result["rejected"]] == [0, 1]
@@ -0,0 +1,65 @@
+# tests/test_division_overview.py - /dashboard/division-overview IN ONE QUERY
+"""One query per call whatever the division count, same response as the old loop."""
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+from app.database import AsyncSessionLocal, async_engine
+from app.api.v1.auth import Principal
+from app.api.v1.dashboard import get_division_overview
+
+async def per_division_loop(db, user: Principal) -> dict:
+    """Previous implementation: two COUNTs per division, kept for comparison."""
+    statement = select(models.Division)
+    if user.role != models.Role.ADMIN:
+        if not user.division_id:
+            return {"divisions": []}
+        statement = statement.where(models.Division.id == user.division_id)
+    overview = []
+    for division in (await db.execute(statement.order_by(models.Division.id))).scalars().all():
+        dept_count = (await db.execute(select(func.count()).select_from(models.Department).where(
+            models.Department.division_id == division.id
+        ))).scalar_one()
+        emp_count = (await db.execute(select(func.count()).select_from(models.User).where(
+            models.User.division_id == division.id
+        ))).scalar_one()
+        overview.append({
+            "id": division.id,
+            "name": division.name,
+            "description": division.description,
+            "color": division.color,
+            "department_count": dept_count,
+            "employee_count": emp_count,
+            "created_at": division.created_at
+        })
+    return {"divisions": overview}
+
+def _run(coroutine_function):
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await coroutine_function(db)
+        finally:
+            # Pooled aiosqlite connections belong to this event loop
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("divisions", [1, 4])
+@pytest.mark.parametrize("scope", ["admin", "division manager", "employee without division"])
+def test_division_overview_one_query(db, make_division, max_queries, divisions, scope):
+    managers = [make_division(departments=n + 1, employees=n) for n in range(divisions)]
+    user = {
+        "admin": Principal(id=0, role=models.Role.ADMIN),
+        "division manager": managers[-1][1],
+        "employee without division": Principal(id=0, role=models.Role.EMPLOYEE),
+    }[scope]
+
+    async def overview(session):
+        with max_queries(1):
+            return await get_division_overview(db=session, current_user=user)
+
+    actual = _run(overview)
+    assert actual == _run(lambda session: per_division_loop(session, user))
+    assert len(actual["divisions"]) == {"admin": divisions, "division manager": 1}.get(scope, 0)
@@ -0,0 +1,42 @@
+# tests/test_password_hashing.py - ONE SHARED BCRYPT COST, CALIBRATED ONCE
+import asyncio
+
+import pytest
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from app import auth_utils, password_pool
+
+@pytest.fixture
+def unpinned(db, monkeypatch):
+    """No BCRYPT_ROUNDS; calibration is counted instead of timed."""
+    calls = []
+
+    def calibrate():
+        calls.append(1)
+        return 5, 1.0
+
+    monkeypatch.setattr(auth_utils, "BCRYPT_ROUNDS", None)
+    monkeypatch.setattr(auth_utils, "calibrate_bcrypt_rounds", calibrate)
+    yield calls
+    auth_utils.configure_password_hashing(4)
+
+def test_only_the_first_process_calibrates(unpinned):
+    assert auth_utils.init_password_hashing() == 5
+    assert auth_utils.init_password_hashing() == 5
+    assert len(unpinned) == 1
+
+def test_hashes_at_any_other_cost_are_rehashed(unpinned):
+    auth_utils.init_password_hashing()
+    for rounds in (4, 6):
+        hashed = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds).hash("secret")
+        valid, new_hash = auth_utils.verify_and_update_password("secret", hashed)
+        assert valid and new_hash is not None and new_hash.startswith("$2b$05$")
+    assert auth_utils.verify_and_update_password("secret", auth_utils.get_password_hash("secret")) == (True, None)
+
+def test_sync_hashing_shares_the_pool_backpressure(monkeypatch):
+    monkeypatch.setattr(password_pool, "BCRYPT_POOL_SIZE", 0)
+    assert asyncio.run(run_in_threadpool(password_pool.hash_password, "secret")).startswith("$2b$")
+    monkeypatch.setattr(password_pool, "BCRYPT_MAX_PENDING", 0)
+    with pytest.raises(password_pool.PasswordPoolBusy):
+        asyncio.run(run_in_threadpool(password_pool.hash_password, "secret"))
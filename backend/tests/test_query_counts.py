@@ -0,0 +1,27 @@
+# tests/test_query_counts.py - QUERY BUDGETS FOR ENDPOINTS THAT USED TO RUN N+1
+"""Each endpoint runs the same number of statements however big the division is.
+
+/dashboard/division-overview has its own tests (test_division_overview.py).
+"""
+import pytest
+
+from app.api.v1.division_manager import get_division_departments, get_division_settings
+
+@pytest.mark.parametrize("departments", [1, 10])
+def test_division_departments(db, make_division, max_queries, departments):
+    _, manager = make_division(departments)
+    # departments, headcounts, managers
+    with max_queries(3):
+        result = get_division_departments(db=db, current_user=manager)
+    assert len(result) == departments
+    assert all(dept["manager"] and dept["employee_count"] == 3 for dept in result)
+
+@pytest.mark.parametrize("departments", [1, 10])
+def test_division_settings(db, make_division, max_queries, departments):
+    _, manager = make_division(departments)
+    # division, department count, headcount, managers, managers' departments
+    with max_queries(5):
+        result = get_division_settings(db=db, current_user=manager)
+    assert result["statistics"]["total_departments"] == departments
+    assert result["statistics"]["managers_count"] == departments + 1
+    assert sum("department" in m for m in result["managers"]) == departments
@@ -0,0 +1,66 @@
+# tests/test_report_cache.py - generate-report CACHE: WHAT IS KEPT AND FOR HOW LONG
+import time
+from datetime import datetime
+
+import pytest
+
+from app import attendance, cache, models, schemas
+from app.api.v1.dashboard import REPORT_CACHE_CLOSED_TTL_SECONDS, _cached_report, report_cache
+from app.api.v1.users import delete_user
+
+SEPTEMBER = ("2026-09-01", "2026-09-30", datetime(2026, 9, 1), datetime(2026, 9, 30))
+
+class Admin:
+    def __init__(self, id: int, full_name: str):
+        self.id, self.full_name = id, full_name
+        self.role, self.division_id, self.department_id = models.Role.ADMIN, None, None
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    report_cache.clear()
+    yield
+    report_cache.clear()
+
+def _later(monkeypatch, seconds: float) -> None:
+    now = time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + seconds)
+
+def test_closed_period_part_is_kept_for_the_closed_ttl(db, monkeypatch):
+    _, meta = _cached_report(db, "user", Admin(1, "A"), *SEPTEMBER)
+    assert meta["period"] == "closed" and meta["ttl_seconds"] == REPORT_CACHE_CLOSED_TTL_SECONDS
+    _later(monkeypatch, REPORT_CACHE_CLOSED_TTL_SECONDS - 1)
+    assert _cached_report(db, "user", Admin(1, "A"), *SEPTEMBER)[1]["hit"]
+    _later(monkeypatch, REPORT_CACHE_CLOSED_TTL_SECONDS + 1)
+    assert not _cached_report(db, "user", Admin(1, "A"), *SEPTEMBER)[1]["hit"]
+
+def test_deleting_a_user_drops_closed_summaries(db, make_user):
+    user = make_user(models.Role.EMPLOYEE, created_at=datetime(2026, 9, 15))
+    first, _ = _cached_report(db, "summary", Admin(1, "A"), *SEPTEMBER)
+    assert first["summary"]["new_users"] == 1
+    delete_user(user.id, db, Admin(1, "A"))
+    second, meta = _cached_report(db, "summary", Admin(1, "A"), *SEPTEMBER)
+    assert not meta["hit"] and second["summary"]["new_users"] == 0
+
+def test_cached_summary_is_finished_per_request(db):
+    first, _ = _cached_report(db, "summary", Admin(1, "First Admin"), *SEPTEMBER)
+    second, meta = _cached_report(db, "summary", Admin(2, "Second Admin"), *SEPTEMBER)
+    assert meta["hit"]
+    assert (first["generated_by"], second["generated_by"]) == ("First Admin", "Second Admin")
+
+def test_attendance_expires_and_is_dropped_by_ingest(db, make_division, monkeypatch):
+    monkeypatch.setattr(attendance, "ATTENDANCE_EVENT_MAX_AGE_DAYS", 10 ** 5)  # September may be long past
+    _, manager = make_division(1)
+    _, meta = _cached_report(db, "attendance", Admin(1, "A"), *SEPTEMBER)
+    assert meta["ttl_seconds"] == report_cache.ttl
+
+    def ingest(timestamp):
+        attendance.ingest(db, schemas.AttendanceEventBatch(events=[
+            {"user_id": manager.id, "type": "clock_in", "timestamp": timestamp}
+        ]).events)
+
+    ingest("2026-10-05T08:00:00+00:00")  # outside the period
+    assert _cached_report(db, "attendance", Admin(1, "A"), *SEPTEMBER)[1]["hit"]
+    ingest("2026-09-10T08:00:00+00:00")  # a past day inside it
+    assert not _cached_report(db, "attendance", Admin(1, "A"), *SEPTEMBER)[1]["hit"]
+    _later(monkeypatch, report_cache.ttl + 1)
+    assert not _cached_report(db, "attendance", Admin(1, "A"), *SEPTEMBER)[1]["hit"]
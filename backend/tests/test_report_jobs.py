@@ -0,0 +1,85 @@
+# tests/test_report_jobs.py - REPORT JOB OWNERSHIP, HEARTBEAT AND RETENTION
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import models, report_jobs, reports
+from app.database import SessionLocal
+
+@pytest.fixture
+def slow_report(db, make_division, monkeypatch):
+    """A queued job whose report takes until ``release`` is set."""
+    _, manager = make_division(1)
+    release = threading.Event()
+
+    def build(db, user, start, end):
+        release.wait(5)
+        return {"built_by": threading.current_thread().name}
+
+    monkeypatch.setitem(reports.REPORT_BUILDERS, "summary", build)
+    monkeypatch.setattr(report_jobs, "REPORT_JOB_STALE_SECONDS", 0.5)
+    now = datetime.now(timezone.utc)
+    job = report_jobs.enqueue(db, "summary", manager.id, now - timedelta(days=1), now)
+    db.commit()
+    return job.id, release
+
+def _run_in_thread(worker: str) -> threading.Thread:
+    def run():
+        db = SessionLocal()
+        try:
+            job = report_jobs.claim_next(db, worker)
+            report_jobs.run_job(db, job)
+        finally:
+            db.close()
+    thread = threading.Thread(target=run, name=worker)
+    thread.start()
+    return thread
+
+def _job(db, job_id: int) -> models.ReportJob:
+    db.expire_all()
+    return db.get(models.ReportJob, job_id)
+
+def test_heartbeat_keeps_a_slow_job(db, slow_report, monkeypatch):
+    job_id, release = slow_report
+    monkeypatch.setattr(report_jobs, "REPORT_JOB_HEARTBEAT_SECONDS", 0.05)
+    thread = _run_in_thread("worker-a")
+    time.sleep(1.0)  # twice the stale limit
+    assert report_jobs.requeue_stale(db) == 0
+    release.set()
+    thread.join()
+    job = _job(db, job_id)
+    assert (job.status, job.attempts, job.result) == ("done", 1, {"built_by": "worker-a"})
+
+def test_result_of_a_job_taken_away_is_dropped(db, slow_report, monkeypatch):
+    job_id, release = slow_report
+    monkeypatch.setattr(report_jobs, "REPORT_JOB_HEARTBEAT_SECONDS", 60)  # worker looks dead
+    first = _run_in_thread("worker-a")
+    time.sleep(1.0)
+    assert report_jobs.requeue_stale(db) == 1
+    second = _run_in_thread("worker-b")
+    release.set()
+    first.join()
+    second.join()
+    job = _job(db, job_id)
+    assert (job.status, job.worker, job.attempts, job.result) == ("done", "worker-b", 2, {"built_by": "worker-b"})
+
+def test_purge_finished(db, make_division, monkeypatch):
+    _, manager = make_division(1)
+    now = datetime.now(timezone.utc)
+    ages = {"done": 40, "failed": 31, "queued": 90}
+    for status, days in ages.items():
+        db.add(models.ReportJob(
+            report_type="summary", requested_by=manager.id, start_date=now, end_date=now, status=status,
+            created_at=now - timedelta(days=days),
+            finished_at=now - timedelta(days=days) if status != "queued" else None
+        ))
+    db.add(models.ReportJob(
+        report_type="summary", requested_by=manager.id, start_date=now, end_date=now, status="done",
+        created_at=now - timedelta(days=2), finished_at=now - timedelta(days=1)
+    ))
+    db.commit()
+    monkeypatch.setattr(report_jobs, "REPORT_JOB_RETENTION_DAYS", 30)
+    assert report_jobs.purge_finished(db) == 2
+    assert sorted(status for (status,) in db.query(models.ReportJob.status)) == ["done", "queued"]
@@ -0,0 +1,59 @@
+# tests/test_slow_queries.py - EXPLAIN CAPTURE MUST NOT DISTURB THE CALLER'S TRANSACTION
+from types import SimpleNamespace
+
+import pytest
+
+from app import slow_queries
+
+class Cursor:
+    def __init__(self, executed, fail_on):
+        self.executed, self.fail_on = executed, fail_on
+
+    def execute(self, sql, parameters=None):
+        self.executed.append(sql)
+        if self.fail_on and sql.startswith(self.fail_on):
+            raise RuntimeError("syntax error")
+
+    def fetchall(self):
+        return [("Seq Scan on users",)]
+
+    def close(self):
+        pass
+
+def postgres_conn(executed, fail_on=None, autocommit=False):
+    raw = SimpleNamespace(cursor=lambda: Cursor(executed, fail_on), dbapi_connection=SimpleNamespace(autocommit=autocommit))
+    return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), connection=raw)
+
+@pytest.fixture(autouse=True)
+def analyze(monkeypatch):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_EXPLAIN", "analyze")
+
+def test_explain_runs_in_a_savepoint_that_is_rolled_back():
+    executed = []
+    assert slow_queries._explain(postgres_conn(executed), "SELECT * FROM users", {}, None) == "Seq Scan on users"
+    assert executed == [
+        "SAVEPOINT slow_query_explain",
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) SELECT * FROM users",
+        "ROLLBACK TO SAVEPOINT slow_query_explain",
+        "RELEASE SAVEPOINT slow_query_explain",
+    ]
+
+def test_failed_explain_rolls_back_to_the_savepoint():
+    executed = []
+    with pytest.raises(RuntimeError):
+        slow_queries._explain(postgres_conn(executed, fail_on="EXPLAIN"), "SELECT 1", {}, None)
+    assert executed[-2:] == ["ROLLBACK TO SAVEPOINT slow_query_explain", "RELEASE SAVEPOINT slow_query_explain"]
+
+@pytest.mark.parametrize("statement", [
+    "WITH moved AS (DELETE FROM audit_logs RETURNING *) SELECT count(*) FROM moved",
+    "UPDATE users SET is_active = false",
+])
+def test_only_plain_selects_are_analyzed(statement):
+    executed = []
+    slow_queries._explain(postgres_conn(executed), statement, {}, None)
+    assert executed[1] == f"EXPLAIN (FORMAT TEXT) {statement}"
+
+def test_no_savepoint_in_autocommit():
+    executed = []
+    slow_queries._explain(postgres_conn(executed, autocommit=True), "SELECT 1", {}, None)
+    assert executed == ["EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) SELECT 1"]
@@ -748,6 +748,34 @@ export const settingsService = {
   }
 };
 
+// How often a queued report is polled, and how long to wait for it
+const REPORT_JOB_POLL_MS = 1000;
+const REPORT_JOB_TIMEOUT_MS = 10 * 60 * 1000;
+
+// Queue a report (POST /dashboard/report-jobs), poll it until a report worker
+// has built it, then fetch the result ({ message, report, generated_at, format })
+export const runReportJob = async (reportType, startDate = null, endDate = null) => {
+  const params = { report_type: reportType };
+  if (startDate) params.start_date = startDate;
+  if (endDate) params.end_date = endDate;
+  
+  let { data: job } = await api.post('/dashboard/report-jobs', null, { params });
+  const deadline = Date.now() + REPORT_JOB_TIMEOUT_MS;
+  while (job.status === 'queued' || job.status === 'running') {
+    if (Date.now() > deadline) {
+      throw new Error(`Report job ${job.job_id} did not finish in time`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, REPORT_JOB_POLL_MS));
+    ({ data: job } = await api.get(`/dashboard/report-jobs/${job.job_id}`));
+  }
+  if (job.status !== 'done') {
+    throw new Error(job.error || `Report job ${job.job_id} ${job.status}`);
+  }
+  
+  const response = await api.get(`/dashboard/report-jobs/${job.job_id}/download`);
+  return response.data;
+};
+
 // Dashboard service
 export const dashboardService = {
   getStats: async () => {
@@ -785,12 +813,8 @@ export const dashboardService = {
   
   generateReport: async (reportType = 'summary', startDate = null, endDate = null) => {
     try {
-      const params = { report_type: reportType };
-      if (startDate) params.start_date = startDate;
-      if (endDate) params.end_date = endDate;
-      
-      const response = await api.post('/dashboard/generate-report', null, { params });
-      return response.data;
+      // Built by a report worker, not inside the request
+      return await runReportJob(reportType, startDate, endDate);
     } catch (error) {
       // Return mock report for development
       console.log('Generating mock report:', { reportType, startDate, endDate });
@@ -1,5 +1,5 @@
 // src/services/dashboardService.js
-import api from './api';
+import api, { runReportJob } from './api';
 
 export const dashboardService = {
   // Get dashboard statistics
@@ -15,11 +15,12 @@ export const dashboardService = {
     }
   },
 
-  // Get recent activity
-  getRecentActivity: async (limit = 10) => {
+  // Get recent activity (pass the previous response's next_cursor for the next page)
+  getRecentActivity: async (limit = 10, cursor = null) => {
     try {
       console.log('📈 Fetching recent activity...');
-      const response = await api.get('/dashboard/recent-activity', { params: { limit } });
+      const params = cursor ? { limit, cursor } : { limit };
+      const response = await api.get('/dashboard/recent-activity', { params });
       console.log(`✅ Found ${response.data?.activities?.length || 0} activities`);
       return response.data;
     } catch (error) {
@@ -45,13 +46,10 @@ export const dashboardService = {
   generateReport: async (reportType = 'summary', startDate = null, endDate = null) => {
     try {
       console.log(`📄 Generating ${reportType} report...`);
-      const params = { report_type: reportType };
-      if (startDate) params.start_date = startDate;
-      if (endDate) params.end_date = endDate;
-      
-      const response = await api.post('/dashboard/generate-report', null, { params });
-      console.log('✅ Report generated:', response.data);
-      return response.data;
+      // Queued for a report worker; resolves once the report is built
+      const report = await runReportJob(reportType, startDate, endDate);
+      console.log('✅ Report generated:', report);
+      return report;
     } catch (error) {
       console.error('❌ Error generating report:', error);
       throw error;
@@ -70,7 +68,7 @@ export const dashboardService = {
         'addEmployee': { method: 'POST', endpoint: '/users' },
         'createShift': { method: 'POST', endpoint: '/shifts' },
         'sendNotification': { method: 'POST', endpoint: '/notifications' },
-        'generateReport': { method: 'POST', endpoint: '/dashboard/generate-report' },
+        'generateReport': { method: 'POST', endpoint: '/dashboard/report-jobs' },
         'systemBackup': { method: 'POST', endpoint: '/settings/backup' },
       };
       